@@ -8,6 +8,9 @@ from src.analyzers.cv_analyzer import CVAnalyzer
 from src.database.cv_database import CVDatabase
 from src.query.query_engine import CVQueryEngine
 from src.app.streamlit_app import CVAnalysisApp
+from src.pipeline.manifest import IngestionManifest
+from src.database.near_duplicates import NearDuplicateIndex
+from src.utils import metrics
 
 # Set up logging
 logging.basicConfig(
@@ -20,10 +23,44 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@st.cache_resource
+def start_metrics_server(port: int):
+    """Start the metrics endpoint once per process, not on every Streamlit rerun"""
+    return metrics.start_http_server(port, host=os.getenv("METRICS_HOST", "127.0.0.1"))
+
+@st.cache_resource
+def build_app(api_key: str, analysis_mode: str, duplicate_threshold: float, duplicate_action: str) -> CVAnalysisApp:
+    """Build the application components once per process and reuse them on every rerun
+    
+    Streamlit re-executes main() on each interaction; caching here avoids reloading
+    the database and reconfiguring the LLM client every time. The query engine keeps
+    conversations per session, so one instance is safe to share between browser tabs.
+    """
+    cv_processor = CVProcessor(ocr_enabled=True, ocr_workers=os.cpu_count() or 1,
+                               cache_dir="data/cache/extraction")
+    cv_analyzer = CVAnalyzer(api_key=api_key, cache_dir="data/cache/analysis",
+                             mode=analysis_mode)
+    cv_database = CVDatabase()
+    query_engine = CVQueryEngine(cv_database, api_key=api_key)
+    
+    return CVAnalysisApp(
+        cv_processor=cv_processor,
+        cv_analyzer=cv_analyzer,
+        cv_database=cv_database,
+        query_engine=query_engine,
+        manifest=IngestionManifest("data/ingestion_manifest.db"),
+        near_duplicates=NearDuplicateIndex(cv_database, threshold=duplicate_threshold),
+        duplicate_action=duplicate_action
+    )
+
 def main():
     # Load environment variables
     load_dotenv()
     
+    # Expose Prometheus metrics on /metrics and a JSON dump on /metrics.json
+    if os.getenv("METRICS_PORT"):
+        start_metrics_server(int(os.getenv("METRICS_PORT")))
+    
     # Get API key from environment variables
     api_key = os.getenv("LLM_API_KEY")
     
@@ -32,19 +69,10 @@ def main():
         st.error("No API key found. Please set LLM_API_KEY in .env file")
         return
     
-    # Initialize components
-    cv_processor = CVProcessor(ocr_enabled=True)
-    cv_analyzer = CVAnalyzer(api_key=api_key)
-    cv_database = CVDatabase()
-    query_engine = CVQueryEngine(cv_database, api_key=api_key)
-    
-    # Initialize and run the application
-    app = CVAnalysisApp(
-        cv_processor=cv_processor,
-        cv_analyzer=cv_analyzer,
-        cv_database=cv_database,
-        query_engine=query_engine
-    )
+    # Reuse the components built on the first run of this process
+    app = build_app(api_key, os.getenv("ANALYSIS_MODE", "full"),
+                    float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.85")),
+                    os.getenv("NEAR_DUPLICATE_ACTION", "flag"))
     
     # Run the Streamlit app
     app.run_streamlit_app()
@@ -0,0 +1,78 @@
+import os
+import random
+from typing import Dict, Any, List
+
+import fitz  # PyMuPDF
+
+# Local imports
+from src.analyzers.rule_extractor import DEFAULT_SKILL_LEXICON
+
+FIRST_NAMES = ["Alex", "Maria", "John", "Priya", "Wei", "Fatima", "Lucas", "Emma", "Omar", "Sofia",
+               "Daniel", "Aisha", "Noah", "Yuki", "Carlos", "Hannah", "Ivan", "Chloe", "Mateo", "Zara"]
+LAST_NAMES = ["Smith", "Garcia", "Chen", "Patel", "Kim", "Nguyen", "Müller", "Rossi", "Silva", "Khan",
+              "Johnson", "Brown", "Tanaka", "Ivanova", "Martin", "Lopez", "Cohen", "Novak", "Okafor", "Berg"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Hooli", "Stark Industries", "Wayne Enterprises",
+             "Cyberdyne Systems", "Soylent Co", "Tyrell Corporation", "Aperture Science", "Vandelay Industries"]
+INSTITUTIONS = ["MIT", "Stanford University", "University of Cambridge", "ETH Zurich", "IIT Bombay",
+                "National University of Singapore", "University of Toronto", "TU Munich", "University of Tokyo"]
+DEGREES = ["Bachelor of Science", "Master of Science", "PhD", "Bachelor of Engineering", "MBA"]
+FIELDS = ["Computer Science", "Electrical Engineering", "Mathematics", "Physics", "Data Science", "Economics"]
+TITLES = ["Software Engineer", "Senior Software Engineer", "Data Scientist", "Machine Learning Engineer",
+          "DevOps Engineer", "Backend Developer", "Frontend Developer", "Engineering Manager", "Data Engineer"]
+SKILLS = sorted(set(DEFAULT_SKILL_LEXICON.values()))
+
+def synthetic_cv_text(index: int, rng: random.Random) -> str:
+    """Build the text of a plausible synthetic CV"""
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    lines = [
+        f"{first} {last}",
+        f"{first.lower()}.{last.lower()}{index}@example.com | +1 555 {rng.randint(100, 999)} {rng.randint(1000, 9999)}",
+        f"https://github.com/{first.lower()}{last.lower()}{index}",
+        "",
+        "Summary",
+        f"{rng.choice(TITLES)} with {rng.randint(1, 20)} years of experience building software products.",
+        "",
+        "Experience",
+    ]
+    year = 2024
+    for _ in range(rng.randint(1, 4)):
+        start = year - rng.randint(1, 5)
+        lines.append(f"{rng.choice(TITLES)}, {rng.choice(COMPANIES)} ({start} - {year})")
+        for skill in rng.sample(SKILLS, 3):
+            lines.append(f"- Delivered features using {skill} and improved reliability")
+        year = start
+    lines += ["", "Education"]
+    lines.append(f"{rng.choice(DEGREES)} in {rng.choice(FIELDS)}, {rng.choice(INSTITUTIONS)}, {year - rng.randint(0, 3)}")
+    lines += ["", "Skills", ", ".join(rng.sample(SKILLS, rng.randint(5, 12)))]
+    return "\n".join(lines)
+
+def synthetic_cv_record(index: int, rng: random.Random) -> Dict[str, Any]:
+    """Build a structured CV record like those produced by CVAnalyzer"""
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    return {
+        "personal_info": {"name": f"{first} {last}", "email": f"{first.lower()}.{last.lower()}{index}@example.com",
+                          "phone": "", "location": ""},
+        "education": [{"degree": rng.choice(DEGREES), "institution": rng.choice(INSTITUTIONS),
+                       "year": str(rng.randint(1995, 2023)), "field": rng.choice(FIELDS)}],
+        "work_experience": [{"title": rng.choice(TITLES), "company": rng.choice(COMPANIES),
+                             "duration": f"{rng.randint(1, 8)} years", "responsibilities": []}
+                            for _ in range(rng.randint(1, 4))],
+        "skills": {"technical": rng.sample(SKILLS, rng.randint(5, 12)), "soft": [], "languages": ["English"]},
+        "projects": [],
+        "certifications": []
+    }
+
+def write_pdf_corpus(directory: str, count: int, seed: int = 0) -> List[str]:
+    """Write count synthetic CV PDFs to directory and return their paths"""
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for index in range(count):
+        path = os.path.join(directory, f"cv_{index:06d}.pdf")
+        doc = fitz.open()
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(50, 50, 545, 792), synthetic_cv_text(index, rng), fontsize=10)
+        doc.save(path)
+        doc.close()
+        paths.append(path)
+    return paths
\ No newline at end of file
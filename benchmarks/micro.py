@@ -0,0 +1,226 @@
+"""Micro-benchmarks for the extraction, storage and prompt-building hot paths
+
+Results are written as JSON so they can be stored as a baseline and compared
+against later runs; --check exits non-zero when a benchmark slows down by more
+than --threshold relative to the baseline.
+
+    python -m benchmarks.micro --save-baseline
+    python -m benchmarks.micro --check --threshold 0.25
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import statistics
+from typing import Callable, Dict, Any, List, Optional
+
+import fitz  # PyMuPDF
+
+# Local imports
+from src.processors.cv_processor import CVProcessor
+from src.database.cv_database import CVDatabase
+from src.query.query_engine import CVQueryEngine
+from src.query.ranker import CandidateRanker
+from src.database.semantic_index import SemanticIndex
+from src.llm.providers import MockLLMProvider
+from benchmarks.corpus import synthetic_cv_record
+
+SAMPLE_CV_DIR = "data/sample_cvs"
+DEFAULT_BASELINE = "benchmarks/baselines/micro.json"
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+# Number of individual add_cv calls timed against a database of each size
+ADD_CV_OPERATIONS = 100
+
+def time_call(func: Callable[[], Any], repeat: int = 5, number: int = 1,
+              setup: Optional[Callable[[], Any]] = None) -> Dict[str, Any]:
+    """Time func, returning the median, minimum and mean seconds per call over repeat rounds"""
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "mean_s": statistics.mean(timings),
+        "repeat": repeat,
+        "number": number
+    }
+
+def bench_pdf_extraction(results: Dict[str, Any], sample_dir: str):
+    cv_processor = CVProcessor(ocr_enabled=False)
+    for file_name in sorted(os.listdir(sample_dir)):
+        if file_name.lower().endswith(".pdf"):
+            file_path = os.path.join(sample_dir, file_name)
+            results[f"extract_text_from_pdf[{file_name}]"] = time_call(
+                lambda: cv_processor.extract_text_from_pdf(file_path), repeat=5, number=3
+            )
+
+def bench_ocr(results: Dict[str, Any], sample_dir: str):
+    if not shutil.which("tesseract"):
+        logging.warning("Tesseract not found, skipping OCR benchmarks")
+        return
+    
+    cv_processor = CVProcessor(ocr_enabled=True)
+    for file_name in sorted(os.listdir(sample_dir)):
+        if file_name.lower().endswith(".pdf"):
+            with fitz.open(os.path.join(sample_dir, file_name)) as doc:
+                results[f"ocr_page[{file_name}]"] = time_call(lambda: cv_processor._ocr_pages(doc, [0]), repeat=3)
+
+def bench_database(results: Dict[str, Any], size: int, work_dir: str):
+    rng = random.Random(size)
+    records = [synthetic_cv_record(index, rng) for index in range(size)]
+    db_path = os.path.join(work_dir, f"bench_{size}.db")
+    
+    def bulk_load():
+        if os.path.exists(db_path):
+            os.remove(db_path)
+        cv_database = CVDatabase(db_path=db_path)
+        with cv_database.batch():
+            for index, record in enumerate(records):
+                cv_database.add_cv(f"cv_{index:06d}.pdf", record)
+        cv_database.close()
+    
+    results[f"cv_database.add_cv_batch[{size}]"] = time_call(bulk_load, repeat=1)
+    
+    cv_database = CVDatabase(db_path=db_path)
+    extra = iter(range(size, size + ADD_CV_OPERATIONS * 3))
+    results[f"cv_database.add_cv[{size}]"] = time_call(
+        lambda: cv_database.add_cv(f"cv_{next(extra):06d}.pdf", records[0]), repeat=3, number=ADD_CV_OPERATIONS
+    )
+    results[f"cv_database.load_database[{size}]"] = time_call(cv_database.load_database, repeat=3)
+    results[f"cv_database.search_cvs[{size}]"] = time_call(
+        lambda: cv_database.search_cvs(lambda cv: "Python" in cv["skills"]["technical"]), repeat=5
+    )
+    results[f"cv_database.find_cv_ids[{size}]"] = time_call(
+        lambda: cv_database.find_cv_ids({"field": "skills.technical", "value": "python"}), repeat=5, number=10
+    )
+    
+    bench_prompt_building(results, size, cv_database)
+    bench_ranking(results, size, cv_database)
+    bench_semantic_search(results, size, cv_database)
+    cv_database.close()
+
+def bench_prompt_building(results: Dict[str, Any], size: int, cv_database: CVDatabase):
+    query_engine = CVQueryEngine(cv_database, api_key="", provider=MockLLMProvider())
+    question = "Which candidates have worked with Kubernetes and Python?"
+    
+    # The first call indexes the whole database for retrieval
+    results[f"query.retriever_sync[{size}]"] = time_call(query_engine.retriever.total_context_tokens, repeat=1)
+    
+    def build_prompt():
+        query_engine._prepare_chat(question, "benchmark")
+        query_engine.clear_conversation("benchmark")
+    
+    results[f"query.prepare_chat[{size}]"] = time_call(build_prompt, repeat=5)
+
+def bench_ranking(results: Dict[str, Any], size: int, cv_database: CVDatabase):
+    ranker = CandidateRanker(cv_database)
+    job_description = ("Senior Backend Developer with 5+ years of experience in Python, Kubernetes and "
+                       "PostgreSQL. Master's degree in Computer Science preferred.")
+    
+    # The first call builds the feature matrices
+    results[f"ranker.build[{size}]"] = time_call(lambda: ranker.rank(job_description), repeat=1)
+    results[f"ranker.rank[{size}]"] = time_call(lambda: ranker.rank(job_description, top_k=10), repeat=5, number=10)
+
+def bench_semantic_search(results: Dict[str, Any], size: int, cv_database: CVDatabase):
+    query = "ML engineer with cloud experience"
+    
+    # The first search fits the model and writes the vectors
+    results[f"semantic.build[{size}]"] = time_call(lambda: cv_database.semantic_search(query), repeat=1)
+    
+    # Close each opened index, so its listener does not add work to the later cases
+    results[f"semantic.open[{size}]"] = time_call(lambda: SemanticIndex(cv_database).close(), repeat=3)
+    results[f"semantic.search[{size}]"] = time_call(lambda: cv_database.semantic_search(query, top_k=10),
+                                                    repeat=5, number=10)
+
+def environment() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count()
+    }
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float,
+                    min_delta: float = 0.0005) -> List[Dict[str, Any]]:
+    """Return the benchmarks whose median is more than threshold slower than the baseline
+    
+    Differences below min_delta seconds are ignored as timer noise.
+    """
+    regressions = []
+    for name, result in current.items():
+        if name not in baseline:
+            continue
+        baseline_s = baseline[name]["median_s"]
+        current_s = result["median_s"]
+        if current_s - baseline_s > min_delta and current_s > baseline_s * (1 + threshold):
+            regressions.append({
+                "name": name,
+                "baseline_s": baseline_s,
+                "current_s": current_s,
+                "ratio": current_s / baseline_s if baseline_s else float("inf")
+            })
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="comma-separated database sizes")
+    parser.add_argument("--sample-dir", default=SAMPLE_CV_DIR)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline file to save or compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="fail if results regress against the baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown for --check")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.WARNING)
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    
+    results = {}
+    bench_pdf_extraction(results, args.sample_dir)
+    bench_ocr(results, args.sample_dir)
+    with tempfile.TemporaryDirectory() as work_dir:
+        for size in sizes:
+            print(f"Benchmarking database with {size} records...", file=sys.stderr)
+            bench_database(results, size, work_dir)
+    
+    report = {"environment": environment(), "results": results}
+    for name, result in results.items():
+        print(f"{name:60s} {result['median_s'] * 1000:12.3f} ms")
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.baseline}", file=sys.stderr)
+    
+    if args.check:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline["results"], results, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression['name']}: {regression['baseline_s'] * 1000:.3f} ms -> "
+                  f"{regression['current_s'] * 1000:.3f} ms ({regression['ratio']:.2f}x)", file=sys.stderr)
+        if regressions:
+            return 1
+        print("No regressions against baseline", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
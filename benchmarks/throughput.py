@@ -0,0 +1,192 @@
+"""End-to-end throughput benchmark against the offline mock LLM provider
+
+Generates a synthetic PDF corpus, ingests it with CVAnalysisApp.batch_process_cvs
+and then runs queries, reporting throughput, latency percentiles and peak memory.
+
+    python -m benchmarks.throughput --documents 1000 --queries 200 --latency 0.5 --jitter 0.2
+"""
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import resource
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any
+
+import numpy as np
+
+# Local imports
+from src.processors.cv_processor import CVProcessor
+from src.analyzers.cv_analyzer import CVAnalyzer
+from src.database.cv_database import CVDatabase
+from src.query.query_engine import CVQueryEngine
+from src.app.streamlit_app import CVAnalysisApp
+from src.llm.providers import MockLLMProvider
+from benchmarks.corpus import write_pdf_corpus, SKILLS, TITLES
+
+QUESTION_TEMPLATES = [
+    "Which candidates know {skill}?",
+    "Who has the most experience with {skill}?",
+    "List candidates who worked as {title}.",
+    "Compare the education of candidates with {skill} experience.",
+]
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    """Return p50/p95/p99 and max of latencies in milliseconds"""
+    if not latencies:
+        return {}
+    values = np.array(latencies) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p95_ms": round(float(np.percentile(values, 95)), 2),
+        "p99_ms": round(float(np.percentile(values, 99)), 2),
+        "max_ms": round(float(values.max()), 2)
+    }
+
+def peak_memory_mb() -> Dict[str, float]:
+    """Peak resident set size of this process and of its finished worker processes"""
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1)
+    }
+
+class TimedAnalyzer:
+    """Wraps CVAnalyzer.extract_cv_information to record per-document analysis latency"""
+    
+    def __init__(self, cv_analyzer: CVAnalyzer):
+        self.cv_analyzer = cv_analyzer
+        self.latencies = []
+        self._lock = threading.Lock()
+        self._extract = cv_analyzer.extract_cv_information
+        cv_analyzer.extract_cv_information = self._timed_extract
+    
+    def _timed_extract(self, cv_text: str, **kwargs) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            return self._extract(cv_text, **kwargs)
+        finally:
+            with self._lock:
+                self.latencies.append(time.perf_counter() - start)
+
+def run_ingestion(app: CVAnalysisApp, corpus_dir: str, documents: int) -> Dict[str, Any]:
+    timed_analyzer = TimedAnalyzer(app.cv_analyzer)
+    completion_times = []
+    start = time.perf_counter()
+    
+    def progress(completed: int, total: int, message: str):
+        completion_times.append(time.perf_counter() - start)
+    
+    results = app.batch_process_cvs(corpus_dir, progress_callback=progress)
+    elapsed = time.perf_counter() - start
+    
+    return {
+        "documents": documents,
+        "succeeded": sum(message.startswith("Successfully") for message in results),
+        "seconds": round(elapsed, 3),
+        "documents_per_second": round(documents / elapsed, 2) if elapsed else 0.0,
+        "analysis_latency": latency_summary(timed_analyzer.latencies),
+        "completion_time": latency_summary(completion_times),
+        "peak_memory_mb": peak_memory_mb()
+    }
+
+def run_queries(query_engine: CVQueryEngine, queries: int, concurrency: int, seed: int,
+                stream: bool = False) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    questions = [rng.choice(QUESTION_TEMPLATES).format(skill=rng.choice(SKILLS), title=rng.choice(TITLES))
+                 for _ in range(queries)]
+    latencies = []
+    first_chunk_latencies = []
+    lock = threading.Lock()
+    
+    def ask(position: int):
+        question_start = time.perf_counter()
+        # One session per question so answers do not depend on earlier questions
+        session_id = f"benchmark-{position}"
+        if stream:
+            first_chunk = None
+            for _ in query_engine.query_stream(questions[position], session_id=session_id):
+                if first_chunk is None:
+                    first_chunk = time.perf_counter() - question_start
+            with lock:
+                first_chunk_latencies.append(first_chunk)
+        else:
+            query_engine.query(questions[position], session_id=session_id)
+        with lock:
+            latencies.append(time.perf_counter() - question_start)
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(ask, range(queries)))
+    elapsed = time.perf_counter() - start
+    
+    report = {
+        "queries": queries,
+        "seconds": round(elapsed, 3),
+        "queries_per_second": round(queries / elapsed, 2) if elapsed else 0.0,
+        "latency": latency_summary(latencies),
+        "usage": dict(query_engine.usage_stats),
+        "peak_memory_mb": peak_memory_mb()
+    }
+    if stream:
+        report["first_chunk_latency"] = latency_summary(first_chunk_latencies)
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=100, help="number of synthetic CVs to ingest")
+    parser.add_argument("--queries", type=int, default=50, help="number of queries to run after ingestion")
+    parser.add_argument("--query-concurrency", type=int, default=4)
+    parser.add_argument("--stream", action="store_true", help="use query_stream and report time to first chunk")
+    parser.add_argument("--latency", type=float, default=0.05, help="mock LLM latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.02, help="mock LLM latency jitter in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of a mock LLM failure")
+    parser.add_argument("--extract-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--analysis-concurrency", type=int, default=8)
+    parser.add_argument("--corpus-dir", help="reuse or create the synthetic corpus here instead of a temp dir")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.WARNING)
+    
+    with tempfile.TemporaryDirectory() as work_dir:
+        corpus_dir = args.corpus_dir or os.path.join(work_dir, "corpus")
+        existing = len([name for name in os.listdir(corpus_dir) if name.endswith(".pdf")]) \
+            if os.path.isdir(corpus_dir) else 0
+        if existing != args.documents:
+            print(f"Generating {args.documents} synthetic CVs in {corpus_dir}...", file=sys.stderr)
+            write_pdf_corpus(corpus_dir, args.documents, seed=args.seed)
+        
+        llm = MockLLMProvider(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, seed=args.seed)
+        cv_database = CVDatabase(db_path=os.path.join(work_dir, "benchmark.db"))
+        query_engine = CVQueryEngine(cv_database, api_key="", provider=llm)
+        app = CVAnalysisApp(
+            cv_processor=CVProcessor(ocr_enabled=False),
+            cv_analyzer=CVAnalyzer(api_key="", provider=llm, max_concurrency=args.analysis_concurrency),
+            cv_database=cv_database,
+            query_engine=query_engine
+        )
+        app.ingestion_pipeline.extract_workers = args.extract_workers
+        app.ingestion_pipeline.analysis_concurrency = args.analysis_concurrency
+        
+        report = {
+            "config": vars(args),
+            "ingestion": run_ingestion(app, corpus_dir, args.documents),
+            "query": run_queries(query_engine, args.queries, args.query_concurrency, args.seed, args.stream)
+        }
+        cv_database.close()
+    
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,109 +1,418 @@
 import re
 import json
+import asyncio
+import hashlib
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional, List, Iterable, Union
 
-# LLM integration
-import google.generativeai as genai
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+# Local imports
+from src.cache.disk_cache import DiskCache
+from src.llm.providers import LLMProvider, create_provider, record_llm_usage
+from src.analyzers.rule_extractor import RuleBasedExtractor
+from src.utils import metrics
+
 logger = logging.getLogger(__name__)
 
+ANALYSIS_CACHE = metrics.counter("cv_analysis_cache_total", "Analysis cache lookups by result")
+ANALYSIS_FAILURES = metrics.counter("cv_analysis_failures_total", "CV analyses that returned the empty result")
+
+# Bump whenever the extraction prompt or output schema changes so cached results are not reused
+PROMPT_VERSION = "1"
+
+# full: LLM extracts everything; hybrid: rules fill contact details and technical
+# skills and the LLM extracts the rest; fast: rules only, no LLM call
+ANALYSIS_MODES = ("full", "hybrid", "fast")
+
+# Fields requested from the LLM, indented to sit inside the prompt
+EXTRACTION_FIELDS = """1. Personal Information (name, email, phone, location)
+        2. Education History (degree, institution, graduation year, field of study)
+        3. Work Experience (job title, company, duration, responsibilities)
+        4. Skills (technical skills, soft skills, languages)
+        5. Projects (name, description, technologies used)
+        6. Certifications (name, issuing organization, year)"""
+
+# In hybrid mode email, phone and technical skills come from the rule-based extractor
+HYBRID_EXTRACTION_FIELDS = """1. Personal Information (name, location)
+        2. Education History (degree, institution, graduation year, field of study)
+        3. Work Experience (job title, company, duration, responsibilities)
+        4. Skills (soft skills, languages)
+        5. Projects (name, description, technologies used)
+        6. Certifications (name, issuing organization, year)"""
+
+# Output structure requested from the LLM, indented to sit inside the prompt
+CV_SCHEMA = """{
+            "personal_info": {
+                "name": "",
+                "email": "",
+                "phone": "",
+                "location": ""
+            },
+            "education": [
+                {
+                    "degree": "",
+                    "institution": "",
+                    "year": "",
+                    "field": ""
+                }
+            ],
+            "work_experience": [
+                {
+                    "title": "",
+                    "company": "",
+                    "duration": "",
+                    "responsibilities": []
+                }
+            ],
+            "skills": {
+                "technical": [],
+                "soft": [],
+                "languages": []
+            },
+            "projects": [
+                {
+                    "name": "",
+                    "description": "",
+                    "technologies": []
+                }
+            ],
+            "certifications": [
+                {
+                    "name": "",
+                    "organization": "",
+                    "year": ""
+                }
+            ]
+        }"""
+
+HYBRID_SCHEMA = """{
+            "personal_info": {
+                "name": "",
+                "location": ""
+            },
+            "education": [
+                {
+                    "degree": "",
+                    "institution": "",
+                    "year": "",
+                    "field": ""
+                }
+            ],
+            "work_experience": [
+                {
+                    "title": "",
+                    "company": "",
+                    "duration": "",
+                    "responsibilities": []
+                }
+            ],
+            "skills": {
+                "soft": [],
+                "languages": []
+            },
+            "projects": [
+                {
+                    "name": "",
+                    "description": "",
+                    "technologies": []
+                }
+            ],
+            "certifications": [
+                {
+                    "name": "",
+                    "organization": "",
+                    "year": ""
+                }
+            ]
+        }"""
+
+# Separates CVs in a multi-CV batch prompt
+BATCH_SEPARATOR = "===== CV {index} ====="
+
 class CVAnalyzer:
     """Class to analyze CV content using LLM"""
     
-    def __init__(self, api_key: str, provider: str = "gemini"):
-        self.provider = provider.lower()
+    def __init__(self, api_key: str, provider: Union[str, LLMProvider] = "gemini",
+                 model_name: str = "gemini-1.5-pro",
+                 cache_dir: Optional[str] = None, cache_max_bytes: int = 256 * 1024 * 1024,
+                 max_concurrency: int = 8, batch_size: int = 1, batch_max_chars: int = 4000,
+                 mode: str = "full"):
+        # A provider instance can be passed directly, e.g. a MockLLMProvider for load tests
+        self.llm = provider if isinstance(provider, LLMProvider) else create_provider(provider, api_key, model_name)
+        self.provider = self.llm.name
+        self.model_name = self.llm.model_name
         
-        if self.provider == "gemini":
-            genai.configure(api_key=api_key)
-            self.model = genai.GenerativeModel('gemini-1.5-pro')
-        else:
-            raise ValueError(f"Unsupported LLM provider: {provider}")
-    
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
-    def extract_cv_information(self, cv_text: str) -> Dict[str, Any]:
-        """Extract structured information from CV text using LLM"""
-        try:
-            # Prompt engineering for CV analysis
-            prompt = f"""
-            Extract the following information from this CV in a structured JSON format:
-            1. Personal Information (name, email, phone, location)
-            2. Education History (degree, institution, graduation year, field of study)
-            3. Work Experience (job title, company, duration, responsibilities)
-            4. Skills (technical skills, soft skills, languages)
-            5. Projects (name, description, technologies used)
-            6. Certifications (name, issuing organization, year)
-
-            Provide the output as a valid JSON object with the following structure:
-            {{
-                "personal_info": {{
-                    "name": "",
-                    "email": "",
-                    "phone": "",
-                    "location": ""
-                }},
-                "education": [
-                    {{
-                        "degree": "",
-                        "institution": "",
-                        "year": "",
-                        "field": ""
-                    }}
-                ],
-                "work_experience": [
-                    {{
-                        "title": "",
-                        "company": "",
-                        "duration": "",
-                        "responsibilities": []
-                    }}
-                ],
-                "skills": {{
-                    "technical": [],
-                    "soft": [],
-                    "languages": []
-                }},
-                "projects": [
-                    {{
-                        "name": "",
-                        "description": "",
-                        "technologies": []
-                    }}
-                ],
-                "certifications": [
-                    {{
-                        "name": "",
-                        "organization": "",
-                        "year": ""
-                    }}
-                ]
-            }}
-
-            Here is the CV text:
-            {cv_text}
-            """
+        if mode not in ANALYSIS_MODES:
+            raise ValueError(f"Unsupported analysis mode: {mode}")
+        self.mode = mode
+        self.rule_extractor = RuleBasedExtractor()
+        
+        # Async analysis settings; CVs up to batch_max_chars are grouped batch_size per request
+        self.max_concurrency = max(1, max_concurrency)
+        self.batch_size = max(1, batch_size)
+        self.batch_max_chars = batch_max_chars
+        
+        # Persistent cache of extraction results, keyed by normalized CV text, model and prompt version
+        self.cache = DiskCache(cache_dir, max_bytes=cache_max_bytes) if cache_dir else None
+    
+    def _cache_key(self, cv_text: str) -> str:
+        """Build the extraction cache key for a CV text"""
+        normalized_text = re.sub(r"\s+", " ", cv_text).strip()
+        text_hash = hashlib.sha256(normalized_text.encode("utf-8")).hexdigest()
+        return DiskCache.make_key("cv_analysis", text_hash, self.provider, self.model_name, PROMPT_VERSION,
+                                   self.mode)
+    
+    def invalidate_cached_result(self, cv_text: str) -> bool:
+        """Drop the cached extraction result for a CV text"""
+        return self.cache.delete(self._cache_key(cv_text)) if self.cache else False
+    
+    def clear_cache(self):
+        """Drop all cached extraction results, e.g. after changing the prompt"""
+        if self.cache:
+            self.cache.clear()
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and size of the extraction cache"""
+        return self.cache.stats() if self.cache else {}
+    
+    def _get_cached_result(self, cv_text: str) -> Optional[Dict[str, Any]]:
+        if not self.cache:
+            return None
+        cached_result = self.cache.get(self._cache_key(cv_text))
+        if cached_result is None:
+            ANALYSIS_CACHE.inc(result="miss")
+            return None
+        ANALYSIS_CACHE.inc(result="hit")
+        logger.info("Using cached CV analysis")
+        return json.loads(cached_result)
+    
+    def _store_result(self, cv_text: str, cv_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Complete a successful LLM result with the rule-based fields in hybrid mode and cache it"""
+        if self.mode == "hybrid":
+            cv_data = self._merge_rule_results(cv_text, cv_data)
+        # Only successful extractions are cached so failures are retried next time
+        if self.cache:
+            self.cache.set(self._cache_key(cv_text), json.dumps(cv_data))
+        return cv_data
+    
+    def _merge_rule_results(self, cv_text: str, cv_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Fill the fields not requested from the LLM in hybrid mode"""
+        rule_data = self.rule_extractor.extract(cv_text)
+        rule_info = rule_data["personal_info"]
+        
+        merged = dict(cv_data)
+        personal_info = dict(merged.get("personal_info") or {})
+        personal_info["name"] = personal_info.get("name") or rule_info["name"]
+        personal_info["email"] = rule_info["email"] or personal_info.get("email", "")
+        personal_info["phone"] = rule_info["phone"] or personal_info.get("phone", "")
+        personal_info["links"] = rule_info["links"]
+        merged["personal_info"] = personal_info
+        
+        skills = dict(merged.get("skills") or {})
+        skills["technical"] = rule_data["skills"]["technical"]
+        merged["skills"] = skills
+        return merged
+    
+    @staticmethod
+    def _empty_result() -> Dict[str, Any]:
+        """Basic structure returned when extraction fails"""
+        return {
+            "personal_info": {},
+            "education": [],
+            "work_experience": [],
+            "skills": {"technical": [], "soft": [], "languages": []},
+            "projects": [],
+            "certifications": []
+        }
+    
+    def _requested_fields(self):
+        """Field list and output structure requested from the LLM in the current mode"""
+        if self.mode == "hybrid":
+            return HYBRID_EXTRACTION_FIELDS, HYBRID_SCHEMA
+        return EXTRACTION_FIELDS, CV_SCHEMA
+    
+    def _build_prompt(self, cv_text: str) -> str:
+        """Prompt engineering for CV analysis"""
+        fields, schema = self._requested_fields()
+        return f"""
+        Extract the following information from this CV in a structured JSON format:
+        {fields}
+
+        Provide the output as a valid JSON object with the following structure:
+        {schema}
+
+        Here is the CV text:
+        {cv_text}
+        """
+    
+    def _build_batch_prompt(self, cv_texts: List[str]) -> str:
+        """Prompt asking for the analysis of several CVs in one request"""
+        fields, schema = self._requested_fields()
+        sections = "\n\n".join(
+            f"{BATCH_SEPARATOR.format(index=index + 1)}\n{cv_text}" for index, cv_text in enumerate(cv_texts)
+        )
+        return f"""
+        Extract the following information from each of the {len(cv_texts)} CVs below in a structured JSON format:
+        {fields}
+
+        Provide the output as a valid JSON array with exactly {len(cv_texts)} objects, one per CV
+        and in the same order as the CVs, where each object has the following structure:
+        {schema}
+
+        Here are the CVs:
+        {sections}
+        """
+    
+    @staticmethod
+    def _parse_response(result: str) -> Any:
+        """Parse the JSON payload of an LLM response"""
+        # Extract JSON from the response
+        json_match = re.search(r'```json\n(.*?)\n```', result, re.DOTALL)
+        if json_match:
+            result = json_match.group(1)
+        
+        # Parse the JSON response
+        return json.loads(result)
+    
+    def extract_cv_information(self, cv_text: str, raise_errors: bool = False) -> Dict[str, Any]:
+        """Extract structured information from CV text using LLM
+        
+        LLM failures return an empty result, or are re-raised with raise_errors
+        for callers that apply their own retry policy.
+        """
+        with metrics.span("cv_analysis", mode=self.mode):
+            if self.mode == "fast":
+                return self.rule_extractor.extract(cv_text)
             
-            response = self.model.generate_content(prompt)
-            result = response.text
+            cached_result = self._get_cached_result(cv_text)
+            if cached_result is not None:
+                return cached_result
             
-            # Extract JSON from the response
-            json_match = re.search(r'```json\n(.*?)\n```', result, re.DOTALL)
-            if json_match:
-                result = json_match.group(1)
+            try:
+                cv_data = self._generate_cv_information(cv_text)
+            except Exception as e:
+                logger.error(f"Error extracting CV information: {str(e)}")
+                ANALYSIS_FAILURES.inc()
+                if raise_errors:
+                    raise
+                return self._empty_result()
             
-            # Parse the JSON response
-            cv_data = json.loads(result)
-            return cv_data
+            return self._store_result(cv_text, cv_data)
+    
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10), reraise=True,
+           before_sleep=metrics.record_retry("extract"))
+    def _generate_cv_information(self, cv_text: str) -> Dict[str, Any]:
+        """Ask the LLM for structured CV information, retrying failed calls"""
+        prompt = self._build_prompt(cv_text)
+        with metrics.span("llm_request", operation="extract"):
+            response = self.llm.generate(prompt)
+        record_llm_usage("extract", prompt, response)
+        return self._parse_response(response.text)
+    
+    async def extract_cv_information_async(self, cv_text: str) -> Dict[str, Any]:
+        """Extract structured information from CV text without blocking the event loop"""
+        with metrics.span("cv_analysis", mode=self.mode):
+            if self.mode == "fast":
+                return self.rule_extractor.extract(cv_text)
             
+            cached_result = self._get_cached_result(cv_text)
+            if cached_result is not None:
+                return cached_result
+            
+            return await self._analyse_uncached_async(cv_text)
+    
+    async def _analyse_uncached_async(self, cv_text: str) -> Dict[str, Any]:
+        """Ask the LLM about a CV missing from the cache, returning an empty result on failure"""
+        try:
+            cv_data = await self._generate_cv_information_async(cv_text)
         except Exception as e:
             logger.error(f"Error extracting CV information: {str(e)}")
-            # Return a basic structure in case of error
-            return {
-                "personal_info": {},
-                "education": [],
-                "work_experience": [],
-                "skills": {"technical": [], "soft": [], "languages": []},
-                "projects": [],
-                "certifications": []
-            }
\ No newline at end of file
+            ANALYSIS_FAILURES.inc()
+            return self._empty_result()
+        
+        return self._store_result(cv_text, cv_data)
+    
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10), reraise=True,
+           before_sleep=metrics.record_retry("extract"))
+    async def _generate_cv_information_async(self, cv_text: str) -> Dict[str, Any]:
+        prompt = self._build_prompt(cv_text)
+        with metrics.span("llm_request", operation="extract"):
+            response = await self.llm.generate_async(prompt)
+        record_llm_usage("extract", prompt, response)
+        return self._parse_response(response.text)
+    
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10), reraise=True,
+           before_sleep=metrics.record_retry("extract_batch"))
+    async def _generate_batch_async(self, cv_texts: List[str]) -> List[Dict[str, Any]]:
+        prompt = self._build_batch_prompt(cv_texts)
+        with metrics.span("llm_request", operation="extract_batch"):
+            response = await self.llm.generate_async(prompt)
+        record_llm_usage("extract_batch", prompt, response)
+        results = self._parse_response(response.text)
+        if not isinstance(results, list) or len(results) != len(cv_texts) or \
+                not all(isinstance(cv_data, dict) for cv_data in results):
+            raise ValueError(f"Expected {len(cv_texts)} JSON objects from batch analysis")
+        return results
+    
+    async def _extract_batch_async(self, cv_texts: List[str]) -> Optional[List[Dict[str, Any]]]:
+        """Analyse several short CVs in one request, returning None if the batch failed"""
+        try:
+            results = await self._generate_batch_async(cv_texts)
+        except Exception as e:
+            logger.warning(f"Batch analysis of {len(cv_texts)} CVs failed, analysing individually: {str(e)}")
+            return None
+        
+        return [self._store_result(cv_text, cv_data) for cv_text, cv_data in zip(cv_texts, results)]
+    
+    async def extract_many_async(self, cv_texts: Iterable[str],
+                                 max_concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Analyse many CVs concurrently, returning results in input order"""
+        cv_texts = list(cv_texts)
+        if self.mode == "fast":
+            return [self.rule_extractor.extract(cv_text) for cv_text in cv_texts]
+        results = [None] * len(cv_texts)
+        
+        # Serve cached results first and group the rest into requests
+        groups = []
+        batch = []
+        for position, cv_text in enumerate(cv_texts):
+            cached_result = self._get_cached_result(cv_text)
+            if cached_result is not None:
+                results[position] = cached_result
+            elif self.batch_size > 1 and len(cv_text) <= self.batch_max_chars:
+                batch.append(position)
+                if len(batch) == self.batch_size:
+                    groups.append(batch)
+                    batch = []
+            else:
+                groups.append([position])
+        if batch:
+            groups.append(batch)
+        
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+        
+        async def analyse(cv_text: str) -> Dict[str, Any]:
+            # The cache was already checked while grouping
+            async with semaphore:
+                with metrics.span("cv_analysis", mode=self.mode):
+                    return await self._analyse_uncached_async(cv_text)
+        
+        async def run_group(positions: List[int]):
+            group_texts = [cv_texts[position] for position in positions]
+            group_results = None
+            if len(positions) > 1:
+                async with semaphore:
+                    group_results = await self._extract_batch_async(group_texts)
+            if group_results is None:
+                # One request per CV, each taking its own concurrency slot
+                group_results = await asyncio.gather(*(analyse(cv_text) for cv_text in group_texts))
+            for position, cv_data in zip(positions, group_results):
+                results[position] = cv_data
+        
+        await asyncio.gather(*(run_group(positions) for positions in groups))
+        return results
+    
+    def extract_many(self, cv_texts: Iterable[str], max_concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Synchronous wrapper around extract_many_async for callers without an event loop"""
+        return asyncio.run(self.extract_many_async(cv_texts, max_concurrency))
\ No newline at end of file
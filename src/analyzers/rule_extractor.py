@@ -0,0 +1,173 @@
+import re
+import logging
+from collections import deque
+from typing import Dict, Any, List, Tuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# Skill lexicon: lower-cased surface form -> canonical skill name
+DEFAULT_SKILL_LEXICON = {
+    "python": "Python", "java": "Java", "javascript": "JavaScript", "typescript": "TypeScript",
+    "c++": "C++", "c#": "C#", "golang": "Go", "rust": "Rust", "scala": "Scala", "kotlin": "Kotlin",
+    "swift": "Swift", "objective-c": "Objective-C", "php": "PHP", "ruby": "Ruby", "ruby on rails": "Ruby on Rails",
+    "perl": "Perl", "matlab": "MATLAB", "bash": "Bash", "shell scripting": "Shell Scripting",
+    "sql": "SQL", "nosql": "NoSQL", "postgresql": "PostgreSQL", "postgres": "PostgreSQL", "mysql": "MySQL",
+    "sqlite": "SQLite", "oracle": "Oracle", "mongodb": "MongoDB", "redis": "Redis", "cassandra": "Cassandra",
+    "elasticsearch": "Elasticsearch", "dynamodb": "DynamoDB", "snowflake": "Snowflake", "bigquery": "BigQuery",
+    "html": "HTML", "html5": "HTML", "css": "CSS", "sass": "Sass", "react": "React", "react.js": "React",
+    "reactjs": "React", "react native": "React Native", "angular": "Angular", "vue": "Vue.js", "vue.js": "Vue.js",
+    "next.js": "Next.js", "node.js": "Node.js", "nodejs": "Node.js", "express": "Express", "jquery": "jQuery",
+    "django": "Django", "flask": "Flask", "fastapi": "FastAPI", "spring": "Spring", "spring boot": "Spring Boot",
+    ".net": ".NET", "asp.net": "ASP.NET", "graphql": "GraphQL", "rest api": "REST APIs", "rest apis": "REST APIs",
+    "grpc": "gRPC", "microservices": "Microservices",
+    "aws": "AWS", "amazon web services": "AWS", "azure": "Azure", "gcp": "Google Cloud",
+    "google cloud": "Google Cloud", "docker": "Docker", "kubernetes": "Kubernetes", "k8s": "Kubernetes",
+    "terraform": "Terraform", "ansible": "Ansible", "jenkins": "Jenkins", "github actions": "GitHub Actions",
+    "gitlab ci": "GitLab CI", "ci/cd": "CI/CD", "linux": "Linux", "git": "Git", "nginx": "Nginx",
+    "kafka": "Kafka", "rabbitmq": "RabbitMQ", "spark": "Spark", "apache spark": "Spark", "pyspark": "PySpark",
+    "hadoop": "Hadoop", "airflow": "Airflow", "dbt": "dbt", "databricks": "Databricks", "etl": "ETL",
+    "machine learning": "Machine Learning", "deep learning": "Deep Learning", "nlp": "NLP",
+    "natural language processing": "NLP", "computer vision": "Computer Vision", "tensorflow": "TensorFlow",
+    "pytorch": "PyTorch", "keras": "Keras", "scikit-learn": "scikit-learn", "sklearn": "scikit-learn",
+    "pandas": "Pandas", "numpy": "NumPy", "scipy": "SciPy", "opencv": "OpenCV", "xgboost": "XGBoost",
+    "llm": "LLMs", "llms": "LLMs", "hugging face": "Hugging Face", "data analysis": "Data Analysis",
+    "statistics": "Statistics", "tableau": "Tableau", "power bi": "Power BI", "excel": "Excel",
+    "jira": "Jira", "confluence": "Confluence", "figma": "Figma", "agile": "Agile", "scrum": "Scrum",
+    "unit testing": "Unit Testing", "selenium": "Selenium", "pytest": "pytest", "junit": "JUnit",
+    "android": "Android", "ios": "iOS", "flutter": "Flutter", "unity": "Unity",
+}
+
+EMAIL_PATTERN = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+PHONE_PATTERN = re.compile(r"(?<![\w+(])([+(]?\d[\d\s().-]{7,}\d)(?!\w)")
+URL_PATTERN = re.compile(
+    r"(?:https?://|www\.)[^\s<>()\"']+|(?:linkedin\.com|github\.com|gitlab\.com)/[^\s<>()\"']+",
+    re.IGNORECASE
+)
+NAME_PATTERN = re.compile(r"^[A-Z][A-Za-z'’.-]+(?: [A-Z][A-Za-z'’.-]+){1,3}$")
+NAME_STOP_WORDS = {"curriculum", "vitae", "resume", "résumé", "cv", "profile", "summary", "contact"}
+
+class SkillMatcher:
+    """Aho-Corasick automaton matching every lexicon term in a single pass over the text"""
+    
+    def __init__(self, lexicon: Dict[str, str]):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        
+        for term, canonical in lexicon.items():
+            self._add_term(term.lower(), canonical)
+        self._build_failure_links()
+    
+    def _add_term(self, term: str, canonical: str):
+        node = 0
+        for char in term:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        self._output[node].append((len(term), canonical))
+    
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                # A node also reports every term ending at its failure target
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+    
+    def find_all(self, text: str) -> List[Tuple[int, int, str]]:
+        """Return (start, end, canonical) for every whole-word lexicon match in text"""
+        text = text.lower()
+        matches = []
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            
+            for length, canonical in self._output[node]:
+                start = position - length + 1
+                end = position + 1
+                # Only accept matches that are not part of a longer word
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                if end < len(text) and (text[end].isalnum() or text[end] in "+#"):
+                    continue
+                matches.append((start, end, canonical))
+        return matches
+    
+    def find_skills(self, text: str) -> List[str]:
+        """Return the distinct canonical skills in order of first appearance"""
+        skills = []
+        seen = set()
+        for _, _, canonical in sorted(self.find_all(text)):
+            if canonical not in seen:
+                seen.add(canonical)
+                skills.append(canonical)
+        return skills
+
+class RuleBasedExtractor:
+    """Deterministic extraction of contact details and technical skills from CV text"""
+    
+    def __init__(self, skill_lexicon: Optional[Dict[str, str]] = None):
+        self.skill_matcher = SkillMatcher(skill_lexicon or DEFAULT_SKILL_LEXICON)
+    
+    def extract_email(self, cv_text: str) -> str:
+        match = EMAIL_PATTERN.search(cv_text)
+        return match.group(0) if match else ""
+    
+    def extract_phone(self, cv_text: str) -> str:
+        for match in PHONE_PATTERN.finditer(cv_text):
+            candidate = match.group(1).strip()
+            digits = re.sub(r"\D", "", candidate)
+            # Skip year ranges such as "2015 - 2019" and other short numbers
+            if 9 <= len(digits) <= 15 and not re.fullmatch(r"(19|20)\d{2}\s*[-–]\s*(19|20)\d{2}", candidate):
+                return candidate
+        return ""
+    
+    def extract_links(self, cv_text: str) -> List[str]:
+        links = []
+        for match in URL_PATTERN.finditer(cv_text):
+            link = match.group(0).rstrip(".,;")
+            if link not in links:
+                links.append(link)
+        return links
+    
+    def extract_name(self, cv_text: str) -> str:
+        """Guess the candidate name from the first lines of the CV"""
+        lines = [line.strip() for line in cv_text.splitlines() if line.strip()]
+        for line in lines[:5]:
+            if not NAME_PATTERN.match(line):
+                continue
+            if any(word.lower() in NAME_STOP_WORDS for word in line.split()):
+                continue
+            if self.skill_matcher.find_all(line):
+                continue
+            return line
+        return ""
+    
+    def extract(self, cv_text: str) -> Dict[str, Any]:
+        """Extract the fields that can be determined without an LLM, in the analyzer's output structure"""
+        return {
+            "personal_info": {
+                "name": self.extract_name(cv_text),
+                "email": self.extract_email(cv_text),
+                "phone": self.extract_phone(cv_text),
+                "location": "",
+                "links": self.extract_links(cv_text)
+            },
+            "education": [],
+            "work_experience": [],
+            "skills": {"technical": self.skill_matcher.find_skills(cv_text), "soft": [], "languages": []},
+            "projects": [],
+            "certifications": []
+        }
\ No newline at end of file
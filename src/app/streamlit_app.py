@@ -1,13 +1,19 @@
 import os
-import tempfile
+import uuid
 import logging
+from typing import Optional, Callable, List, Tuple
 import streamlit as st
 
 # Local imports
 from src.processors.cv_processor import CVProcessor
+from src.processors.text_compactor import TextCompactor
 from src.analyzers.cv_analyzer import CVAnalyzer
 from src.database.cv_database import CVDatabase
 from src.query.query_engine import CVQueryEngine
+from src.query.ranker import CandidateRanker
+from src.pipeline.ingestion import IngestionPipeline
+from src.pipeline.manifest import IngestionManifest
+from src.database.near_duplicates import NearDuplicateIndex
 
 logger = logging.getLogger(__name__)
 
@@ -15,53 +21,64 @@ class CVAnalysisApp:
     """Streamlit application for CV analysis and querying"""
     
     def __init__(self, cv_processor: CVProcessor, cv_analyzer: CVAnalyzer, 
-                 cv_database: CVDatabase, query_engine: CVQueryEngine):
+                 cv_database: CVDatabase, query_engine: CVQueryEngine,
+                 ingestion_pipeline: Optional[IngestionPipeline] = None,
+                 text_compactor: Optional[TextCompactor] = None,
+                 manifest: Optional[IngestionManifest] = None,
+                 near_duplicates: Optional[NearDuplicateIndex] = None, duplicate_action: str = "flag",
+                 ranker: Optional[CandidateRanker] = None):
         self.cv_processor = cv_processor
         self.cv_analyzer = cv_analyzer
         self.cv_database = cv_database
         self.query_engine = query_engine
+        self.text_compactor = text_compactor or TextCompactor()
+        self.ranker = ranker or CandidateRanker(cv_database)
+        self.ingestion_pipeline = ingestion_pipeline or IngestionPipeline(
+            cv_processor, cv_analyzer, cv_database, text_compactor=self.text_compactor, manifest=manifest,
+            near_duplicates=near_duplicates, duplicate_action=duplicate_action
+        )
     
     def process_cv(self, file_path: str) -> str:
-        """Process CV file and store in database"""
-        cv_id = os.path.basename(file_path)
-        
-        # Skip if already processed
-        if self.cv_database.get_cv(cv_id):
-            logger.info(f"CV {cv_id} already processed, skipping")
-            return f"CV {cv_id} already in database"
-        
-        # Extract text from CV
-        cv_text = self.cv_processor.process_document(file_path)
-        if not cv_text:
-            return f"Failed to extract text from {cv_id}"
-        
-        # Extract structured information using LLM
-        cv_data = self.cv_analyzer.extract_cv_information(cv_text)
-        
-        # Store in database
-        self.cv_database.add_cv(cv_id, cv_data)
-        
-        return f"Successfully processed CV: {cv_id}"
+        """Process a single CV file through the ingestion pipeline and store it in the database"""
+        return self.ingestion_pipeline.run([file_path])[0]
+    
+    def process_uploads(self, uploads: List[Tuple[str, bytes]],
+                        progress_callback: Optional[Callable[[int, int, str], None]] = None) -> list:
+        """Process uploaded (filename, content) pairs concurrently, without temporary files"""
+        return self.ingestion_pipeline.run_uploads(uploads, progress_callback)
     
-    def batch_process_cvs(self, folder_path: str) -> list:
-        """Process all CVs in a folder"""
-        results = []
+    def batch_process_cvs(self, folder_path: str,
+                          progress_callback: Optional[Callable[[int, int, str], None]] = None) -> list:
+        """Process all CVs in a folder through the staged ingestion pipeline
         
+        With an ingestion manifest only new, modified and deleted files are handled.
+        """
         if not os.path.exists(folder_path):
             return ["Folder not found"]
         
+        if self.ingestion_pipeline.manifest is not None:
+            return self.ingestion_pipeline.sync_folder(folder_path, progress_callback)
+        
+        file_paths = []
         for filename in os.listdir(folder_path):
             file_path = os.path.join(folder_path, filename)
             if os.path.isfile(file_path) and filename.lower().endswith(('.pdf', '.docx', '.doc')):
-                result = self.process_cv(file_path)
-                results.append(result)
+                file_paths.append(file_path)
         
-        return results
+        return self.ingestion_pipeline.run(file_paths, progress_callback)
     
     def run_streamlit_app(self):
         """Run the Streamlit application"""
         st.title("CV Analysis System")
         
+        # Pick up CVs added by background ingestion workers since the last rerun
+        self.cv_database.reload_if_changed()
+        
+        # Each browser session gets its own conversation in the query engine
+        if "session_id" not in st.session_state:
+            st.session_state.session_id = uuid.uuid4().hex
+        session_id = st.session_state.session_id
+        
         # Sidebar for processing CVs
         with st.sidebar:
             st.header("Upload and Process CVs")
@@ -72,31 +89,34 @@ class CVAnalysisApp:
                 process_button = st.button("Process CVs")
                 
                 if process_button:
-                    progress_bar = st.progress(0)
-                    for i, uploaded_file in enumerate(uploaded_files):
-                        # Save the uploaded file temporarily
-                        with tempfile.NamedTemporaryFile(delete=False, suffix=f"_{uploaded_file.name}") as tmp_file:
-                            tmp_file.write(uploaded_file.getvalue())
-                            temp_path = tmp_file.name
-                        
-                        # Process the CV
-                        result = self.process_cv(temp_path)
-                        st.write(result)
-                        
-                        # Clean up the temporary file
-                        os.unlink(temp_path)
-                        
-                        # Update progress bar
-                        progress_bar.progress((i + 1) / len(uploaded_files))
+                    upload_progress = st.progress(0)
+                    
+                    # Report each file as soon as it finishes, in completion order
+                    def show_upload_progress(completed: int, total: int, message: str):
+                        st.write(message)
+                        upload_progress.progress(completed / total)
+                    
+                    uploads = [(uploaded_file.name, uploaded_file.getvalue()) for uploaded_file in uploaded_files]
+                    self.process_uploads(uploads, progress_callback=show_upload_progress)
             
             st.divider()
             
             # Folder processing option
             folder_path = st.text_input("Or enter a folder path containing CVs:")
             if folder_path and st.button("Process Folder"):
-                results = self.batch_process_cvs(folder_path)
-                for result in results:
-                    st.write(result)
+                folder_progress = st.progress(0)
+                
+                # Stream results into the sidebar as each CV finishes
+                def show_progress(completed: int, total: int, message: str):
+                    st.write(message)
+                    folder_progress.progress(completed / total)
+                
+                if os.path.isdir(folder_path):
+                    results = self.batch_process_cvs(folder_path, progress_callback=show_progress)
+                    if not results:
+                        st.write("No new or changed CVs found in folder")
+                else:
+                    st.write("Folder not found")
             
             st.divider()
             
@@ -109,11 +129,45 @@ class CVAnalysisApp:
             
             # Option to reset conversation
             if st.button("Reset Conversation"):
-                self.query_engine.clear_conversation()
+                self.query_engine.clear_conversation(session_id)
                 if "chat_history" in st.session_state:
                     st.session_state.chat_history = []
                 st.success("Conversation history cleared")
         
+        # Ranking against a job description runs locally, without the LLM
+        with st.expander("Rank candidates for a job description"):
+            job_description = st.text_area("Job description")
+            top_k = st.number_input("Number of candidates", min_value=1, max_value=100, value=10)
+            if job_description and st.button("Rank Candidates"):
+                ranking = self.ranker.rank(job_description, top_k=int(top_k))
+                if ranking:
+                    st.dataframe([{
+                        "CV": result["cv_id"],
+                        "Score": result["score"],
+                        **{f"{feature} score": value for feature, value in result["contributions"].items()},
+                        "Matched skills": ", ".join(result["matched_skills"]),
+                        "Missing skills": ", ".join(result["missing_skills"]),
+                        "Years": result["years_experience"],
+                        "Education": result["education_level"]
+                    } for result in ranking])
+                else:
+                    st.write("No candidates ranked: the database is empty or no skills, titles, education or experience requirements were recognised")
+        
+        # Semantic search over CV content, also answered locally
+        with st.expander("Search CVs by meaning"):
+            search_query = st.text_input("Describe the candidate, e.g. \"ML engineer with cloud experience\"")
+            search_top_k = st.number_input("Number of results", min_value=1, max_value=100, value=10)
+            if search_query:
+                matches = self.cv_database.semantic_search(search_query, top_k=int(search_top_k))
+                if matches:
+                    st.dataframe([{
+                        "CV": cv_id,
+                        "Similarity": round(similarity, 3),
+                        "Name": (self.cv_database.get_cv(cv_id) or {}).get("personal_info", {}).get("name", "")
+                    } for cv_id, similarity in matches])
+                else:
+                    st.write("No matching CVs found")
+        
         # Main area for the chatbot
         st.header("CV Query Assistant")
         st.write("Ask questions about the CVs in the database:")
@@ -137,13 +191,9 @@ class CVAnalysisApp:
             # Add to session state
             st.session_state.chat_history.append({"role": "user", "content": user_query})
             
-            # Get response from query engine
-            with st.spinner("Thinking..."):
-                response = self.query_engine.query(user_query)
-            
-            # Display assistant response
+            # Render the answer as the query engine streams it
             with st.chat_message("assistant"):
-                st.write(response)
+                response = st.write_stream(self.query_engine.query_stream(user_query, session_id=session_id))
             
             # Add to session state
             st.session_state.chat_history.append({"role": "assistant", "content": response})
\ No newline at end of file
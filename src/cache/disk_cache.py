@@ -0,0 +1,170 @@
+import os
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+class DiskCache:
+    """Persistent on-disk text cache with a size cap and LRU eviction
+    
+    Entries are stored as one file per key and written atomically, so several
+    processes can share the same cache directory. Recency is tracked through
+    the file modification time, which is refreshed on every hit.
+    """
+    
+    ENTRY_SUFFIX = ".entry"
+    
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._current_bytes = None
+        self._lock = threading.Lock()
+        
+        os.makedirs(self.cache_dir, exist_ok=True)
+    
+    def __getstate__(self):
+        # Locks cannot be pickled; copies sent to worker processes get their own
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Build a stable cache key from JSON-serializable parts"""
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + self.ENTRY_SUFFIX)
+    
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for key, or None on a miss"""
+        path = self._entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = f.read()
+            # Mark the entry as recently used
+            os.utime(path, None)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except OSError as e:
+            logger.warning(f"Error reading cache entry {key}: {str(e)}")
+            with self._lock:
+                self.misses += 1
+            return None
+        
+        with self._lock:
+            self.hits += 1
+        return value
+    
+    def set(self, key: str, value: str):
+        """Store value under key, evicting least recently used entries if needed"""
+        path = self._entry_path(key)
+        data = value.encode("utf-8")
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+            
+            # Write to a temporary file first so readers never see partial entries
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Error writing cache entry {key}: {str(e)}")
+            return
+        
+        with self._lock:
+            if self._current_bytes is None:
+                self._current_bytes = self._scan_size()
+            else:
+                self._current_bytes += len(data) - previous_size
+            
+            if self._current_bytes > self.max_bytes:
+                self._evict()
+    
+    def delete(self, key: str) -> bool:
+        """Remove a single entry from the cache"""
+        path = self._entry_path(key)
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return False
+        
+        with self._lock:
+            if self._current_bytes is not None:
+                self._current_bytes -= size
+        return True
+    
+    def clear(self):
+        """Remove every entry from the cache"""
+        with self._lock:
+            for path, _, _ in self._list_entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._current_bytes = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current cache size"""
+        with self._lock:
+            if self._current_bytes is None:
+                self._current_bytes = self._scan_size()
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size_bytes": self._current_bytes,
+                "max_bytes": self.max_bytes
+            }
+    
+    def _list_entries(self):
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(self.ENTRY_SUFFIX):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, stat.st_mtime, stat.st_size))
+        return entries
+    
+    def _scan_size(self) -> int:
+        return sum(size for _, _, size in self._list_entries())
+    
+    def _evict(self):
+        """Drop least recently used entries until the cache is below 90% of its cap"""
+        entries = sorted(self._list_entries(), key=lambda entry: entry[1])
+        total = sum(size for _, _, size in entries)
+        target = int(self.max_bytes * 0.9)
+        
+        for path, _, size in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+        
+        self._current_bytes = total
+        logger.info(f"Evicted cache entries, cache size is now {total} bytes")
\ No newline at end of file
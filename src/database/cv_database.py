@@ -1,46 +1,244 @@
 import os
 import json
+import time
+import sqlite3
 import logging
-from typing import Dict, Any, Optional
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Set, Tuple, Callable, Iterable
+
+# Local imports
+from src.database.cv_index import CVIndex
+from src.utils import metrics
 
 logger = logging.getLogger(__name__)
 
 class CVDatabase:
-    """Class to store and query CV information"""
+    """Class to store and query CV information
+    
+    Records are served from memory and persisted incrementally to SQLite, so
+    each change writes a single row instead of re-serializing the whole
+    database. A legacy JSON database next to the SQLite file is imported once.
+    The extracted text of each CV is kept alongside its record for semantic search.
+    """
     
-    def __init__(self, db_path: str = "data/cv_database.json"):
+    def __init__(self, db_path: str = "data/cv_database.db"):
+        # JSON paths from older versions map to a SQLite file next to them
+        root, extension = os.path.splitext(db_path)
+        if extension.lower() == ".json":
+            self.legacy_json_path = db_path
+            db_path = root + ".db"
+        else:
+            self.legacy_json_path = root + ".json"
+        
         self.db_path = db_path
         self.cv_data = {}
+        # Write time of every loaded record, to apply only what other connections changed
+        self._update_times = {}
+        self.index = CVIndex()
+        self._listeners = []
+        self._generation = 0
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self._data_version = None
+        self._semantic_index = None
         
         # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        
+        # Ingestion worker processes write to the same file, so wait for their transactions
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cvs ("
+            "cv_id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS cv_texts (cv_id TEXT PRIMARY KEY, text TEXT NOT NULL)")
+        self._conn.commit()
         
         self.load_database()
     
+    def add_listener(self, listener: Callable[[str, Optional[str], Optional[Dict[str, Any]]], None]):
+        """Register a callback invoked as listener(event, cv_id, cv_data) on every change
+        
+        Events are "add", "delete" and "reload"; "reload" means all data may have changed.
+        """
+        self._listeners.append(listener)
+    
+    def remove_listener(self, listener: Callable[[str, Optional[str], Optional[Dict[str, Any]]], None]):
+        """Stop calling a callback registered with add_listener"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+    
+    @property
+    def generation(self) -> int:
+        """Counter bumped on every change, for caches derived from the CV data"""
+        return self._generation
+    
+    def _notify(self, event: str, cv_id: Optional[str] = None, cv_data: Optional[Dict[str, Any]] = None):
+        self._generation += 1
+        for listener in self._listeners:
+            try:
+                listener(event, cv_id, cv_data)
+            except Exception as e:
+                logger.error(f"Error in database listener: {str(e)}")
+    
     def load_database(self):
         """Load existing database if available"""
-        if os.path.exists(self.db_path):
+        with self._lock:
             try:
-                with open(self.db_path, 'r') as f:
-                    self.cv_data = json.load(f)
+                self._data_version = self._read_data_version()
+                rows = self._conn.execute("SELECT cv_id, data, updated_at FROM cvs").fetchall()
+                self.cv_data = {cv_id: json.loads(data) for cv_id, data, _ in rows}
+                self._update_times = {cv_id: updated_at for cv_id, _, updated_at in rows}
+                
+                if not self.cv_data and os.path.exists(self.legacy_json_path):
+                    self._migrate_legacy_json()
+                
+                self.index.rebuild(self.cv_data)
+                self._notify("reload")
                 logger.info(f"Loaded {len(self.cv_data)} CVs from database")
             except Exception as e:
                 logger.error(f"Error loading database: {str(e)}")
                 self.cv_data = {}
+                self._update_times = {}
+                self.index.rebuild(self.cv_data)
+                self._notify("reload")
+    
+    def _read_data_version(self) -> int:
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+    
+    def reload_if_changed(self) -> bool:
+        """Apply changes committed by another connection, e.g. an ingestion worker process
+        
+        Only the added, updated and deleted CVs are read and announced to listeners
+        as "add" and "delete" events, so this stays cheap enough to call on every UI
+        interaction. Returns True if anything changed.
+        """
+        with self._lock:
+            if self._batch_depth:
+                return False
+            data_version = self._read_data_version()
+            if data_version == self._data_version:
+                return False
+            self._data_version = data_version
+            
+            update_times = self.get_update_times()
+            deleted = [cv_id for cv_id in self._update_times if cv_id not in update_times]
+            changed = [cv_id for cv_id, updated_at in update_times.items()
+                       if self._update_times.get(cv_id) != updated_at]
+            
+            for cv_id in deleted:
+                del self._update_times[cv_id]
+                if self.cv_data.pop(cv_id, None) is not None:
+                    self.index.remove(cv_id)
+                    self._notify("delete", cv_id)
+            
+            # Stay below SQLite's bound parameter limit
+            for start in range(0, len(changed), 500):
+                chunk = changed[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT cv_id, data, updated_at FROM cvs WHERE cv_id IN ({', '.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for cv_id, data, updated_at in rows:
+                    cv_data = json.loads(data)
+                    self.cv_data[cv_id] = cv_data
+                    self._update_times[cv_id] = updated_at
+                    self.index.add(cv_id, cv_data)
+                    self._notify("add", cv_id, cv_data)
+            
+            if changed or deleted:
+                logger.info(f"Applied {len(changed)} added or updated and {len(deleted)} deleted CVs from disk")
+            return bool(changed or deleted)
+    
+    def _migrate_legacy_json(self):
+        """Import the old whole-file JSON database in a single transaction"""
+        with open(self.legacy_json_path, 'r') as f:
+            legacy_data = json.load(f)
+        
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO cvs (cv_id, data, updated_at) VALUES (?, ?, ?)",
+                [(cv_id, json.dumps(cv_data), now) for cv_id, cv_data in legacy_data.items()]
+            )
+        self.cv_data = legacy_data
+        self._update_times = dict.fromkeys(legacy_data, now)
+        
+        # Keep the original file around, but make sure it is not imported again
+        os.replace(self.legacy_json_path, self.legacy_json_path + ".migrated")
+        logger.info(f"Migrated {len(legacy_data)} CVs from {self.legacy_json_path}")
     
     def save_database(self):
-        """Save CV data to database file"""
+        """Commit pending changes to the database file"""
+        with self._lock:
+            try:
+                self._commit()
+            except Exception as e:
+                logger.error(f"Error saving database: {str(e)}")
+    
+    def _commit(self):
+        with metrics.span("cv_database_write", operation="commit"):
+            self._conn.commit()
+    
+    def _write(self, statements: List[Tuple[str, tuple]]):
+        """Run statements as one change, committed right away unless a batch is open
+        
+        On error the change is rolled back and the error raised; inside a batch,
+        batch() rolls back the whole transaction as the error propagates.
+        """
         try:
-            with open(self.db_path, 'w') as f:
-                json.dump(self.cv_data, f, indent=2)
-            logger.info(f"Saved {len(self.cv_data)} CVs to database")
-        except Exception as e:
-            logger.error(f"Error saving database: {str(e)}")
+            for sql, parameters in statements:
+                self._conn.execute(sql, parameters)
+            if not self._batch_depth:
+                self._commit()
+        except Exception:
+            if not self._batch_depth:
+                self._conn.rollback()
+            raise
+    
+    @contextmanager
+    def batch(self):
+        """Group several changes into one transaction, committed when the outermost batch exits"""
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            except Exception:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    # Discard the partial batch and resync memory with what is on disk
+                    self._conn.rollback()
+                    self.load_database()
+                raise
+            else:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self.save_database()
     
-    def add_cv(self, cv_id: str, cv_data: Dict[str, Any]):
-        """Add or update CV in the database"""
-        self.cv_data[cv_id] = cv_data
-        self.save_database()
+    def add_cv(self, cv_id: str, cv_data: Dict[str, Any], cv_text: Optional[str] = None):
+        """Add or update CV in the database
+        
+        cv_text is the text the record was extracted from; an update without it keeps the earlier text.
+        Raises if the CV could not be written, e.g. when the database stays locked, leaving it unchanged.
+        """
+        with self._lock, metrics.span("cv_database_write", operation="add"):
+            updated_at = time.time()
+            statements = [("INSERT OR REPLACE INTO cvs (cv_id, data, updated_at) VALUES (?, ?, ?)",
+                           (cv_id, json.dumps(cv_data), updated_at))]
+            if cv_text:
+                statements.append(("INSERT OR REPLACE INTO cv_texts (cv_id, text) VALUES (?, ?)", (cv_id, cv_text)))
+            try:
+                self._write(statements)
+            except Exception as e:
+                logger.error(f"Error saving CV {cv_id}: {str(e)}")
+                raise
+            
+            self.cv_data[cv_id] = cv_data
+            self._update_times[cv_id] = updated_at
+            self.index.add(cv_id, cv_data)
+            self._notify("add", cv_id, cv_data)
     
     def get_cv(self, cv_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve CV by ID"""
@@ -50,15 +248,94 @@ class CVDatabase:
         """Get all CVs in the database"""
         return self.cv_data
     
+    def snapshot_cvs(self) -> Dict[str, Dict[str, Any]]:
+        """Copy of all CVs taken under the lock, safe to iterate while other threads write"""
+        with self._lock:
+            return dict(self.cv_data)
+    
+    def get_cv_text(self, cv_id: str) -> Optional[str]:
+        """Retrieve the extracted text of a CV, if it was stored"""
+        return self.get_cv_texts([cv_id]).get(cv_id)
+    
+    def get_cv_texts(self, cv_ids: Iterable[str]) -> Dict[str, str]:
+        """Retrieve the stored extracted texts of several CVs"""
+        cv_ids = list(cv_ids)
+        texts = {}
+        with self._lock:
+            # Stay below SQLite's bound parameter limit
+            for start in range(0, len(cv_ids), 500):
+                chunk = cv_ids[start:start + 500]
+                texts.update(self._conn.execute(
+                    f"SELECT cv_id, text FROM cv_texts WHERE cv_id IN ({', '.join('?' * len(chunk))})", chunk
+                ).fetchall())
+        return texts
+    
+    def get_update_times(self) -> Dict[str, float]:
+        """Last write time of every CV, for indexes kept outside the database"""
+        with self._lock:
+            return dict(self._conn.execute("SELECT cv_id, updated_at FROM cvs").fetchall())
+    
     def delete_cv(self, cv_id: str) -> bool:
-        """Delete a CV from the database"""
-        if cv_id in self.cv_data:
+        """Delete a CV from the database, raising if the deletion could not be written"""
+        with self._lock, metrics.span("cv_database_write", operation="delete"):
+            if cv_id not in self.cv_data:
+                return False
+            try:
+                self._write([("DELETE FROM cvs WHERE cv_id = ?", (cv_id,)),
+                             ("DELETE FROM cv_texts WHERE cv_id = ?", (cv_id,))])
+            except Exception as e:
+                logger.error(f"Error deleting CV {cv_id}: {str(e)}")
+                raise
+            
             del self.cv_data[cv_id]
-            self.save_database()
+            self._update_times.pop(cv_id, None)
+            self.index.remove(cv_id)
+            self._notify("delete", cv_id)
             return True
-        return False
     
     def search_cvs(self, search_function) -> Dict[str, Dict[str, Any]]:
         """Search CVs using a custom search function"""
-        return {cv_id: cv_data for cv_id, cv_data in self.cv_data.items() 
-                if search_function(cv_data)}
\ No newline at end of file
+        return {cv_id: cv_data for cv_id, cv_data in self.cv_data.items()
+                if search_function(cv_data)}
+    
+    def find_cv_ids(self, query: Dict[str, Any]) -> Set[str]:
+        """Return the IDs of CVs matching a structured filter, answered from the indexes
+        
+        See CVIndex for the filter format, e.g.
+        {"and": [{"field": "skills.technical", "value": "kubernetes"},
+                 {"field": "education[].institution", "value": "stanford", "match": "prefix"}]}
+        """
+        with self._lock:
+            return self.index.evaluate(query)
+    
+    def filter_cvs(self, query: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """Return the CVs matching a structured filter"""
+        with self._lock:
+            return {cv_id: self.cv_data[cv_id] for cv_id in self.index.evaluate(query)}
+    
+    @property
+    def semantic_index(self):
+        """Embedding index over the CVs, stored next to the database file and opened on first use"""
+        with self._lock:
+            if self._semantic_index is None:
+                # Imported here, as the index module builds on this one
+                from src.database.semantic_index import SemanticIndex
+                self._semantic_index = SemanticIndex(self)
+            return self._semantic_index
+    
+    def semantic_search(self, query: str, top_k: int = 10,
+                        filters: Optional[Dict[str, Any]] = None) -> List[Tuple[str, float]]:
+        """Return (cv_id, similarity) for the CVs whose content is closest in meaning to a query
+        
+        Unlike keyword filters this also matches paraphrases, e.g. "ML engineer"
+        finds CVs about machine learning. filters optionally restricts the
+        search to CVs matching a structured filter (see find_cv_ids).
+        """
+        cv_ids = self.find_cv_ids(filters) if filters else None
+        return self.semantic_index.search(query, top_k=top_k, cv_ids=cv_ids)
+    
+    def close(self):
+        """Commit pending changes and close the database connection"""
+        with self._lock:
+            self.save_database()
+            self._conn.close()
\ No newline at end of file
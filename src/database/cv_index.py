@@ -0,0 +1,162 @@
+import re
+import bisect
+import logging
+from typing import Dict, Any, List, Set, Iterable
+
+logger = logging.getLogger(__name__)
+
+# Fields maintained in the inverted index; "[]" iterates over a list of records
+INDEXED_FIELDS = (
+    "skills.technical",
+    "skills.languages",
+    "education[].institution",
+    "work_experience[].company",
+    "certifications[].name",
+)
+
+def normalize_value(value: str) -> str:
+    """Normalize a field value for case-insensitive matching"""
+    return re.sub(r"\s+", " ", value).strip().lower()
+
+def extract_field_values(cv_data: Dict[str, Any], field: str) -> List[str]:
+    """Resolve a dotted field path such as "education[].institution" to its string values"""
+    values = [cv_data]
+    for part in field.split("."):
+        iterate = part.endswith("[]")
+        key = part[:-2] if iterate else part
+        
+        next_values = []
+        for value in values:
+            if not isinstance(value, dict):
+                continue
+            child = value.get(key)
+            if isinstance(child, list):
+                next_values.extend(child)
+            elif child is not None:
+                next_values.append(child)
+        values = next_values
+    
+    return [value for value in values if isinstance(value, str) and value.strip()]
+
+class CVIndex:
+    """Inverted indexes over normalized CV fields with a structured filter API
+    
+    Filters are plain dicts:
+        {"field": "skills.technical", "value": "Kubernetes"}
+        {"field": "education[].institution", "value": "stan", "match": "prefix"}
+        {"and": [filter, ...]} or {"or": [filter, ...]}
+    Matching is always case-insensitive.
+    """
+    
+    MATCH_TYPES = ("exact", "prefix")
+    
+    def __init__(self, fields: Iterable[str] = INDEXED_FIELDS):
+        self.fields = tuple(fields)
+        self._postings = {field: {} for field in self.fields}
+        self._sorted_keys = {field: None for field in self.fields}
+        self._cv_values = {}
+    
+    def add(self, cv_id: str, cv_data: Dict[str, Any]):
+        """Index a CV, replacing any previous entries for the same ID"""
+        self.remove(cv_id)
+        
+        cv_values = {}
+        for field in self.fields:
+            values = {normalize_value(value) for value in extract_field_values(cv_data, field)}
+            if not values:
+                continue
+            cv_values[field] = values
+            
+            postings = self._postings[field]
+            for value in values:
+                if value not in postings:
+                    postings[value] = set()
+                    self._sorted_keys[field] = None
+                postings[value].add(cv_id)
+        
+        self._cv_values[cv_id] = cv_values
+    
+    def remove(self, cv_id: str):
+        """Remove a CV from all indexes"""
+        cv_values = self._cv_values.pop(cv_id, None)
+        if not cv_values:
+            return
+        
+        for field, values in cv_values.items():
+            postings = self._postings[field]
+            for value in values:
+                ids = postings.get(value)
+                if ids is None:
+                    continue
+                ids.discard(cv_id)
+                if not ids:
+                    del postings[value]
+                    self._sorted_keys[field] = None
+    
+    def rebuild(self, cv_data: Dict[str, Dict[str, Any]]):
+        """Rebuild all indexes from scratch"""
+        self._postings = {field: {} for field in self.fields}
+        self._sorted_keys = {field: None for field in self.fields}
+        self._cv_values = {}
+        for cv_id, data in cv_data.items():
+            self.add(cv_id, data)
+    
+    def values(self, field: str) -> List[str]:
+        """Return the distinct normalized values indexed for a field, sorted"""
+        self._check_field(field)
+        if self._sorted_keys[field] is None:
+            self._sorted_keys[field] = sorted(self._postings[field])
+        return self._sorted_keys[field]
+    
+    def lookup(self, field: str, value: str, match: str = "exact") -> Set[str]:
+        """Return the IDs of CVs whose field matches value"""
+        self._check_field(field)
+        if match not in self.MATCH_TYPES:
+            raise ValueError(f"Unsupported match type: {match}")
+        
+        value = normalize_value(value)
+        postings = self._postings[field]
+        
+        if match == "exact":
+            return set(postings.get(value, ()))
+        
+        # Prefix matches are a contiguous range of the sorted keys
+        keys = self.values(field)
+        result = set()
+        position = bisect.bisect_left(keys, value)
+        while position < len(keys) and keys[position].startswith(value):
+            result |= postings[keys[position]]
+            position += 1
+        return result
+    
+    def evaluate(self, query: Dict[str, Any]) -> Set[str]:
+        """Evaluate a structured filter and return the matching CV IDs"""
+        if not isinstance(query, dict):
+            raise ValueError(f"Invalid filter: {query!r}")
+        
+        if "and" in query:
+            # Intersect starting from the smallest result set
+            results = sorted((self.evaluate(clause) for clause in query["and"]), key=len)
+            if not results:
+                return set()
+            matched = set(results[0])
+            for result in results[1:]:
+                if not matched:
+                    break
+                matched &= result
+            return matched
+        
+        if "or" in query:
+            matched = set()
+            for clause in query["or"]:
+                matched |= self.evaluate(clause)
+            return matched
+        
+        if "field" in query and "value" in query:
+            return self.lookup(query["field"], query["value"], query.get("match", "exact"))
+        
+        raise ValueError(f"Invalid filter: {query!r}")
+    
+    def _check_field(self, field: str):
+        if field not in self._postings:
+            raise ValueError(f"Field is not indexed: {field}")
\ No newline at end of file
@@ -0,0 +1,197 @@
+import os
+import re
+import zlib
+import sqlite3
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+# Local imports
+from src.database.cv_database import CVDatabase
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# Mersenne prime used for the MinHash permutations
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+def shingle_hashes(text: str, shingle_size: int = 5) -> np.ndarray:
+    """Hash the overlapping word n-grams of a text to 32-bit values
+    
+    Word shingles are insensitive to whitespace and layout differences between
+    extractions of the same document. The hashes are stable across processes.
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < shingle_size:
+        shingles = [" ".join(words)] if words else []
+    else:
+        shingles = {" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)}
+    return np.array(sorted(zlib.crc32(shingle.encode("utf-8")) for shingle in shingles), dtype=np.uint64)
+
+def choose_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """Pick (bands, rows) with bands * rows == num_perm whose LSH threshold is closest to threshold
+    
+    Two signatures become candidates with probability 1 - (1 - s^rows)^bands at
+    similarity s; the curve is steepest around (1 / bands) ** (1 / rows).
+    """
+    options = [(bands, num_perm // bands) for bands in range(1, num_perm + 1) if num_perm % bands == 0]
+    return min(options, key=lambda option: abs((1 / option[0]) ** (1 / option[1]) - threshold))
+
+class NearDuplicateIndex:
+    """MinHash signatures of extracted CV text with an LSH index for near-duplicate lookup
+    
+    Each CV's text is reduced to a fixed-size MinHash signature whose agreement
+    with another signature estimates the Jaccard similarity of their word
+    shingles. Signatures are split into bands and bucketed, so a lookup only
+    compares against CVs sharing at least one band instead of the whole
+    database. Signatures are persisted in a file next to the CV database and
+    dropped when their CV is deleted.
+    """
+    
+    def __init__(self, cv_database: CVDatabase, threshold: float = 0.85, num_perm: int = 128,
+                 shingle_size: int = 5, seed: int = 1, db_path: Optional[str] = None):
+        if not 0 < threshold <= 1:
+            raise ValueError(f"Similarity threshold must be in (0, 1]: {threshold}")
+        
+        self.cv_database = cv_database
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = choose_bands(num_perm, threshold)
+        
+        # Fixed seed, so signatures stored by earlier runs stay comparable
+        self._seed = seed
+        rng = np.random.RandomState(seed)
+        self._perm_a = rng.randint(1, int(MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+        self._perm_b = rng.randint(0, int(MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+        
+        self._signatures = {}
+        self._buckets = [{} for _ in range(self.bands)]
+        self._lock = threading.RLock()
+        # Indexed before analysis but not stored yet; kept when the database reloads
+        self._in_flight = set()
+        
+        # A file of its own, so writes never wait for a CVDatabase.batch() transaction to commit
+        self.db_path = db_path or os.path.splitext(cv_database.db_path)[0] + "_minhash.db"
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cv_minhash ("
+            "cv_id TEXT PRIMARY KEY, num_perm INTEGER NOT NULL, seed INTEGER NOT NULL, signature BLOB NOT NULL)"
+        )
+        self._conn.commit()
+        self._load()
+        
+        cv_database.add_listener(self._on_database_change)
+    
+    def _load(self):
+        rows = self._conn.execute("SELECT cv_id, signature FROM cv_minhash WHERE num_perm = ? AND seed = ?",
+                                  (self.num_perm, self._seed)).fetchall()
+        for cv_id, signature in rows:
+            self._insert(cv_id, np.frombuffer(signature, dtype=np.uint32))
+        logger.info(f"Loaded {len(rows)} MinHash signatures ({self.bands} bands of {self.rows} rows)")
+    
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of a text's word shingles"""
+        hashes = shingle_hashes(text, self.shingle_size)
+        if not len(hashes):
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint32)
+        # Products wrap around in uint64, which is deterministic and keeps the permutations well mixed
+        permuted = (np.outer(hashes, self._perm_a) + self._perm_b) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+    
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+    
+    def _insert(self, cv_id: str, signature: np.ndarray):
+        self._remove(cv_id)
+        self._signatures[cv_id] = signature
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            buckets.setdefault(key, set()).add(cv_id)
+    
+    def _remove(self, cv_id: str):
+        signature = self._signatures.pop(cv_id, None)
+        if signature is None:
+            return
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            bucket = buckets.get(key)
+            if bucket is not None:
+                bucket.discard(cv_id)
+                if not bucket:
+                    del buckets[key]
+    
+    def find_similar(self, text: str, exclude: Optional[str] = None,
+                     signature: Optional[np.ndarray] = None) -> List[Tuple[str, float]]:
+        """Return (cv_id, estimated similarity) for indexed CVs at or above the threshold, most similar first"""
+        if signature is None:
+            signature = self.signature(text)
+        
+        with self._lock:
+            candidates = set()
+            for buckets, key in zip(self._buckets, self._band_keys(signature)):
+                candidates.update(buckets.get(key, ()))
+            candidates.discard(exclude)
+            
+            matches = []
+            for cv_id in candidates:
+                similarity = float(np.mean(self._signatures[cv_id] == signature))
+                if similarity >= self.threshold:
+                    matches.append((cv_id, similarity))
+        
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        return matches
+    
+    def find_duplicate(self, text: str, exclude: Optional[str] = None,
+                       signature: Optional[np.ndarray] = None) -> Optional[Tuple[str, float]]:
+        """Return the most similar indexed CV at or above the threshold, if any"""
+        matches = self.find_similar(text, exclude=exclude, signature=signature)
+        return matches[0] if matches else None
+    
+    def add(self, cv_id: str, text: str, signature: Optional[np.ndarray] = None):
+        """Index the extracted text of a CV, replacing any earlier signature"""
+        if signature is None:
+            signature = self.signature(text)
+        with self._lock:
+            self._insert(cv_id, signature)
+            if self.cv_database.get_cv(cv_id) is None:
+                self._in_flight.add(cv_id)
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cv_minhash (cv_id, num_perm, seed, signature) VALUES (?, ?, ?, ?)",
+                    (cv_id, self.num_perm, self._seed, signature.tobytes())
+                )
+    
+    def remove(self, cv_id: str):
+        """Drop the signature of a CV"""
+        with self._lock:
+            self._remove(cv_id)
+            self._in_flight.discard(cv_id)
+            with self._conn:
+                self._conn.execute("DELETE FROM cv_minhash WHERE cv_id = ?", (cv_id,))
+    
+    def __len__(self) -> int:
+        return len(self._signatures)
+    
+    def _on_database_change(self, event: str, cv_id: Optional[str], cv_data: Optional[Dict[str, Any]]):
+        if event == "add":
+            with self._lock:
+                self._in_flight.discard(cv_id)
+        elif event == "delete":
+            self.remove(cv_id)
+        elif event == "reload":
+            # Signatures of CVs that no longer exist would report duplicates of nothing,
+            # but CVs still being analysed have not been stored yet
+            with self._lock:
+                stale = [indexed_id for indexed_id in self._signatures
+                         if indexed_id not in self._in_flight and self.cv_database.get_cv(indexed_id) is None]
+            for indexed_id in stale:
+                self.remove(indexed_id)
+    
+    def close(self):
+        """Close the signature store connection"""
+        with self._lock:
+            self._conn.close()
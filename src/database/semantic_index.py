@@ -0,0 +1,347 @@
+import os
+import re
+import json
+import time
+import uuid
+import pickle
+import logging
+import threading
+import warnings
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+
+import numpy as np
+
+# Local imports
+from src.database.cv_database import CVDatabase
+from src.query.retriever import flatten_cv
+from src.utils.lazy import lazy_import
+
+# scikit-learn is only needed once a model is fitted or loaded
+sklearn_text = lazy_import("sklearn.feature_extraction.text")
+sklearn_decomposition = lazy_import("sklearn.decomposition")
+
+logger = logging.getLogger(__name__)
+
+# Common abbreviations in CVs and queries, expanded so both spellings share terms
+ABBREVIATIONS = {
+    "ml": "machine learning",
+    "ai": "artificial intelligence",
+    "dl": "deep learning",
+    "nlp": "natural language processing",
+    "cv": "computer vision",
+    "llm": "large language model",
+    "llms": "large language models",
+    "swe": "software engineer",
+    "sde": "software development engineer",
+    "qa": "quality assurance",
+    "ui": "user interface",
+    "ux": "user experience",
+    "pm": "product manager",
+    "k8s": "kubernetes",
+    "js": "javascript",
+    "ts": "typescript",
+    "db": "database",
+    "dba": "database administrator",
+    "devops": "devops development operations",
+    "sre": "site reliability engineer",
+    "bi": "business intelligence",
+    "etl": "extract transform load",
+    "hr": "human resources",
+    "phd": "phd doctorate",
+    "msc": "msc master",
+    "bsc": "bsc bachelor",
+}
+ABBREVIATION_PATTERN = re.compile(r"\b(" + "|".join(map(re.escape, ABBREVIATIONS)) + r")\b")
+
+# Fields that describe the record rather than the candidate
+IGNORED_FIELDS = ("near_duplicate_of",)
+
+def normalize_text(text: str) -> str:
+    """Lowercase text and expand known abbreviations"""
+    return ABBREVIATION_PATTERN.sub(lambda match: ABBREVIATIONS[match.group(1)], text.lower())
+
+def cv_document(cv_data: Dict[str, Any], cv_text: Optional[str] = None) -> str:
+    """Text embedded for a CV: its structured fields followed by the extracted CV text"""
+    fields = {key: value for key, value in cv_data.items() if key not in IGNORED_FIELDS}
+    return flatten_cv(fields) + ("\n" + cv_text if cv_text else "")
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length as float32, so dot products are cosine similarities"""
+    vectors = vectors.astype(np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+class SemanticIndex:
+    """Offline embedding index over CV text and structured fields
+    
+    Documents are embedded with TF-IDF followed by a truncated SVD (latent
+    semantic analysis), so terms that occur in similar CVs end up close
+    together. Vectors are L2-normalised float32 rows of a matrix file that is
+    memory-mapped on load, so opening the index reads no vectors and a cosine
+    top-k query is one matrix-vector product. New and updated CVs are
+    embedded with the fitted model and appended; a deleted or replaced row is
+    masked until the next rebuild. The model is refitted when the corpus has
+    grown well past what it was fitted on, or when most rows are stale.
+    
+    The files live next to the database. Only one process should write to an
+    index; other processes changing the database are picked up by comparing
+    update times on reload.
+    """
+    
+    def __init__(self, cv_database: CVDatabase, index_dir: Optional[str] = None, dimensions: int = 256,
+                 fit_sample: int = 20000, refit_ratio: float = 2.0, batch_size: int = 1000, seed: int = 1):
+        self.cv_database = cv_database
+        self.index_dir = index_dir or os.path.splitext(cv_database.db_path)[0] + "_semantic"
+        self.dimensions = dimensions
+        self.fit_sample = fit_sample
+        self.refit_ratio = refit_ratio
+        self.batch_size = batch_size
+        self.seed = seed
+        
+        self._lock = threading.RLock()
+        self._meta = None
+        self._model = None
+        self._vectors = None
+        self._row_ids = []
+        self._row_stamps = []
+        self._rows = {}
+        self._active = np.zeros(0, dtype=bool)
+        self._pending = set()
+        self._needs_sync = True
+        # Filled by the database listener without taking the index lock, drained on refresh
+        self._changes = deque()
+        
+        os.makedirs(self.index_dir, exist_ok=True)
+        self._load()
+        
+        cv_database.add_listener(self._on_database_change)
+    
+    def _path(self, name: str) -> str:
+        return os.path.join(self.index_dir, name)
+    
+    def _load(self):
+        """Read the row map and map the vector file; the model itself is loaded on first use"""
+        try:
+            with open(self._path("meta.json"), 'r') as f:
+                meta = json.load(f)
+            with open(self._path("rows.jsonl"), 'r') as f:
+                header = json.loads(f.readline())
+                if header.get("model") != meta["model"]:
+                    raise ValueError("row map was written for another model")
+                rows = [json.loads(line) for line in f if line.endswith("\n")]
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"Discarding unreadable semantic index in {self.index_dir}: {str(e)}")
+            return
+        
+        # A crash between the two appends leaves one file a row ahead; ignore the extra row
+        row_bytes = meta["dimensions"] * 4
+        count = min(len(rows), os.path.getsize(self._path("vectors.f32")) // row_bytes)
+        self._meta = meta
+        for cv_id, stamp in rows[:count]:
+            self._track_row(cv_id, stamp)
+        self._map_vectors()
+        logger.info(f"Loaded semantic index with {len(self._rows)} CVs ({meta['dimensions']} dimensions)")
+    
+    def _track_row(self, cv_id: str, stamp: float):
+        row = len(self._row_ids)
+        self._row_ids.append(cv_id)
+        self._row_stamps.append(stamp)
+        previous = self._rows.get(cv_id)
+        if len(self._active) <= row:
+            self._active = np.concatenate([self._active, np.zeros(max(row + 1, len(self._active)), dtype=bool)])
+        if previous is not None:
+            self._active[previous] = False
+        self._rows[cv_id] = row
+        self._active[row] = True
+    
+    def _map_vectors(self):
+        count = len(self._row_ids)
+        self._vectors = None
+        if count:
+            self._vectors = np.memmap(self._path("vectors.f32"), dtype=np.float32, mode="r",
+                                      shape=(count, self._meta["dimensions"]))
+    
+    def _load_model(self):
+        if self._model is None and self._meta is not None:
+            with open(self._path("model.pkl"), 'rb') as f:
+                self._model = pickle.load(f)
+        return self._model
+    
+    def embed(self, documents: List[str]) -> np.ndarray:
+        """L2-normalised float32 vectors of documents under the fitted model"""
+        vectorizer, svd = self._load_model()
+        return normalize_rows(svd.transform(vectorizer.transform(documents)))
+    
+    def _documents(self, cv_ids: Iterable[str]) -> Tuple[List[str], List[str]]:
+        cv_ids = [cv_id for cv_id in cv_ids if self.cv_database.get_cv(cv_id) is not None]
+        texts = self.cv_database.get_cv_texts(cv_ids)
+        return cv_ids, [cv_document(self.cv_database.get_cv(cv_id), texts.get(cv_id)) for cv_id in cv_ids]
+    
+    def _append(self, cv_ids: List[str]):
+        """Embed CVs with the current model and append them to the vector and row files"""
+        for start in range(0, len(cv_ids), self.batch_size):
+            batch_ids, documents = self._documents(cv_ids[start:start + self.batch_size])
+            if not batch_ids:
+                continue
+            vectors = self.embed(documents)
+            stamp = time.time()
+            with open(self._path("vectors.f32"), 'ab') as f:
+                f.write(vectors.tobytes())
+            with open(self._path("rows.jsonl"), 'a') as f:
+                f.writelines(json.dumps([cv_id, stamp]) + "\n" for cv_id in batch_ids)
+            for cv_id in batch_ids:
+                self._track_row(cv_id, stamp)
+        self._map_vectors()
+    
+    def rebuild(self):
+        """Fit a new model on the database and re-embed every CV"""
+        with self._lock:
+            # Changes queued before this point are covered by the rebuild
+            self._apply_changes()
+            cv_ids, documents = self._documents(sorted(self.cv_database.get_update_times()))
+            if not cv_ids:
+                return
+            start = time.perf_counter()
+            
+            sample = documents
+            if len(documents) > self.fit_sample:
+                picks = np.random.RandomState(self.seed).choice(len(documents), self.fit_sample, replace=False)
+                sample = [documents[i] for i in sorted(picks)]
+            
+            vectorizer = sklearn_text.TfidfVectorizer(preprocessor=normalize_text, ngram_range=(1, 2),
+                                                      sublinear_tf=True, min_df=2 if len(sample) >= 1000 else 1,
+                                                      max_features=200000, dtype=np.float32)
+            tfidf = vectorizer.fit_transform(sample)
+            # With fewer documents than dimensions the SVD spans all of them, which loses nothing
+            components = max(1, min(self.dimensions, tfidf.shape[0], tfidf.shape[1] - 1))
+            svd = sklearn_decomposition.TruncatedSVD(n_components=components, random_state=self.seed)
+            with warnings.catch_warnings():
+                # Explained variance ratios are undefined for a single document
+                warnings.simplefilter("ignore", RuntimeWarning)
+                fitted = svd.fit_transform(tfidf)
+            
+            # Write a complete new index beside the old one, then swap the files in
+            meta = {"model": uuid.uuid4().hex, "dimensions": components, "fitted_documents": len(sample),
+                    "indexed_documents": len(cv_ids)}
+            self._vectors = None
+            self._model = (vectorizer, svd)
+            with open(self._path("model.pkl.tmp"), 'wb') as f:
+                pickle.dump(self._model, f, protocol=pickle.HIGHEST_PROTOCOL)
+            with open(self._path("vectors.f32.tmp"), 'wb') as f:
+                if sample is documents:
+                    # Every document was part of the fit, so its projection is already known
+                    f.write(normalize_rows(fitted).tobytes())
+                else:
+                    for start in range(0, len(documents), self.batch_size):
+                        f.write(self.embed(documents[start:start + self.batch_size]).tobytes())
+            stamp = time.time()
+            with open(self._path("rows.jsonl.tmp"), 'w') as f:
+                f.write(json.dumps({"model": meta["model"]}) + "\n")
+                f.writelines(json.dumps([cv_id, stamp]) + "\n" for cv_id in cv_ids)
+            for name in ("model.pkl", "vectors.f32", "rows.jsonl"):
+                os.replace(self._path(name + ".tmp"), self._path(name))
+            with open(self._path("meta.json.tmp"), 'w') as f:
+                json.dump(meta, f)
+            os.replace(self._path("meta.json.tmp"), self._path("meta.json"))
+            
+            self._meta = meta
+            self._row_ids, self._row_stamps, self._rows = [], [], {}
+            self._active = np.zeros(len(cv_ids), dtype=bool)
+            for cv_id in cv_ids:
+                self._track_row(cv_id, stamp)
+            self._map_vectors()
+            self._pending.clear()
+            self._needs_sync = False
+            logger.info(f"Built semantic index over {len(cv_ids)} CVs with {components} dimensions "
+                        f"in {time.perf_counter() - start:.2f}s")
+    
+    def _sync(self):
+        """Find CVs added, changed or deleted since the index was written"""
+        update_times = self.cv_database.get_update_times()
+        for cv_id, row in list(self._rows.items()):
+            if cv_id not in update_times:
+                self._active[row] = False
+                del self._rows[cv_id]
+        self._pending.update(cv_id for cv_id, updated_at in update_times.items()
+                             if cv_id not in self._rows or updated_at > self._row_stamps[self._rows[cv_id]])
+        self._needs_sync = False
+    
+    def _apply_changes(self):
+        while self._changes:
+            event, cv_id = self._changes.popleft()
+            if event == "add":
+                self._pending.add(cv_id)
+            elif event == "delete":
+                self._pending.discard(cv_id)
+                row = self._rows.pop(cv_id, None)
+                if row is not None:
+                    self._active[row] = False
+            elif event == "reload":
+                self._needs_sync = True
+    
+    def _refit_due(self) -> bool:
+        # The corpus has grown refit_ratio times past the last build, or most rows are stale
+        indexed = self._meta.get("indexed_documents", self._meta["fitted_documents"])
+        stale_rows = len(self._row_ids) - len(self._rows)
+        return len(self._rows) + len(self._pending) > self.refit_ratio * max(indexed, 1) or stale_rows > len(self._rows)
+    
+    def refresh(self):
+        """Bring the index up to date with the database, appending new CVs or refitting when due"""
+        with self._lock:
+            self._apply_changes()
+            if self._needs_sync:
+                self._sync()
+            
+            if self._meta is None or self._refit_due():
+                if self.cv_database.get_all_cvs():
+                    self.rebuild()
+            elif self._pending:
+                pending = sorted(self._pending)
+                self._pending.clear()
+                self._append(pending)
+    
+    def search(self, query: str, top_k: int = 10, cv_ids: Optional[Iterable[str]] = None,
+               min_score: float = 0.0) -> List[Tuple[str, float]]:
+        """Return (cv_id, cosine similarity) for the CVs most similar to a query, best first
+        
+        cv_ids restricts the search to those CVs, e.g. the result of a structured filter.
+        """
+        with self._lock:
+            self.refresh()
+            if self._vectors is None or not self._rows:
+                return []
+            
+            query_vector = self.embed([query])[0]
+            if cv_ids is None:
+                rows = np.arange(len(self._row_ids))
+                scores = np.asarray(self._vectors @ query_vector)
+                scores[~self._active[:len(scores)]] = -np.inf
+            else:
+                rows = np.array(sorted(self._rows[cv_id] for cv_id in set(cv_ids) if cv_id in self._rows),
+                                dtype=np.int64)
+                if not len(rows):
+                    return []
+                scores = np.asarray(self._vectors[rows] @ query_vector)
+            
+            top_k = min(top_k, len(scores))
+            if top_k <= 0:
+                return []
+            top = np.argpartition(-scores, top_k - 1)[:top_k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [(self._row_ids[row], float(score)) for row, score in zip(rows[top], scores[top])
+                    if score > min_score]
+    
+    def __len__(self) -> int:
+        return len(self._rows)
+    
+    def _on_database_change(self, event: str, cv_id: Optional[str], cv_data: Optional[Dict[str, Any]]):
+        # Called with the database lock held, while refresh takes the index lock before reading
+        # the database; queueing the change instead of taking the index lock here avoids a deadlock
+        self._changes.append((event, cv_id))
+    
+    def close(self):
+        """Stop following database changes; the index files are kept for the next open"""
+        self.cv_database.remove_listener(self._on_database_change)
@@ -0,0 +1,193 @@
+import re
+import json
+import time
+import random
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from types import SimpleNamespace
+from typing import List, Dict, Any, Optional, Tuple, Iterator
+
+# Local imports
+from src.analyzers.rule_extractor import RuleBasedExtractor
+from src.utils.text import estimate_tokens
+from src.utils import metrics
+from src.utils.lazy import lazy_import
+
+# LLM integration, imported when the first Gemini provider is created
+genai = lazy_import("google.generativeai")
+
+logger = logging.getLogger(__name__)
+
+LLM_PROMPT_BYTES = metrics.histogram("llm_prompt_bytes", "Size of prompts sent to the LLM, by operation",
+                                     buckets=metrics.SIZE_BUCKETS)
+LLM_TOKENS = metrics.counter("llm_tokens_total", "LLM tokens by operation and kind, estimated when not reported")
+
+def record_llm_usage(operation: str, prompt_text: str, response) -> Tuple[int, int]:
+    """Record the prompt size and token usage of an LLM call, returning (prompt_tokens, response_tokens)"""
+    usage = getattr(response, "usage_metadata", None)
+    prompt_tokens = getattr(usage, "prompt_token_count", None)
+    response_tokens = getattr(usage, "candidates_token_count", None)
+    
+    # Fall back to local estimates when the SDK does not report usage
+    if not isinstance(prompt_tokens, int):
+        prompt_tokens = estimate_tokens(prompt_text)
+    if not isinstance(response_tokens, int):
+        response_tokens = estimate_tokens(response.text)
+    
+    LLM_PROMPT_BYTES.observe(len(prompt_text.encode("utf-8")), operation=operation)
+    LLM_TOKENS.inc(prompt_tokens, operation=operation, kind="prompt")
+    LLM_TOKENS.inc(response_tokens, operation=operation, kind="response")
+    return prompt_tokens, response_tokens
+
+class LLMProvider(ABC):
+    """Interface between the analyzers/query engine and an LLM backend
+    
+    generate() answers a single prompt; chat() replays a Gemini-style history
+    ({"role": "user"|"model", "parts": [...]}) and sends one message. Both
+    return a response object with a ``text`` attribute and, where available,
+    ``usage_metadata``. chat_stream() yields the answer as text chunks while
+    the model produces it.
+    """
+    
+    name = "base"
+    
+    @abstractmethod
+    def generate(self, prompt: str):
+        """Answer a single prompt"""
+    
+    @abstractmethod
+    async def generate_async(self, prompt: str):
+        """Answer a single prompt without blocking the event loop"""
+    
+    @abstractmethod
+    def chat(self, history: List[Dict[str, Any]], message: str):
+        """Send a message after replaying the conversation history"""
+    
+    @abstractmethod
+    async def chat_async(self, history: List[Dict[str, Any]], message: str):
+        """Send a message after replaying the history, without blocking the event loop"""
+    
+    @abstractmethod
+    def chat_stream(self, history: List[Dict[str, Any]], message: str) -> Iterator[str]:
+        """Send a message and yield the answer as text chunks"""
+
+class GeminiProvider(LLMProvider):
+    """Google Gemini through google-generativeai"""
+    
+    name = "gemini"
+    
+    def __init__(self, api_key: str, model_name: str = "gemini-1.5-pro"):
+        genai.configure(api_key=api_key)
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(model_name)
+    
+    def generate(self, prompt: str):
+        return self.model.generate_content(prompt)
+    
+    async def generate_async(self, prompt: str):
+        return await self.model.generate_content_async(prompt)
+    
+    def chat(self, history: List[Dict[str, Any]], message: str):
+        return self.model.start_chat(history=history).send_message(message)
+    
+    async def chat_async(self, history: List[Dict[str, Any]], message: str):
+        return await self.model.start_chat(history=history).send_message_async(message)
+    
+    def chat_stream(self, history: List[Dict[str, Any]], message: str) -> Iterator[str]:
+        response = self.model.start_chat(history=history).send_message(message, stream=True)
+        for chunk in response:
+            yield chunk.text
+
+class MockLLMError(RuntimeError):
+    """Simulated provider failure raised by MockLLMProvider"""
+
+class MockLLMProvider(LLMProvider):
+    """Offline stand-in for load testing ingestion and querying without the live API
+    
+    Each call waits latency +/- jitter seconds (before the first chunk when
+    streaming) and fails with probability error_rate. Extraction prompts get
+    schema-valid JSON built from the CV text with the rule-based extractor (one
+    object per CV for batch prompts); chat messages get a short canned answer.
+    """
+    
+    name = "mock"
+    
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        self.model_name = "mock"
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._rule_extractor = RuleBasedExtractor()
+    
+    def _next_delay(self) -> float:
+        """Return the simulated latency of the next call, raising for simulated failures"""
+        self.calls += 1
+        delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+        if self._random.random() < self.error_rate:
+            raise MockLLMError("Simulated LLM provider error")
+        return delay
+    
+    def _cv_record(self, cv_text: str) -> Dict[str, Any]:
+        cv_data = self._rule_extractor.extract(cv_text)
+        lines = [line.strip() for line in cv_text.splitlines() if line.strip()]
+        if not cv_data["personal_info"]["name"] and lines:
+            cv_data["personal_info"]["name"] = lines[0][:60]
+        return cv_data
+    
+    def _completion(self, prompt: str) -> str:
+        batch_match = re.search(r"Here are the CVs:\n(.*)", prompt, re.DOTALL)
+        if batch_match:
+            cv_texts = re.split(r"===== CV \d+ =====\n", batch_match.group(1))[1:]
+            return json.dumps([self._cv_record(cv_text) for cv_text in cv_texts])
+        
+        cv_match = re.search(r"Here is the CV text:\n(.*)", prompt, re.DOTALL)
+        return json.dumps(self._cv_record(cv_match.group(1) if cv_match else prompt))
+    
+    @staticmethod
+    def _response(prompt_text: str, text: str):
+        usage = SimpleNamespace(prompt_token_count=estimate_tokens(prompt_text),
+                                candidates_token_count=estimate_tokens(text))
+        return SimpleNamespace(text=text, usage_metadata=usage)
+    
+    @staticmethod
+    def _answer(message: str) -> str:
+        return f"Mock answer to: {message}"
+    
+    @staticmethod
+    def _history_text(history: List[Dict[str, Any]], message: str) -> str:
+        return "".join(part for turn in history for part in turn["parts"]) + message
+    
+    def generate(self, prompt: str):
+        time.sleep(self._next_delay())
+        return self._response(prompt, self._completion(prompt))
+    
+    async def generate_async(self, prompt: str):
+        await asyncio.sleep(self._next_delay())
+        return self._response(prompt, self._completion(prompt))
+    
+    def chat(self, history: List[Dict[str, Any]], message: str):
+        time.sleep(self._next_delay())
+        return self._response(self._history_text(history, message), self._answer(message))
+    
+    async def chat_async(self, history: List[Dict[str, Any]], message: str):
+        await asyncio.sleep(self._next_delay())
+        return self._response(self._history_text(history, message), self._answer(message))
+    
+    def chat_stream(self, history: List[Dict[str, Any]], message: str) -> Iterator[str]:
+        time.sleep(self._next_delay())
+        words = self._answer(message).split(" ")
+        for position, word in enumerate(words):
+            yield word if position == 0 else " " + word
+
+def create_provider(provider: str, api_key: str, model_name: str = "gemini-1.5-pro") -> LLMProvider:
+    """Create an LLM provider by name"""
+    provider = provider.lower()
+    if provider == "gemini":
+        return GeminiProvider(api_key, model_name)
+    if provider == "mock":
+        return MockLLMProvider()
+    raise ValueError(f"Unsupported LLM provider: {provider}")
\ No newline at end of file
@@ -0,0 +1,300 @@
+import os
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Callable, Optional, Tuple, Dict, Union
+
+# Local imports
+from src.processors.cv_processor import CVProcessor
+from src.processors.text_compactor import TextCompactor
+from src.analyzers.cv_analyzer import CVAnalyzer
+from src.database.cv_database import CVDatabase
+from src.database.near_duplicates import NearDuplicateIndex
+from src.pipeline.manifest import IngestionManifest
+from src.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# "flag" analyses near-duplicates and marks them; "skip" keeps only the CV seen first
+DUPLICATE_ACTIONS = ("flag", "skip")
+
+# Metrics recorded inside extraction worker processes are lost, so the stage time is reported back
+EXTRACT_STAGE_SECONDS = metrics.histogram("cv_pipeline_extract_seconds",
+                                          "Extraction and compaction time per document in the ingestion pipeline")
+
+def _extract_document(cv_processor: CVProcessor, text_compactor: Optional[TextCompactor],
+                      source: Union[str, Tuple[str, bytes]]) -> Tuple[str, Dict[str, int], float]:
+    """Extract and compact text from a document; runs in extraction pool workers
+    
+    The source is a file path or a (filename, content) pair for in-memory uploads.
+    Returns the text, the compaction statistics and the time spent.
+    """
+    start = time.perf_counter()
+    if isinstance(source, str):
+        cv_text = cv_processor.process_document(source)
+    else:
+        filename, data = source
+        cv_text = cv_processor.process_bytes(data, filename)
+    compaction_stats = {}
+    if cv_text and text_compactor:
+        cv_text, compaction_stats = text_compactor.compact(cv_text)
+    return cv_text, compaction_stats, time.perf_counter() - start
+
+# Processor and compactor of an extraction pool worker process, set by the pool initializer
+_worker_components = None
+
+def _init_extract_worker(cv_processor: CVProcessor, text_compactor: Optional[TextCompactor]):
+    """Keep one processor per extraction worker instead of unpickling one with every task
+    
+    The pool already spreads documents over the cores, so each worker OCRs its
+    pages serially rather than starting an OCR pool of its own.
+    """
+    global _worker_components
+    cv_processor.ocr_workers = 1
+    _worker_components = (cv_processor, text_compactor)
+
+def _extract_document_in_worker(source: Union[str, Tuple[str, bytes]]) -> Tuple[str, Dict[str, int], float]:
+    return _extract_document(*_worker_components, source)
+
+class IngestionPipeline:
+    """Staged CV ingestion with parallel extraction and concurrent LLM analysis
+    
+    Text extraction and OCR are CPU-bound and run in a process pool. LLM
+    analysis is I/O-bound and runs on a bounded thread pool. Finished CVs are
+    written to the database from the calling thread as soon as they complete.
+    """
+    
+    def __init__(self, cv_processor: CVProcessor, cv_analyzer: CVAnalyzer, cv_database: CVDatabase,
+                 extract_workers: Optional[int] = None, analysis_concurrency: int = 8,
+                 text_compactor: Optional[TextCompactor] = None,
+                 manifest: Optional[IngestionManifest] = None,
+                 near_duplicates: Optional[NearDuplicateIndex] = None, duplicate_action: str = "flag"):
+        self.cv_processor = cv_processor
+        self.cv_analyzer = cv_analyzer
+        self.cv_database = cv_database
+        self.text_compactor = text_compactor
+        self.manifest = manifest
+        
+        # Near-duplicates are detected on the extracted text, before any LLM call
+        if duplicate_action not in DUPLICATE_ACTIONS:
+            raise ValueError(f"Unsupported duplicate action: {duplicate_action}")
+        self.near_duplicates = near_duplicates
+        self.duplicate_action = duplicate_action
+        self.last_run_stats = {}
+        self.extract_workers = extract_workers or os.cpu_count() or 1
+        self.analysis_concurrency = max(1, analysis_concurrency)
+    
+    def _create_extract_pool(self):
+        # A single worker does not justify the process start-up cost
+        if self.extract_workers <= 1:
+            return ThreadPoolExecutor(max_workers=1)
+        return ProcessPoolExecutor(max_workers=self.extract_workers, initializer=_init_extract_worker,
+                                   initargs=(self.cv_processor, self.text_compactor))
+    
+    def _submit_extraction(self, pool, source: Union[str, Tuple[str, bytes]]):
+        if isinstance(pool, ProcessPoolExecutor):
+            return pool.submit(_extract_document_in_worker, source)
+        return pool.submit(_extract_document, self.cv_processor, self.text_compactor, source)
+    
+    def _record_compaction(self, cv_id: str, stats: Dict[str, int]):
+        logger.info(f"Compacted {cv_id}: saved {stats['chars_saved']} chars, "
+                    f"{stats['tokens_saved']} of {stats['original_tokens']} tokens")
+        self.last_run_stats["documents"] += 1
+        self.last_run_stats["chars_saved"] += stats["chars_saved"]
+        self.last_run_stats["tokens_saved"] += stats["tokens_saved"]
+    
+    def _check_near_duplicate(self, cv_id: str, cv_text: str) -> Optional[Tuple[str, float]]:
+        """Look up an indexed near-duplicate of the text, indexing the text unless it will be skipped"""
+        signature = self.near_duplicates.signature(cv_text)
+        duplicate = self.near_duplicates.find_duplicate(cv_text, exclude=cv_id, signature=signature)
+        if duplicate and self.duplicate_action == "skip":
+            return duplicate
+        # Index now rather than after analysis, so copies within the same batch are caught too
+        self.near_duplicates.add(cv_id, cv_text, signature=signature)
+        return duplicate
+    
+    def run(self, file_paths: List[str],
+            progress_callback: Optional[Callable[[int, int, str], None]] = None) -> List[str]:
+        """Ingest the given files, reporting (completed, total, message) as each one finishes"""
+        return self._run([(os.path.basename(file_path), file_path) for file_path in file_paths],
+                         progress_callback)
+    
+    def run_uploads(self, uploads: List[Tuple[str, bytes]],
+                    progress_callback: Optional[Callable[[int, int, str], None]] = None) -> List[str]:
+        """Ingest in-memory (filename, content) pairs, stored under their original filenames"""
+        return self._run([(filename, (filename, data)) for filename, data in uploads], progress_callback)
+    
+    def sync_folder(self, folder_path: str,
+                    progress_callback: Optional[Callable[[int, int, str], None]] = None) -> List[str]:
+        """Bring the database in line with a folder using the manifest
+        
+        Only new and modified files are analysed. Files whose content was already
+        ingested under another name reuse the stored analysis, and CVs whose
+        source files were deleted are removed from the database. On the first sync
+        of a folder, files whose CV is already stored are only recorded, so an
+        existing database is not analysed again; later new files are always analysed.
+        """
+        if self.manifest is None:
+            raise ValueError("sync_folder requires an ingestion manifest")
+        
+        first_sync = not self.manifest.has_folder(folder_path)
+        start = time.perf_counter()
+        changes = self.manifest.scan(folder_path)
+        logger.info(f"Scanned {folder_path} in {time.perf_counter() - start:.2f}s: " +
+                    ", ".join(f"{len(entries)} {kind}" for kind, entries in changes.items()))
+        
+        messages = []
+        for file_entry in changes["copies"]:
+            cv_data = self.cv_database.get_cv(file_entry["source_cv_id"])
+            if cv_data is None:
+                # The earlier analysis is gone, so treat the file as new
+                changes["new"].append(file_entry)
+                continue
+            try:
+                self.cv_database.add_cv(file_entry["cv_id"], cv_data,
+                                        cv_text=self.cv_database.get_cv_text(file_entry["source_cv_id"]))
+            except Exception:
+                # Not recorded, so the next sync tries again
+                messages.append(f"Failed to store CV: {file_entry['cv_id']}")
+                continue
+            self.manifest.record(file_entry)
+            messages.append(f"Reused analysis of {file_entry['source_cv_id']} for {file_entry['cv_id']}")
+        
+        # Deletions go after copies, so a renamed file keeps the analysis of its old name
+        for record in changes["deleted"]:
+            self.manifest.remove(record["path"])
+            if self.manifest.is_referenced(record["cv_id"]):
+                continue
+            try:
+                if self.cv_database.delete_cv(record["cv_id"]):
+                    messages.append(f"Removed CV {record['cv_id']} as its file was deleted")
+            except Exception:
+                # Keep the file recorded, so the next sync tries again
+                self.manifest.record(record)
+                messages.append(f"Failed to remove CV: {record['cv_id']}")
+        
+        # CVs ingested before the folder was first synced are recorded without re-analysis
+        adopted = set()
+        if first_sync:
+            adopted_entries = [file_entry for file_entry in changes["new"]
+                               if self.cv_database.get_cv(file_entry["cv_id"])]
+            if adopted_entries:
+                self.manifest.record_many(adopted_entries)
+                messages.extend(f"CV {file_entry['cv_id']} already in database" for file_entry in adopted_entries)
+            adopted = {file_entry["cv_id"] for file_entry in adopted_entries}
+        
+        # Failed analyses are not stored or recorded, so the next sync retries them
+        pending = {file_entry["cv_id"]: file_entry for file_entry in changes["new"] + changes["modified"]
+                   if file_entry["cv_id"] not in adopted}
+        return self._run([(cv_id, file_entry["path"]) for cv_id, file_entry in pending.items()],
+                         progress_callback, skip_existing=False, raise_analysis_errors=True,
+                         on_stored=lambda cv_id: self.manifest.record(pending[cv_id]),
+                         completed_messages=messages)
+    
+    def _run(self, sources: List[Tuple[str, Union[str, Tuple[str, bytes]]]],
+             progress_callback: Optional[Callable[[int, int, str], None]],
+             skip_existing: bool = True, raise_analysis_errors: bool = False,
+             on_stored: Optional[Callable[[str], None]] = None,
+             completed_messages: Optional[List[str]] = None) -> List[str]:
+        results = []
+        completed_messages = completed_messages or []
+        total = len(completed_messages) + len(sources)
+        self.last_run_stats = {"documents": 0, "chars_saved": 0, "tokens_saved": 0, "near_duplicates": 0}
+        near_duplicates = {}
+        
+        def report(message: str):
+            results.append(message)
+            if progress_callback:
+                progress_callback(len(results), total, message)
+        
+        for message in completed_messages:
+            logger.info(message)
+            report(message)
+        
+        analysis_kwargs = {"raise_errors": True} if raise_analysis_errors else {}
+        pending = []
+        for cv_id, source in sources:
+            if skip_existing and self.cv_database.get_cv(cv_id):
+                logger.info(f"CV {cv_id} already processed, skipping")
+                report(f"CV {cv_id} already in database")
+            else:
+                pending.append((cv_id, source))
+        
+        if not pending:
+            return results
+        
+        with self._create_extract_pool() as extract_pool, \
+                ThreadPoolExecutor(max_workers=self.analysis_concurrency) as analysis_pool:
+            extract_futures = {
+                self._submit_extraction(extract_pool, source): cv_id
+                for cv_id, source in pending
+            }
+            analysis_futures = {}
+            # Extracted text awaiting analysis, stored with the record for semantic search
+            texts = {}
+            
+            while extract_futures or analysis_futures:
+                done, _ = wait(list(extract_futures) + list(analysis_futures), return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    if future in extract_futures:
+                        cv_id = extract_futures.pop(future)
+                        try:
+                            cv_text, compaction_stats, extract_seconds = future.result()
+                            EXTRACT_STAGE_SECONDS.observe(extract_seconds)
+                        except Exception as e:
+                            logger.error(f"Error extracting text from {cv_id}: {str(e)}")
+                            cv_text, compaction_stats = "", {}
+                        
+                        if compaction_stats:
+                            self._record_compaction(cv_id, compaction_stats)
+                        
+                        if not cv_text:
+                            report(f"Failed to extract text from {cv_id}")
+                            continue
+                        
+                        duplicate = None
+                        if self.near_duplicates is not None:
+                            duplicate = self._check_near_duplicate(cv_id, cv_text)
+                        if duplicate:
+                            self.last_run_stats["near_duplicates"] += 1
+                            if self.duplicate_action == "skip":
+                                report(f"Skipped {cv_id}: near-duplicate of {duplicate[0]} ({duplicate[1]:.0%} similar)")
+                                continue
+                            near_duplicates[cv_id] = duplicate
+                        
+                        # Hand the text over to the analysis stage
+                        texts[cv_id] = cv_text
+                        analysis_futures[analysis_pool.submit(
+                            self.cv_analyzer.extract_cv_information, cv_text, **analysis_kwargs)] = cv_id
+                    else:
+                        cv_id = analysis_futures.pop(future)
+                        try:
+                            cv_data = future.result()
+                        except Exception as e:
+                            logger.error(f"Error analyzing CV {cv_id}: {str(e)}")
+                            report(f"Failed to analyze CV: {cv_id}")
+                            texts.pop(cv_id, None)
+                            if self.near_duplicates is not None:
+                                self.near_duplicates.remove(cv_id)
+                            continue
+                        
+                        message = f"Successfully processed CV: {cv_id}"
+                        if cv_id in near_duplicates:
+                            duplicate_id, similarity = near_duplicates[cv_id]
+                            cv_data = dict(cv_data, near_duplicate_of={"cv_id": duplicate_id,
+                                                                       "similarity": round(similarity, 3)})
+                            message += f" (near-duplicate of {duplicate_id}, {similarity:.0%} similar)"
+                        
+                        try:
+                            self.cv_database.add_cv(cv_id, cv_data, cv_text=texts.pop(cv_id, None))
+                        except Exception:
+                            report(f"Failed to store CV: {cv_id}")
+                            if self.near_duplicates is not None:
+                                self.near_duplicates.remove(cv_id)
+                            continue
+                        if on_stored:
+                            on_stored(cv_id)
+                        report(message)
+        
+        return results
\ No newline at end of file
@@ -0,0 +1,217 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, Any, List, Optional
+
+# Local imports
+from src.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+JOB_TRANSITIONS = metrics.counter("cv_job_transitions_total", "Ingestion job state changes by new state")
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+JOB_STATES = (PENDING, RUNNING, DONE, FAILED)
+
+class JobQueue:
+    """Durable ingestion job queue stored in SQLite
+    
+    Jobs move from pending to running when a worker claims them and end up done
+    or failed. Failed attempts are retried with exponential backoff until
+    max_attempts is reached. A claim is a lease: if a worker dies without
+    finishing its job, the job becomes claimable again once the lease expires,
+    so a batch resumes after a crash. Several worker processes can share one
+    queue file.
+    """
+    
+    def __init__(self, db_path: str = "data/ingestion_queue.db", max_attempts: int = 5,
+                 backoff_base: float = 5.0, backoff_max: float = 600.0, lease_seconds: float = 900.0):
+        self.db_path = db_path
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        
+        # Create directory if it doesn't exist
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        
+        # Autocommit mode, so claims can take the write lock up front with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "file_path TEXT NOT NULL UNIQUE, "
+            "cv_id TEXT NOT NULL, "
+            "state TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, "
+            "next_attempt_at REAL NOT NULL, "
+            "lease_until REAL, "
+            "worker_id TEXT, "
+            "message TEXT, "
+            "created_at REAL NOT NULL, "
+            "updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, next_attempt_at)")
+    
+    def enqueue(self, file_path: str, cv_id: Optional[str] = None) -> bool:
+        """Add a job for file_path, returning False if the file is already queued"""
+        file_path = os.path.abspath(file_path)
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO jobs (file_path, cv_id, state, next_attempt_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (file_path, cv_id or os.path.basename(file_path), PENDING, now, now, now)
+            )
+        if cursor.rowcount:
+            JOB_TRANSITIONS.inc(state=PENDING)
+        return bool(cursor.rowcount)
+    
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Claim the next due job for worker_id, or return None if nothing is due
+        
+        Pending jobs whose backoff has elapsed and running jobs whose lease has
+        expired are both eligible, oldest first. An expired job that has used up
+        max_attempts is marked failed instead, so a file that kills its worker
+        is not picked up forever.
+        """
+        now = time.time()
+        exhausted = 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    row = self._conn.execute(
+                        "SELECT * FROM jobs WHERE (state = ? AND next_attempt_at <= ?) "
+                        "OR (state = ? AND lease_until < ?) ORDER BY next_attempt_at, id LIMIT 1",
+                        (PENDING, now, RUNNING, now)
+                    ).fetchone()
+                    if row is None or row["state"] == PENDING or row["attempts"] < self.max_attempts:
+                        break
+                    
+                    logger.error(f"Lease on job {row['id']} held by {row['worker_id']} expired "
+                                 f"after {row['attempts']} attempts, marking it failed")
+                    self._conn.execute(
+                        "UPDATE jobs SET state = ?, message = ?, lease_until = NULL, updated_at = ? WHERE id = ?",
+                        (FAILED, f"Worker lease expired on attempt {row['attempts']}", now, row["id"])
+                    )
+                    exhausted += 1
+                
+                if row is not None:
+                    if row["state"] == RUNNING:
+                        logger.warning(f"Lease on job {row['id']} held by {row['worker_id']} expired, reclaiming")
+                    self._conn.execute(
+                        "UPDATE jobs SET state = ?, attempts = attempts + 1, lease_until = ?, worker_id = ?, "
+                        "updated_at = ? WHERE id = ?",
+                        (RUNNING, now + self.lease_seconds, worker_id, now, row["id"])
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        
+        if exhausted:
+            JOB_TRANSITIONS.inc(exhausted, state=FAILED)
+        if row is None:
+            return None
+        
+        JOB_TRANSITIONS.inc(state=RUNNING)
+        job = dict(row)
+        job.update(state=RUNNING, attempts=row["attempts"] + 1, worker_id=worker_id)
+        return job
+    
+    def heartbeat(self, job_id: int, worker_id: str) -> bool:
+        """Extend the lease on a running job, returning False if the worker no longer holds it"""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET lease_until = ?, updated_at = ? WHERE id = ? AND state = ? AND worker_id = ?",
+                (now + self.lease_seconds, now, job_id, RUNNING, worker_id)
+            )
+        return bool(cursor.rowcount)
+    
+    def complete(self, job_id: int, message: str = ""):
+        """Mark a job as done"""
+        self._set_state(job_id, DONE, message)
+    
+    def fail(self, job_id: int, error: str) -> str:
+        """Record a failed attempt, scheduling a retry with backoff while attempts remain
+        
+        Returns the job's new state, pending or failed.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"Unknown job: {job_id}")
+        
+        attempts = row["attempts"]
+        if attempts >= self.max_attempts:
+            logger.error(f"Job {job_id} failed after {attempts} attempts: {error}")
+            self._set_state(job_id, FAILED, error)
+            return FAILED
+        
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1))
+        logger.warning(f"Job {job_id} failed on attempt {attempts}, retrying in {delay:.0f}s: {error}")
+        self._set_state(job_id, PENDING, error, next_attempt_at=time.time() + delay)
+        return PENDING
+    
+    def _set_state(self, job_id: int, state: str, message: str, next_attempt_at: Optional[float] = None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET state = ?, message = ?, lease_until = NULL, "
+                "next_attempt_at = COALESCE(?, next_attempt_at), updated_at = ? WHERE id = ?",
+                (state, message, next_attempt_at, now, job_id)
+            )
+        JOB_TRANSITIONS.inc(state=state)
+    
+    def retry_failed(self) -> int:
+        """Move every failed job back to pending with a fresh attempt budget"""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET state = ?, attempts = 0, next_attempt_at = ?, updated_at = ? WHERE state = ?",
+                (PENDING, now, now, FAILED)
+            )
+        return cursor.rowcount
+    
+    def get_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Return a job by ID"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+    
+    def list_jobs(self, state: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return all jobs, or those in the given state, oldest first"""
+        with self._lock:
+            if state:
+                rows = self._conn.execute("SELECT * FROM jobs WHERE state = ? ORDER BY id", (state,)).fetchall()
+            else:
+                rows = self._conn.execute("SELECT * FROM jobs ORDER BY id").fetchall()
+        return [dict(row) for row in rows]
+    
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs in each state"""
+        with self._lock:
+            rows = self._conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        counts = dict.fromkeys(JOB_STATES, 0)
+        counts.update({state: count for state, count in rows})
+        return counts
+    
+    def has_unfinished(self) -> bool:
+        """Whether any job is still pending or running"""
+        counts = self.counts()
+        return bool(counts[PENDING] or counts[RUNNING])
+    
+    def close(self):
+        """Close the queue database connection"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,149 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, List, Optional
+
+# Local imports
+from src.processors.cv_processor import CVProcessor
+
+logger = logging.getLogger(__name__)
+
+def file_sha256(file_path: str) -> str:
+    """Hash a file's content in chunks"""
+    content_hash = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            content_hash.update(chunk)
+    return content_hash.hexdigest()
+
+class IngestionManifest:
+    """Record of ingested source files for incremental folder re-ingestion
+    
+    Each file is stored with its size, modification time, content hash and the
+    CV it produced. A rescan stats every file and only hashes those whose size
+    or mtime changed, so an unchanged folder is checked without reading any
+    file contents. Content hashes also recognise a known CV under a new name.
+    """
+    
+    def __init__(self, db_path: str = "data/ingestion_manifest.db"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        
+        # Create directory if it doesn't exist
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, folder TEXT NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, "
+            "content_hash TEXT NOT NULL, cv_id TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS files_folder ON files (folder)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS files_content_hash ON files (content_hash)")
+        self._conn.commit()
+    
+    def scan(self, folder_path: str) -> Dict[str, List[Dict[str, Any]]]:
+        """Compare a folder with the manifest
+        
+        Returns lists of file entries under "new", "modified", "copies" (content
+        already ingested under another path, with "source_cv_id" set),
+        "unchanged" and "deleted". Entries carry path, size, mtime_ns,
+        content_hash and cv_id. Only the new stat of files that were touched
+        but not modified is written back; ingested files are recorded by the caller.
+        """
+        folder = os.path.abspath(folder_path)
+        with self._lock:
+            known = {row["path"]: dict(row) for row in
+                     self._conn.execute("SELECT * FROM files WHERE folder = ?", (folder,))}
+        
+        changes = {"new": [], "modified": [], "copies": [], "unchanged": [], "deleted": []}
+        touched = []
+        seen = set()
+        
+        with os.scandir(folder) as entries:
+            for entry in sorted(entries, key=lambda entry: entry.name):
+                if not entry.is_file() or not entry.name.lower().endswith(CVProcessor.SUPPORTED_EXTENSIONS):
+                    continue
+                
+                path = os.path.join(folder, entry.name)
+                stat = entry.stat()
+                seen.add(path)
+                record = known.get(path)
+                
+                # Same size and mtime: trust the recorded hash without reading the file
+                if record and record["size"] == stat.st_size and record["mtime_ns"] == stat.st_mtime_ns:
+                    changes["unchanged"].append(record)
+                    continue
+                
+                file_entry = {"path": path, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                              "content_hash": file_sha256(path), "cv_id": entry.name}
+                
+                if record and record["content_hash"] == file_entry["content_hash"]:
+                    # Touched but not modified; remember the new stat so it is not hashed again
+                    file_entry["cv_id"] = record["cv_id"]
+                    touched.append(file_entry)
+                    changes["unchanged"].append(file_entry)
+                else:
+                    source_cv_id = self.find_cv_id(file_entry["content_hash"])
+                    if source_cv_id:
+                        file_entry["source_cv_id"] = source_cv_id
+                        changes["copies"].append(file_entry)
+                    elif record:
+                        changes["modified"].append(file_entry)
+                    else:
+                        changes["new"].append(file_entry)
+        
+        changes["deleted"] = [record for path, record in known.items() if path not in seen]
+        
+        if touched:
+            self.record_many(touched)
+        
+        return changes
+    
+    def has_folder(self, folder_path: str) -> bool:
+        """Whether any file of this folder was recorded, i.e. the folder was synced before"""
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM files WHERE folder = ? LIMIT 1",
+                                      (os.path.abspath(folder_path),)).fetchone() is not None
+    
+    def find_cv_id(self, content_hash: str) -> Optional[str]:
+        """Return the CV ID of a file already ingested with this content"""
+        with self._lock:
+            row = self._conn.execute("SELECT cv_id FROM files WHERE content_hash = ? LIMIT 1",
+                                     (content_hash,)).fetchone()
+        return row["cv_id"] if row else None
+    
+    def record(self, file_entry: Dict[str, Any]):
+        """Record that a file was ingested"""
+        self.record_many([file_entry])
+    
+    def record_many(self, file_entries: List[Dict[str, Any]]):
+        """Record several ingested files in one transaction"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files (path, folder, size, mtime_ns, content_hash, cv_id, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(entry["path"], os.path.dirname(entry["path"]), entry["size"], entry["mtime_ns"],
+                  entry["content_hash"], entry["cv_id"], now) for entry in file_entries]
+            )
+    
+    def remove(self, path: str):
+        """Forget a file, e.g. after it was deleted"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM files WHERE path = ?", (path,))
+    
+    def is_referenced(self, cv_id: str) -> bool:
+        """Whether any recorded file still produces this CV"""
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM files WHERE cv_id = ? LIMIT 1", (cv_id,)).fetchone() is not None
+    
+    def close(self):
+        """Close the manifest database connection"""
+        with self._lock:
+            self._conn.close()
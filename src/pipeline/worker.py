@@ -0,0 +1,298 @@
+"""Headless CV ingestion worker backed by a durable job queue
+
+Files are queued in a SQLite job queue and processed outside the Streamlit app,
+so ingestion survives closed tabs and restarts. Several workers can run
+against the same queue and database.
+
+    python -m src.pipeline.worker enqueue data/sample_cvs
+    python -m src.pipeline.worker run --watch data/incoming --threads 4
+    python -m src.pipeline.worker run --until-idle
+    python -m src.pipeline.worker sync data/sample_cvs
+    python -m src.pipeline.worker status
+"""
+import os
+import sys
+import time
+import uuid
+import signal
+import socket
+import logging
+import argparse
+import threading
+from typing import Dict, Any, List, Optional, Iterable
+
+from dotenv import load_dotenv
+
+# Local imports
+from src.processors.cv_processor import CVProcessor
+from src.processors.text_compactor import TextCompactor
+from src.analyzers.cv_analyzer import CVAnalyzer
+from src.database.cv_database import CVDatabase
+from src.database.near_duplicates import NearDuplicateIndex
+from src.pipeline.job_queue import JobQueue, FAILED
+from src.pipeline.ingestion import IngestionPipeline, DUPLICATE_ACTIONS
+from src.pipeline.manifest import IngestionManifest
+from src.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+JOB_SECONDS = metrics.histogram("cv_worker_job_seconds", "Time to process one ingestion job, by outcome")
+
+def list_supported_files(folder_path: str) -> List[str]:
+    """Paths of the CV documents directly inside folder_path, in name order"""
+    file_paths = []
+    for filename in sorted(os.listdir(folder_path)):
+        file_path = os.path.join(folder_path, filename)
+        if os.path.isfile(file_path) and filename.lower().endswith(CVProcessor.SUPPORTED_EXTENSIONS):
+            file_paths.append(file_path)
+    return file_paths
+
+class IngestionWorker:
+    """Process ingestion jobs from a JobQueue until stopped
+    
+    Each of the worker threads claims one job at a time. Leases on running
+    jobs are renewed in the background, so only jobs of a worker that died
+    are picked up again by others.
+    """
+    
+    def __init__(self, job_queue: JobQueue, cv_processor: CVProcessor, cv_analyzer: CVAnalyzer,
+                 cv_database: CVDatabase, text_compactor: Optional[TextCompactor] = None,
+                 worker_id: Optional[str] = None, threads: int = 1, poll_interval: float = 2.0,
+                 settle_seconds: float = 2.0, near_duplicates: Optional[NearDuplicateIndex] = None,
+                 duplicate_action: str = "flag"):
+        self.job_queue = job_queue
+        self.cv_processor = cv_processor
+        self.cv_analyzer = cv_analyzer
+        self.cv_database = cv_database
+        self.text_compactor = text_compactor
+        if duplicate_action not in DUPLICATE_ACTIONS:
+            raise ValueError(f"Unsupported duplicate action: {duplicate_action}")
+        self.near_duplicates = near_duplicates
+        self.duplicate_action = duplicate_action
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.threads = max(1, threads)
+        self.poll_interval = poll_interval
+        # Files modified more recently than this may still be being copied into a watched folder
+        self.settle_seconds = settle_seconds
+        self.stop_event = threading.Event()
+        self._active_jobs = set()
+        self._active_lock = threading.Lock()
+    
+    def scan_folder(self, folder_path: str) -> int:
+        """Queue supported files in folder_path that are not queued yet, returning how many were added"""
+        added = 0
+        now = time.time()
+        for file_path in list_supported_files(folder_path):
+            if now - os.path.getmtime(file_path) < self.settle_seconds:
+                continue
+            if self.job_queue.enqueue(file_path):
+                logger.info(f"Queued {file_path}")
+                added += 1
+        return added
+    
+    def process_job(self, job: Dict[str, Any]) -> bool:
+        """Run one claimed job to completion, returning True if it succeeded"""
+        cv_id, file_path = job["cv_id"], job["file_path"]
+        start = time.perf_counter()
+        
+        try:
+            message = self._ingest(cv_id, file_path)
+        except Exception as e:
+            state = self.job_queue.fail(job["id"], str(e))
+            JOB_SECONDS.observe(time.perf_counter() - start, outcome="failed" if state == FAILED else "retry")
+            return False
+        
+        self.job_queue.complete(job["id"], message)
+        JOB_SECONDS.observe(time.perf_counter() - start, outcome="done")
+        logger.info(message)
+        return True
+    
+    def _ingest(self, cv_id: str, file_path: str) -> str:
+        if self.cv_database.get_cv(cv_id):
+            return f"CV {cv_id} already in database"
+        
+        if not os.path.isfile(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
+        
+        cv_text = self.cv_processor.process_document(file_path)
+        if not cv_text:
+            raise ValueError(f"Failed to extract text from {cv_id}")
+        
+        if self.text_compactor:
+            cv_text, _ = self.text_compactor.compact(cv_text)
+        
+        duplicate = None
+        if self.near_duplicates is not None:
+            signature = self.near_duplicates.signature(cv_text)
+            duplicate = self.near_duplicates.find_duplicate(cv_text, exclude=cv_id, signature=signature)
+            if duplicate and self.duplicate_action == "skip":
+                return f"Skipped {cv_id}: near-duplicate of {duplicate[0]} ({duplicate[1]:.0%} similar)"
+        
+        # Let LLM failures reach the queue so the job is retried with backoff
+        cv_data = self.cv_analyzer.extract_cv_information(cv_text, raise_errors=True)
+        
+        message = f"Successfully processed CV: {cv_id}"
+        if duplicate:
+            cv_data = dict(cv_data, near_duplicate_of={"cv_id": duplicate[0], "similarity": round(duplicate[1], 3)})
+            message += f" (near-duplicate of {duplicate[0]}, {duplicate[1]:.0%} similar)"
+        
+        self.cv_database.add_cv(cv_id, cv_data, cv_text=cv_text)
+        if self.near_duplicates is not None:
+            self.near_duplicates.add(cv_id, cv_text, signature=signature)
+        return message
+    
+    def _work(self, until_idle: bool):
+        while not self.stop_event.is_set():
+            job = self.job_queue.claim(self.worker_id)
+            if job is None:
+                if until_idle and not self.job_queue.has_unfinished():
+                    return
+                self.stop_event.wait(self.poll_interval)
+                continue
+            
+            with self._active_lock:
+                self._active_jobs.add(job["id"])
+            try:
+                self.process_job(job)
+            finally:
+                with self._active_lock:
+                    self._active_jobs.discard(job["id"])
+    
+    def _renew_leases(self):
+        interval = max(1.0, self.job_queue.lease_seconds / 3)
+        while not self.stop_event.wait(interval):
+            with self._active_lock:
+                job_ids = list(self._active_jobs)
+            for job_id in job_ids:
+                if not self.job_queue.heartbeat(job_id, self.worker_id):
+                    logger.warning(f"Lost the lease on job {job_id}")
+    
+    def run(self, watch_folders: Iterable[str] = (), until_idle: bool = False):
+        """Process jobs until stop() is called, or until the queue is drained with until_idle
+        
+        Watched folders are rescanned every poll_interval and new files are queued.
+        """
+        watch_folders = list(watch_folders)
+        logger.info(f"Worker {self.worker_id} started with {self.threads} threads")
+        
+        for folder_path in watch_folders:
+            self.scan_folder(folder_path)
+        
+        work_threads = [threading.Thread(target=self._work, args=(until_idle,), daemon=True,
+                                         name=f"ingestion-worker-{i}") for i in range(self.threads)]
+        lease_thread = threading.Thread(target=self._renew_leases, daemon=True, name="ingestion-worker-leases")
+        for thread in work_threads + [lease_thread]:
+            thread.start()
+        
+        try:
+            while any(thread.is_alive() for thread in work_threads):
+                if self.stop_event.wait(self.poll_interval):
+                    break
+                for folder_path in watch_folders:
+                    try:
+                        self.scan_folder(folder_path)
+                    except OSError as e:
+                        logger.error(f"Error scanning {folder_path}: {str(e)}")
+        finally:
+            # Let running jobs finish; anything interrupted harder is recovered through its lease
+            self.stop_event.set()
+            for thread in work_threads:
+                thread.join()
+            lease_thread.join()
+        
+        logger.info(f"Worker {self.worker_id} stopped")
+    
+    def stop(self):
+        """Ask the worker to stop after the jobs currently running"""
+        self.stop_event.set()
+
+def build_components(args: argparse.Namespace) -> Dict[str, Any]:
+    """Create the ingestion components from the command line and environment"""
+    api_key = os.getenv("LLM_API_KEY", "")
+    analysis_mode = os.getenv("ANALYSIS_MODE", "full")
+    if not api_key and analysis_mode != "fast":
+        raise SystemExit("No API key found. Please set LLM_API_KEY in .env file")
+    
+    cv_database = CVDatabase(db_path=args.database)
+    return {
+        "cv_processor": CVProcessor(ocr_enabled=True, ocr_workers=os.cpu_count() or 1,
+                                    cache_dir="data/cache/extraction"),
+        "cv_analyzer": CVAnalyzer(api_key=api_key, cache_dir="data/cache/analysis", mode=analysis_mode),
+        "cv_database": cv_database,
+        "text_compactor": TextCompactor(),
+        "near_duplicates": NearDuplicateIndex(cv_database,
+                                              threshold=float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.85"))),
+        "duplicate_action": os.getenv("NEAR_DUPLICATE_ACTION", "flag")
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queue", default="data/ingestion_queue.db", help="job queue database")
+    parser.add_argument("--database", default="data/cv_database.db", help="CV database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    enqueue_parser = subparsers.add_parser("enqueue", help="queue files, or every supported file in folders")
+    enqueue_parser.add_argument("paths", nargs="+")
+    
+    run_parser = subparsers.add_parser("run", help="process queued jobs")
+    run_parser.add_argument("--watch", action="append", default=[], metavar="FOLDER",
+                            help="queue new files appearing in this folder (repeatable)")
+    run_parser.add_argument("--threads", type=int, default=4, help="jobs processed concurrently")
+    run_parser.add_argument("--poll-interval", type=float, default=2.0)
+    run_parser.add_argument("--max-attempts", type=int, default=5)
+    run_parser.add_argument("--until-idle", action="store_true", help="exit once no jobs are pending or running")
+    
+    sync_parser = subparsers.add_parser("sync", help="ingest new and modified files in folders and drop deleted ones")
+    sync_parser.add_argument("folders", nargs="+")
+    sync_parser.add_argument("--manifest", default="data/ingestion_manifest.db", help="ingestion manifest database")
+    
+    subparsers.add_parser("status", help="show job counts and failed jobs")
+    subparsers.add_parser("retry-failed", help="queue failed jobs again")
+    args = parser.parse_args(argv)
+    
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    
+    job_queue = JobQueue(args.queue, max_attempts=getattr(args, "max_attempts", 5))
+    try:
+        if args.command == "enqueue":
+            added = 0
+            for path in args.paths:
+                file_paths = list_supported_files(path) if os.path.isdir(path) else [path]
+                added += sum(job_queue.enqueue(file_path) for file_path in file_paths)
+            print(f"Queued {added} new jobs")
+        elif args.command == "run":
+            worker = IngestionWorker(job_queue, **build_components(args),
+                                     threads=args.threads, poll_interval=args.poll_interval)
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(signum, lambda *_: worker.stop())
+            try:
+                worker.run(watch_folders=args.watch, until_idle=args.until_idle)
+            finally:
+                worker.cv_processor.close()
+                worker.cv_database.close()
+        elif args.command == "sync":
+            components = build_components(args)
+            manifest = IngestionManifest(args.manifest)
+            pipeline = IngestionPipeline(**components, manifest=manifest)
+            try:
+                for folder_path in args.folders:
+                    results = pipeline.sync_folder(folder_path)
+                    print(f"{folder_path}: {len(results)} changes")
+            finally:
+                manifest.close()
+                components["cv_processor"].close()
+                components["cv_database"].close()
+        elif args.command == "status":
+            for state, count in job_queue.counts().items():
+                print(f"{state:>8}: {count}")
+            for job in job_queue.list_jobs(FAILED):
+                print(f"failed after {job['attempts']} attempts: {job['file_path']}: {job['message']}")
+        elif args.command == "retry-failed":
+            print(f"Requeued {job_queue.retry_failed()} failed jobs")
+    finally:
+        job_queue.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
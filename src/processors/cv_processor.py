@@ -1,40 +1,94 @@
+import io
 import os
+import time
+import hashlib
 import logging
-import tempfile
-from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Dict, Any, List, Tuple
 
-# Document processing libraries
-import fitz  # PyMuPDF
-import docx2txt
-import pytesseract
-from PIL import Image
+# Local imports
+from src.cache.disk_cache import DiskCache
+from src.utils import metrics
+from src.utils.lazy import lazy_import
+
+# Document processing libraries, imported on first use to keep app startup fast
+fitz = lazy_import("fitz")  # PyMuPDF
+docx2txt = lazy_import("docx2txt")
+pytesseract = lazy_import("pytesseract")
+Image = lazy_import("PIL.Image")
 
 logger = logging.getLogger(__name__)
 
+EXTRACTION_CACHE = metrics.counter("cv_extraction_cache_total", "Extraction cache lookups by result")
+OCR_PAGES = metrics.counter("cv_ocr_pages_total", "Pages sent to OCR")
+OCR_PAGE_SECONDS = metrics.histogram("cv_ocr_page_seconds", "Time to render and OCR a single page, by stage")
+
+def _ocr_page_image(mode: str, size: Tuple[int, int], samples: bytes,
+                    tesseract_cmd: Optional[str] = None) -> str:
+    """OCR a raw page bitmap; runs in OCR pool worker processes"""
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    image = Image.frombytes(mode, size, samples)
+    return pytesseract.image_to_string(image)
+
+def _timed_ocr_page_image(mode: str, size: Tuple[int, int], samples: bytes,
+                          tesseract_cmd: Optional[str] = None) -> Tuple[str, float]:
+    """OCR a raw page bitmap and also return the OCR time, which pool workers cannot record themselves"""
+    start = time.perf_counter()
+    text = _ocr_page_image(mode, size, samples, tesseract_cmd)
+    return text, time.perf_counter() - start
+
 class CVProcessor:
     """Class to handle document processing and information extraction"""
     
-    def __init__(self, ocr_enabled: bool = True, tesseract_path: Optional[str] = None):
+    SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.doc')
+    
+    def __init__(self, ocr_enabled: bool = True, tesseract_path: Optional[str] = None,
+                 ocr_dpi: int = 300, ocr_workers: int = 1, min_page_chars: int = 100,
+                 cache_dir: Optional[str] = None, cache_max_bytes: int = 512 * 1024 * 1024):
         self.ocr_enabled = ocr_enabled
+        # Pages with fewer non-whitespace characters than this are treated as scanned
+        self.min_page_chars = min_page_chars
+        self.ocr_dpi = ocr_dpi
+        self.ocr_workers = max(1, ocr_workers)
+        self._ocr_pool = None
+        self._tesseract_version = None
         
         # Configure pytesseract path if provided
         if tesseract_path:
             pytesseract.pytesseract.tesseract_cmd = tesseract_path
+        
+        # Persistent cache of extracted text, keyed by file content and processor config
+        self.cache = DiskCache(cache_dir, max_bytes=cache_max_bytes) if cache_dir else None
     
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
-        """Extract text from PDF documents, with optional OCR for scanned documents"""
+    def extract_text_from_pdf(self, pdf_path: str, data: Optional[bytes] = None) -> str:
+        """Extract text from PDF documents, with optional OCR for scanned pages
+        
+        When data is given the PDF is read from memory and pdf_path is only used in log messages.
+        """
         try:
-            doc = fitz.open(pdf_path)
-            text = ""
+            doc = fitz.open(stream=data, filetype="pdf") if data is not None else fitz.open(pdf_path)
+            page_texts = []
+            
+            with metrics.span("cv_pdf_native_text"):
+                for page_num in range(len(doc)):
+                    page = doc.load_page(page_num)
+                    page_texts.append(page.get_text())
             
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                text += page.get_text()
+            text = "".join(page_texts)
             
-            # If text extraction yields little content and OCR is enabled, apply OCR
-            if len(text.strip()) < 100 and self.ocr_enabled:
-                logger.info(f"Applying OCR to {pdf_path} as limited text was extracted")
-                text = self._apply_ocr_to_pdf(doc)
+            # OCR only the pages whose text layer is empty or too thin
+            if self.ocr_enabled:
+                thin_pages = [page_num for page_num, page_text in enumerate(page_texts)
+                              if len(page_text.strip()) < self.min_page_chars]
+                
+                if thin_pages and len(thin_pages) == len(page_texts):
+                    logger.info(f"Applying OCR to {pdf_path} as limited text was extracted")
+                    text = self._apply_ocr_to_pdf(doc)
+                elif thin_pages:
+                    logger.info(f"Applying OCR to {len(thin_pages)} of {len(page_texts)} pages in {pdf_path}")
+                    text = self._merge_ocr_pages(doc, page_texts, thin_pages)
                 
             doc.close()
             return text
@@ -42,40 +96,174 @@ class CVProcessor:
             logger.error(f"Error extracting text from PDF {pdf_path}: {str(e)}")
             return ""
     
+    def _merge_ocr_pages(self, doc, page_texts: List[str], page_numbers: List[int]) -> str:
+        """OCR the given pages and merge them with the native text in page order"""
+        merged = list(page_texts)
+        for page_num, ocr_text in zip(page_numbers, self._ocr_pages(doc, page_numbers)):
+            # Keep the native text if OCR did not recover more content
+            if len(ocr_text.strip()) > len(merged[page_num].strip()):
+                merged[page_num] = ocr_text + "\n"
+        return "".join(merged)
+    
     def _apply_ocr_to_pdf(self, doc) -> str:
         """Apply OCR to PDF pages and extract text"""
         text = ""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                pix = page.get_pixmap(matrix=fitz.Matrix(300/72, 300/72))
-                image_path = os.path.join(temp_dir, f"page_{page_num}.png")
-                pix.save(image_path)
-                
-                # Apply OCR to the image
-                image = Image.open(image_path)
-                page_text = pytesseract.image_to_string(image)
-                text += page_text + "\n"
-                
+        for page_text in self._ocr_pages(doc, range(len(doc))):
+            text += page_text + "\n"
         return text
     
-    def extract_text_from_docx(self, docx_path: str) -> str:
-        """Extract text from Word documents"""
+    def _render_page(self, page) -> Tuple[str, Tuple[int, int], bytes]:
+        """Render a page to an in-memory grayscale bitmap for OCR"""
+        pix = page.get_pixmap(matrix=fitz.Matrix(self.ocr_dpi/72, self.ocr_dpi/72),
+                              colorspace=fitz.csGRAY, alpha=False)
+        return "L", (pix.width, pix.height), pix.samples
+    
+    def _render_page_timed(self, doc, page_num: int) -> Tuple[str, Tuple[int, int], bytes]:
+        start = time.perf_counter()
+        rendered = self._render_page(doc.load_page(page_num))
+        OCR_PAGE_SECONDS.observe(time.perf_counter() - start, stage="render")
+        return rendered
+    
+    def _ocr_pages(self, doc, page_numbers) -> List[str]:
+        """OCR the given pages, in parallel when ocr_workers > 1, keeping page order"""
+        tesseract_cmd = pytesseract.pytesseract.tesseract_cmd
+        
+        if self.ocr_workers <= 1:
+            ocr_results = self._ocr_pages_serial(doc, page_numbers, tesseract_cmd)
+        else:
+            try:
+                # Render in this process (fitz documents cannot be shared) and OCR in the pool
+                pool = self._get_ocr_pool()
+                futures = []
+                for page_num in page_numbers:
+                    mode, size, samples = self._render_page_timed(doc, page_num)
+                    futures.append(pool.submit(_timed_ocr_page_image, mode, size, samples, tesseract_cmd))
+                ocr_results = [future.result() for future in futures]
+            except BrokenProcessPool as e:
+                # A crashed worker, or an error that cannot be sent back, breaks the pool for good;
+                # drop it so the next document starts a fresh one, and OCR these pages here
+                logger.warning(f"OCR pool failed, retrying {len(page_numbers)} pages in this process: {str(e)}")
+                self._discard_ocr_pool()
+                ocr_results = self._ocr_pages_serial(doc, page_numbers, tesseract_cmd)
+        
+        for _, ocr_seconds in ocr_results:
+            OCR_PAGES.inc()
+            OCR_PAGE_SECONDS.observe(ocr_seconds, stage="ocr")
+        return [text for text, _ in ocr_results]
+    
+    def _ocr_pages_serial(self, doc, page_numbers, tesseract_cmd: Optional[str]) -> List[Tuple[str, float]]:
+        ocr_results = []
+        for page_num in page_numbers:
+            mode, size, samples = self._render_page_timed(doc, page_num)
+            ocr_results.append(_timed_ocr_page_image(mode, size, samples, tesseract_cmd))
+        return ocr_results
+    
+    def _discard_ocr_pool(self):
+        if self._ocr_pool is not None:
+            self._ocr_pool.shutdown(wait=False, cancel_futures=True)
+            self._ocr_pool = None
+    
+    def _get_ocr_pool(self):
+        """Create the OCR process pool on first use"""
+        if self._ocr_pool is None:
+            self._ocr_pool = ProcessPoolExecutor(max_workers=self.ocr_workers)
+        return self._ocr_pool
+    
+    def close(self):
+        """Shut down the OCR process pool if one was started"""
+        if self._ocr_pool is not None:
+            self._ocr_pool.shutdown()
+            self._ocr_pool = None
+    
+    def __getstate__(self):
+        # Process pools cannot be pickled; copies start their own pool on demand
+        state = self.__dict__.copy()
+        state["_ocr_pool"] = None
+        return state
+    
+    def extract_text_from_docx(self, docx_path: str, data: Optional[bytes] = None) -> str:
+        """Extract text from Word documents, read from memory when data is given"""
         try:
-            text = docx2txt.process(docx_path)
+            text = docx2txt.process(io.BytesIO(data) if data is not None else docx_path)
             return text
         except Exception as e:
             logger.error(f"Error extracting text from DOCX {docx_path}: {str(e)}")
             return ""
     
+    def _get_tesseract_version(self) -> str:
+        """Return the installed Tesseract version, resolved once per processor"""
+        if self._tesseract_version is None:
+            try:
+                self._tesseract_version = str(pytesseract.get_tesseract_version())
+            except Exception:
+                self._tesseract_version = "unavailable"
+        return self._tesseract_version
+    
+    def _cache_config(self) -> Dict[str, Any]:
+        """Processor settings that affect the extracted text"""
+        return {
+            "ocr_enabled": self.ocr_enabled,
+            "ocr_dpi": self.ocr_dpi,
+            "min_page_chars": self.min_page_chars,
+            "tesseract_version": self._get_tesseract_version() if self.ocr_enabled else None
+        }
+    
+    def _cache_key(self, file_path: str, file_extension: str, data: Optional[bytes] = None) -> str:
+        """Build a cache key from the file content hash and processor config"""
+        if data is not None:
+            content_hash = hashlib.sha256(data)
+        else:
+            content_hash = hashlib.sha256()
+            with open(file_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    content_hash.update(chunk)
+        return DiskCache.make_key("cv_text", content_hash.hexdigest(), file_extension, self._cache_config())
+    
     def process_document(self, file_path: str) -> str:
         """Process document based on file type"""
+        return self._process(file_path)
+    
+    def process_bytes(self, data: bytes, filename: str) -> str:
+        """Process an in-memory document, e.g. an upload, using filename for its type
+        
+        Gives the same result as process_document on a file with this content and
+        shares its cache entries, without writing anything to disk.
+        """
+        return self._process(filename, data)
+    
+    def _process(self, file_path: str, data: Optional[bytes] = None) -> str:
         _, file_extension = os.path.splitext(file_path)
+        file_extension = file_extension.lower()
         
-        if file_extension.lower() == '.pdf':
-            return self.extract_text_from_pdf(file_path)
-        elif file_extension.lower() in ['.docx', '.doc']:
-            return self.extract_text_from_docx(file_path)
-        else:
+        if file_extension not in self.SUPPORTED_EXTENSIONS:
             logger.warning(f"Unsupported file format: {file_extension}")
-            return ""
\ No newline at end of file
+            return ""
+        
+        with metrics.span("cv_process_document", format=file_extension.lstrip(".")) as attributes:
+            # Return previously extracted text for identical content without reopening the file
+            cache_key = None
+            if self.cache:
+                try:
+                    cache_key = self._cache_key(file_path, file_extension, data)
+                    cached_text = self.cache.get(cache_key)
+                    if cached_text is not None:
+                        logger.info(f"Using cached text for {file_path}")
+                        EXTRACTION_CACHE.inc(result="hit")
+                        attributes["cache_hit"] = True
+                        return cached_text
+                    EXTRACTION_CACHE.inc(result="miss")
+                except OSError as e:
+                    logger.warning(f"Error checking extraction cache for {file_path}: {str(e)}")
+            
+            if data is not None:
+                attributes["source"] = "memory"
+            
+            extract = self.extract_text_from_pdf if file_extension == '.pdf' else self.extract_text_from_docx
+            text = extract(file_path) if data is None else extract(file_path, data)
+            attributes["chars"] = len(text)
+            
+            # Only cache successful extractions so transient failures are retried
+            if cache_key and text:
+                self.cache.set(cache_key, text)
+            
+            return text
\ No newline at end of file
@@ -0,0 +1,174 @@
+import re
+import logging
+from collections import Counter
+from typing import Dict, List, Tuple
+
+# Local imports
+from src.utils.text import estimate_tokens, CHARS_PER_TOKEN
+
+logger = logging.getLogger(__name__)
+
+# Section headings recognised when splitting a CV for budget-aware truncation
+SECTION_HEADINGS = (
+    "summary", "profile", "objective", "experience", "work experience", "professional experience",
+    "employment", "education", "skills", "technical skills", "projects", "certifications",
+    "languages", "publications", "selected publications", "references", "hobbies", "interests",
+    "conferences", "talks", "presentations", "patents", "volunteering", "volunteer experience",
+    "awards", "honors", "memberships", "courses", "training",
+)
+
+# Sections trimmed first when a CV exceeds the token budget
+LOW_PRIORITY_SECTIONS = (
+    "publications", "selected publications", "references", "hobbies", "interests", "conferences",
+    "talks", "presentations", "patents", "volunteering", "volunteer experience", "memberships",
+)
+
+# "Page 2", "Page 2 of 3" and "2 of 3"; a bare number may be content, e.g. in a list of figures
+PAGE_NUMBER_PATTERN = re.compile(r"^(page\s*\d{1,3}(\s*(of|/)\s*\d{1,3})?|\d{1,3}\s*(of|/)\s*\d{1,3})$", re.IGNORECASE)
+HYPHENATION_PATTERN = re.compile(r"([a-z])-\n([a-z])")
+INLINE_WHITESPACE_PATTERN = re.compile(r"[ \t\u00a0\u2000-\u200b]+")
+CONTROL_CHARS_PATTERN = re.compile(r"[\x00-\x08\x0b\x0e-\x1f\x7f]")
+
+class TextCompactor:
+    """Normalize and compact extracted CV text before LLM analysis
+    
+    Removes repeated page headers/footers, page numbers, hyphenation breaks,
+    whitespace runs and OCR noise, then enforces a token budget by trimming
+    low-priority sections (publications, references, ...) before truncating.
+    """
+    
+    def __init__(self, token_budget: int = 6000, repeated_line_min_count: int = 3,
+                 max_repeated_line_chars: int = 80, low_priority_section_lines: int = 5,
+                 page_edge_lines: int = 2):
+        self.token_budget = token_budget
+        self.repeated_line_min_count = repeated_line_min_count
+        self.page_edge_lines = page_edge_lines
+        self.max_repeated_line_chars = max_repeated_line_chars
+        self.low_priority_section_lines = low_priority_section_lines
+    
+    def compact(self, text: str) -> Tuple[str, Dict[str, int]]:
+        """Return the compacted text and statistics about the characters and tokens saved"""
+        pages = [self._drop_noise_lines(lines) for lines in self._normalize_pages(text)]
+        pages = self._drop_repeated_lines(pages)
+        compacted = self._join_lines([line for page in pages for line in page])
+        
+        if estimate_tokens(compacted) > self.token_budget:
+            compacted = self._enforce_budget(compacted)
+        
+        original_tokens = estimate_tokens(text)
+        compacted_tokens = estimate_tokens(compacted)
+        stats = {
+            "original_chars": len(text),
+            "compacted_chars": len(compacted),
+            "chars_saved": len(text) - len(compacted),
+            "original_tokens": original_tokens,
+            "compacted_tokens": compacted_tokens,
+            "tokens_saved": original_tokens - compacted_tokens
+        }
+        return compacted, stats
+    
+    def _normalize_pages(self, text: str) -> List[List[str]]:
+        """Split the text into pages at form feeds and normalize the lines of each page"""
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+        text = CONTROL_CHARS_PATTERN.sub("", text)
+        # Re-join words broken across lines by hyphenation
+        text = HYPHENATION_PATTERN.sub(r"\1\2", text)
+        return [[INLINE_WHITESPACE_PATTERN.sub(" ", line).strip() for line in page.split("\n")]
+                for page in text.split("\f")]
+    
+    def _drop_noise_lines(self, lines: List[str]) -> List[str]:
+        kept = []
+        for line in lines:
+            if not line:
+                kept.append(line)
+                continue
+            if PAGE_NUMBER_PATTERN.match(line):
+                continue
+            # Separators have no letters or digits at all; OCR garbage is mostly non-ASCII symbols.
+            # ASCII punctuation is kept, as short skill lines such as "C++ / C# / .NET" are mostly symbols
+            if not any(char.isalnum() for char in line):
+                continue
+            ocr_symbols = sum(not char.isascii() and not char.isalnum() and not char.isspace() for char in line)
+            if len(line) >= 4 and ocr_symbols / len(line) > 0.5:
+                continue
+            kept.append(line)
+        return kept
+    
+    def _page_edges(self, page: List[str]) -> set:
+        """Return the positions of the first and last few non-blank lines of a page"""
+        filled = [position for position, line in enumerate(page) if line]
+        return set(filled[:self.page_edge_lines] + filled[-self.page_edge_lines:])
+    
+    def _drop_repeated_lines(self, pages: List[List[str]]) -> List[List[str]]:
+        """Keep only the first occurrence of page headers/footers
+        
+        A header or footer is a short line found among the first or last few lines
+        of several pages; the same line elsewhere on a page (a repeated job title or
+        company name) is content and is kept.
+        """
+        def candidate(line: str) -> bool:
+            # Labels such as "Responsibilities:" legitimately repeat within a CV
+            return 3 <= len(line) <= self.max_repeated_line_chars and not line.endswith(":")
+        
+        edges = [self._page_edges(page) for page in pages]
+        counts = Counter()
+        for page, page_edges in zip(pages, edges):
+            counts.update({page[position].lower() for position in page_edges if candidate(page[position])})
+        repeated = {line for line, count in counts.items() if count >= self.repeated_line_min_count}
+        
+        kept_pages = []
+        seen = set()
+        for page, page_edges in zip(pages, edges):
+            kept = []
+            for position, line in enumerate(page):
+                key = line.lower()
+                if position in page_edges and key in repeated:
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                kept.append(line)
+            kept_pages.append(kept)
+        return kept_pages
+    
+    @staticmethod
+    def _join_lines(lines: List[str]) -> str:
+        # Collapse runs of blank lines into one
+        text = "\n".join(lines)
+        return re.sub(r"\n{3,}", "\n\n", text).strip()
+    
+    @staticmethod
+    def _heading(line: str) -> str:
+        return line.lower().strip(" :-|#*").strip()
+    
+    def _enforce_budget(self, text: str) -> str:
+        """Trim, then drop, low-priority sections and finally truncate until the text fits the token budget"""
+        sections = []
+        current = {"heading": "", "lines": []}
+        for line in text.split("\n"):
+            if self._heading(line) in SECTION_HEADINGS:
+                sections.append(current)
+                current = {"heading": self._heading(line), "lines": [line]}
+            else:
+                current["lines"].append(line)
+        sections.append(current)
+        
+        for section in sections:
+            if section["heading"] in LOW_PRIORITY_SECTIONS:
+                # Keep the heading and the first few entries
+                limit = self.low_priority_section_lines + 1
+                omitted = len(section["lines"]) - limit
+                if omitted > 0:
+                    section["lines"] = section["lines"][:limit] + [f"[{omitted} more lines omitted]"]
+        
+        compacted = "\n".join(line for section in sections for line in section["lines"]).strip()
+        
+        # Drop low-priority sections entirely before cutting into the important ones
+        if estimate_tokens(compacted) > self.token_budget:
+            compacted = "\n".join(line for section in sections if section["heading"] not in LOW_PRIORITY_SECTIONS
+                                  for line in section["lines"]).strip()
+        
+        max_chars = self.token_budget * CHARS_PER_TOKEN
+        if estimate_tokens(compacted) > self.token_budget:
+            cut = compacted.rfind("\n", 0, max_chars)
+            compacted = compacted[:cut if cut > 0 else max_chars] + "\n[truncated]"
+        return compacted
\ No newline at end of file
@@ -0,0 +1,86 @@
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+def normalize_question(question: str) -> str:
+    """Normalize a question so trivially different phrasings share a cache entry"""
+    question = re.sub(r"\s+", " ", question).strip().lower()
+    return question.rstrip("?!. ")
+
+class AnswerCache:
+    """In-memory LRU cache of query answers with a time-to-live
+    
+    Keys combine the normalized question, the preceding conversation turns and
+    the database generation, so answers are reused only while both the
+    conversation context and the underlying CV data are unchanged.
+    """
+    
+    def __init__(self, max_entries: int = 1000, ttl: float = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(question: str, conversation: List[Dict[str, str]], generation: Any) -> str:
+        """Build a cache key for a question asked after the given conversation turns"""
+        payload = json.dumps([normalize_question(question), conversation, str(generation)])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached answer, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            answer, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return answer
+    
+    def set(self, key: str, answer: str):
+        """Store an answer, evicting the least recently used entries beyond max_entries"""
+        with self._lock:
+            self._entries[key] = (answer, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        """Remove all cached answers"""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the current number of entries"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries
+            }
\ No newline at end of file
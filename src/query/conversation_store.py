@@ -0,0 +1,74 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Dict
+
+logger = logging.getLogger(__name__)
+
+class ConversationStore:
+    """Conversation histories keyed by session ID with bounded memory
+    
+    Each session keeps at most max_messages messages. Sessions idle for longer
+    than idle_timeout seconds are dropped, and the least recently used
+    sessions are evicted once more than max_sessions are active.
+    """
+    
+    def __init__(self, max_sessions: int = 1000, max_messages: int = 10, idle_timeout: float = 3600):
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get_history(self, session_id: str) -> List[Dict[str, str]]:
+        """Return a copy of the session's conversation history"""
+        with self._lock:
+            session = self._touch(session_id, create=False)
+            return list(session["messages"]) if session else []
+    
+    def append(self, session_id: str, role: str, content: str):
+        """Add a message to the session, trimming old messages"""
+        with self._lock:
+            session = self._touch(session_id, create=True)
+            session["messages"].append({"role": role, "content": content})
+            # Keep conversation history manageable
+            if len(session["messages"]) > self.max_messages:
+                session["messages"] = session["messages"][-self.max_messages:]
+    
+    def clear(self, session_id: str):
+        """Remove a session's history"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+    
+    def session_count(self) -> int:
+        with self._lock:
+            self._evict_idle(time.monotonic())
+            return len(self._sessions)
+    
+    def _touch(self, session_id: str, create: bool):
+        now = time.monotonic()
+        self._evict_idle(now)
+        
+        session = self._sessions.get(session_id)
+        if session is None:
+            if not create:
+                return None
+            session = {"messages": [], "last_access": now}
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                evicted_id, _ = self._sessions.popitem(last=False)
+                logger.info(f"Evicted least recently used conversation {evicted_id}")
+        else:
+            session["last_access"] = now
+            self._sessions.move_to_end(session_id)
+        return session
+    
+    def _evict_idle(self, now: float):
+        # Sessions are ordered by last access, so idle ones are at the front
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session["last_access"] <= self.idle_timeout:
+                break
+            del self._sessions[session_id]
+            logger.info(f"Evicted idle conversation {session_id}")
\ No newline at end of file
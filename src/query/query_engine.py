@@ -1,56 +1,207 @@
 import json
+import time
 import logging
-from typing import List, Dict, Any
+import threading
+from collections import OrderedDict
+from types import SimpleNamespace
+from typing import List, Dict, Any, Tuple, Optional, Union, Iterator
 
-# LLM integration
-import google.generativeai as genai
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 # Local imports
 from src.database.cv_database import CVDatabase
+from src.llm.providers import LLMProvider, create_provider, record_llm_usage
+from src.query.retriever import CVRetriever
+from src.query.conversation_store import ConversationStore
+from src.query.answer_cache import AnswerCache
+from src.utils import metrics
 
 logger = logging.getLogger(__name__)
 
+QUERY_CACHE = metrics.counter("cv_query_cache_total", "Answer cache lookups by result")
+QUERY_FIRST_CHUNK_SECONDS = metrics.histogram("cv_query_first_chunk_seconds",
+                                              "Time until the first answer chunk of a streamed query")
+QUERY_CONTEXT_CVS = metrics.histogram("cv_query_context_cvs", "CVs included in the query context",
+                                      buckets=(1, 5, 10, 20, 50, 100, 500, 1000, 10000))
+
+# Session used by callers that do not track sessions themselves
+DEFAULT_SESSION = "default"
+
+ERROR_RESPONSE = "I'm sorry, I encountered an error while processing your query. Please try again."
+
 class CVQueryEngine:
     """Class to handle natural language queries about CVs"""
     
-    def __init__(self, cv_database: CVDatabase, api_key: str, provider: str = "gemini"):
+    def __init__(self, cv_database: CVDatabase, api_key: str, provider: Union[str, LLMProvider] = "gemini",
+                 top_k: int = 20, context_token_budget: int = 30000,
+                 max_sessions: int = 1000, session_idle_timeout: float = 3600,
+                 answer_cache_size: int = 1000, answer_cache_ttl: float = 3600):
         self.cv_database = cv_database
-        self.provider = provider.lower()
-        self.conversation_history = []
         
-        if self.provider == "gemini":
-            genai.configure(api_key=api_key)
-            self.model = genai.GenerativeModel('gemini-1.5-pro')
-        else:
-            raise ValueError(f"Unsupported LLM provider: {provider}")
+        # A provider instance can be passed directly, e.g. a MockLLMProvider for load tests
+        self.llm = provider if isinstance(provider, LLMProvider) else create_provider(provider, api_key)
+        self.provider = self.llm.name
+        
+        # Conversation state per user session
+        self.conversations = ConversationStore(max_sessions=max_sessions, max_messages=10,
+                                               idle_timeout=session_idle_timeout)
+        
+        # Retrieval settings used once the database no longer fits in the prompt
+        self.retriever = CVRetriever(cv_database)
+        self.top_k = top_k
+        self.context_token_budget = context_token_budget
+        
+        # Answers to repeated questions, valid until the CV data changes
+        self.answer_cache = AnswerCache(max_entries=answer_cache_size, ttl=answer_cache_ttl)
+        
+        # LLM usage accounting, for the last question of each session and cumulative
+        self.max_sessions = max_sessions
+        self._query_stats = OrderedDict()
+        self.usage_stats = {"queries": 0, "cache_hits": 0, "llm_calls": 0, "prompt_tokens": 0, "response_tokens": 0}
+        self._stats_lock = threading.Lock()
     
-    def add_to_conversation(self, role: str, content: str):
+    @property
+    def conversation_history(self) -> List[Dict[str, str]]:
+        """Conversation history of the default session"""
+        return self.conversations.get_history(DEFAULT_SESSION)
+    
+    def get_conversation(self, session_id: str = DEFAULT_SESSION) -> List[Dict[str, str]]:
+        """Get the conversation history of a session"""
+        return self.conversations.get_history(session_id)
+    
+    def add_to_conversation(self, role: str, content: str, session_id: str = DEFAULT_SESSION):
         """Add message to conversation history"""
-        self.conversation_history.append({"role": role, "content": content})
-        # Keep conversation history manageable
-        if len(self.conversation_history) > 10:
-            self.conversation_history = self.conversation_history[-10:]
+        self.conversations.append(session_id, role, content)
     
-    def clear_conversation(self):
+    def clear_conversation(self, session_id: str = DEFAULT_SESSION):
         """Clear the conversation history"""
-        self.conversation_history = []
+        self.conversations.clear(session_id)
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
-    def query(self, user_query: str) -> str:
-        """Process natural language query about CVs"""
-        # Add user query to conversation history
-        self.add_to_conversation("user", user_query)
+    def get_query_stats(self, session_id: str = DEFAULT_SESSION) -> Dict[str, Any]:
+        """LLM calls, tokens and latency of the last question asked in a session"""
+        with self._stats_lock:
+            return dict(self._query_stats.get(session_id, {}))
+    
+    def _set_query_stats(self, session_id: str, stats: Dict[str, Any]):
+        # Called with the stats lock held; keeps as many sessions as the conversation store
+        self._query_stats[session_id] = stats
+        self._query_stats.move_to_end(session_id)
+        while len(self._query_stats) > self.max_sessions:
+            self._query_stats.popitem(last=False)
+    
+    def _build_chat_history(self, system_prompt: str, conversation: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        """Convert the system prompt and completed conversation turns to Gemini chat history"""
+        history = [
+            {"role": "user", "parts": [system_prompt]},
+            {"role": "model", "parts": ["Understood. I will answer questions using only this CV data."]}
+        ]
+        
+        # The current question is the last entry; only replay answered turns before it
+        previous = conversation[:-1]
+        for question, answer in zip(previous, previous[1:]):
+            if question["role"] == "user" and answer["role"] == "assistant":
+                history.append({"role": "user", "parts": [question["content"]]})
+                history.append({"role": "model", "parts": [answer["content"]]})
+        return history
+    
+    def _record_usage(self, session_id: str, history: List[Dict[str, Any]], user_query: str, response,
+                      latency: float, **extra_stats):
+        """Record LLM calls and tokens for the session's last question"""
+        prompt_text = "".join(part for turn in history for part in turn["parts"]) + user_query
+        prompt_tokens, response_tokens = record_llm_usage("query", prompt_text, response)
+        
+        with self._stats_lock:
+            self._set_query_stats(session_id, {
+                "llm_calls": 1,
+                "prompt_tokens": prompt_tokens,
+                "response_tokens": response_tokens,
+                "latency_seconds": latency,
+                "cache_hit": False,
+                **extra_stats
+            })
+            self.usage_stats["queries"] += 1
+            self.usage_stats["llm_calls"] += 1
+            self.usage_stats["prompt_tokens"] += prompt_tokens
+            self.usage_stats["response_tokens"] += response_tokens
+        logger.info(f"Query used 1 LLM call, {prompt_tokens} prompt tokens, "
+                    f"{response_tokens} response tokens in {latency:.2f}s")
+    
+    def _lookup_cached_answer(self, user_query: str, session_id: str) -> Tuple[str, Optional[str]]:
+        """Return the answer cache key for the question and the cached answer, if any"""
+        conversation = self.conversations.get_history(session_id)
+        cache_key = AnswerCache.make_key(user_query, conversation, self.cv_database.generation)
+        cached_answer = self.answer_cache.get(cache_key)
+        QUERY_CACHE.inc(result="miss" if cached_answer is None else "hit")
+        
+        if cached_answer is not None:
+            self.add_to_conversation("user", user_query, session_id)
+            self.add_to_conversation("assistant", cached_answer, session_id)
+            with self._stats_lock:
+                self._set_query_stats(session_id, {
+                    "llm_calls": 0,
+                    "prompt_tokens": 0,
+                    "response_tokens": 0,
+                    "latency_seconds": 0.0,
+                    "cache_hit": True
+                })
+                self.usage_stats["queries"] += 1
+                self.usage_stats["cache_hits"] += 1
+            logger.info("Answered query from cache")
         
-        # Prepare CV data for context
+        return cache_key, cached_answer
+    
+    def _build_cv_context(self, conversation: List[Dict[str, str]]) -> Tuple[str, int, int]:
+        """Select CV records for the prompt within the token budget
+        
+        Returns the JSON context, the number of CVs included and the total number of CVs.
+        """
         cv_data = self.cv_database.get_all_cvs()
-        cv_context = json.dumps(cv_data, indent=2)
+        if self.retriever.total_context_tokens() <= self.context_token_budget:
+            return json.dumps(cv_data, indent=2), len(cv_data), len(cv_data)
+        
+        # Recent user turns keep the subject of follow-up questions in the retrieval query
+        user_messages = [msg["content"] for msg in conversation if msg["role"] == "user"]
+        retrieval_query = " ".join(user_messages[-2:])
+        
+        ranked_ids = [cv_id for cv_id, _ in self.retriever.search(retrieval_query, top_k=self.top_k)]
+        if not ranked_ids:
+            # Nothing matched the question, so show a sample of the database instead
+            ranked_ids = list(cv_data)[:self.top_k]
+        
+        selected = {}
+        used_tokens = 0
+        for cv_id in ranked_ids:
+            if cv_id not in cv_data:
+                continue
+            cv_tokens = self.retriever.context_tokens(cv_id)
+            if used_tokens + cv_tokens > self.context_token_budget:
+                continue
+            selected[cv_id] = cv_data[cv_id]
+            used_tokens += cv_tokens
+        
+        logger.info(f"Selected {len(selected)} of {len(cv_data)} CVs (~{used_tokens} tokens) for query context")
+        return json.dumps(selected, indent=2), len(selected), len(cv_data)
+    
+    def _prepare_chat(self, user_query: str, session_id: str) -> List[Dict[str, Any]]:
+        """Record the question and build the chat history that carries the CV context"""
+        # Add user query to conversation history
+        self.add_to_conversation("user", user_query, session_id)
+        conversation = self.conversations.get_history(session_id)
+        
+        # Prepare the most relevant CV data for context
+        cv_context, included_count, total_count = self._build_cv_context(conversation)
+        QUERY_CONTEXT_CVS.observe(included_count)
+        subset_note = ""
+        if included_count < total_count:
+            subset_note = (f"This is the subset of {included_count} out of {total_count} CVs in the database "
+                           f"that is most relevant to the question.")
         
         # Create system prompt with context
         system_prompt = f"""
         You are a CV analysis assistant. You have access to the following CV data:
         {cv_context}
-
+        {subset_note}
+        
         Answer questions about this CV data accurately and concisely. You can:
         1. Find candidates with specific skills
         2. Compare education levels
@@ -61,27 +212,119 @@ class CVQueryEngine:
         Only use the information provided in the CV data. If the information is not available, say so.
         """
         
+        # Carry the system prompt and previous turns as chat history so the
+        # question costs a single model round trip
+        return self._build_chat_history(system_prompt, conversation)
+    
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10), reraise=True,
+           before_sleep=metrics.record_retry("query"))
+    def _send_chat(self, history: List[Dict[str, Any]], user_query: str):
+        """Send the question to the LLM, retrying failed calls"""
+        with metrics.span("llm_request", operation="query"):
+            return self.llm.chat(history, user_query)
+    
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10), reraise=True,
+           before_sleep=metrics.record_retry("query"))
+    async def _send_chat_async(self, history: List[Dict[str, Any]], user_query: str):
+        with metrics.span("llm_request", operation="query"):
+            return await self.llm.chat_async(history, user_query)
+    
+    def query(self, user_query: str, session_id: str = DEFAULT_SESSION) -> str:
+        """Process natural language query about CVs"""
+        with metrics.span("cv_query"):
+            return self._query(user_query, session_id)
+    
+    def _query(self, user_query: str, session_id: str) -> str:
         try:
-            # Format conversation history for Gemini
-            chat = self.model.start_chat(history=[])
+            cache_key, cached_answer = self._lookup_cached_answer(user_query, session_id)
+            if cached_answer is not None:
+                return cached_answer
             
-            # Add system prompt as first message
-            chat.send_message(system_prompt)
+            with metrics.span("cv_query_prepare"):
+                history = self._prepare_chat(user_query, session_id)
             
-            # Add conversation history
-            for msg in self.conversation_history:
-                if msg["role"] == "user":
-                    chat.send_message(msg["content"])
-                # Skip assistant messages as they're already in the chat history
-            
-            # Send the latest query and get response
-            response = chat.send_message(user_query)
+            start_time = time.perf_counter()
+            response = self._send_chat(history, user_query)
             result = response.text
             
+            self._record_usage(session_id, history, user_query, response, time.perf_counter() - start_time)
+            self.answer_cache.set(cache_key, result)
+            
             # Add response to conversation history
-            self.add_to_conversation("assistant", result)
+            self.add_to_conversation("assistant", result, session_id)
             return result
+        
+        except Exception as e:
+            logger.error(f"Error processing query: {str(e)}")
+            return ERROR_RESPONSE
+    
+    async def query_async(self, user_query: str, session_id: str = DEFAULT_SESSION) -> str:
+        """Process a query without blocking the event loop while the model responds"""
+        with metrics.span("cv_query"):
+            return await self._query_async(user_query, session_id)
+    
+    async def _query_async(self, user_query: str, session_id: str) -> str:
+        try:
+            cache_key, cached_answer = self._lookup_cached_answer(user_query, session_id)
+            if cached_answer is not None:
+                return cached_answer
+            
+            with metrics.span("cv_query_prepare"):
+                history = self._prepare_chat(user_query, session_id)
+            
+            start_time = time.perf_counter()
+            response = await self._send_chat_async(history, user_query)
+            result = response.text
             
+            self._record_usage(session_id, history, user_query, response, time.perf_counter() - start_time)
+            self.answer_cache.set(cache_key, result)
+            
+            # Add response to conversation history
+            self.add_to_conversation("assistant", result, session_id)
+            return result
+        
         except Exception as e:
             logger.error(f"Error processing query: {str(e)}")
-            return "I'm sorry, I encountered an error while processing your query. Please try again."
\ No newline at end of file
+            return ERROR_RESPONSE
+    
+    def query_stream(self, user_query: str, session_id: str = DEFAULT_SESSION) -> Iterator[str]:
+        """Process a query, yielding the answer in chunks as the model produces them
+        
+        The complete answer is added to the conversation history and the answer
+        cache once the stream finishes. Cached answers arrive as a single chunk.
+        Streams are not retried, since part of the answer may already be shown.
+        """
+        with metrics.span("cv_query", stream=True):
+            cache_key, cached_answer = self._lookup_cached_answer(user_query, session_id)
+            if cached_answer is not None:
+                yield cached_answer
+                return
+            
+            chunks = []
+            try:
+                with metrics.span("cv_query_prepare"):
+                    history = self._prepare_chat(user_query, session_id)
+                
+                start_time = time.perf_counter()
+                first_chunk_seconds = None
+                with metrics.span("llm_request", operation="query_stream"):
+                    for chunk in self.llm.chat_stream(history, user_query):
+                        if not chunk:
+                            continue
+                        if first_chunk_seconds is None:
+                            first_chunk_seconds = time.perf_counter() - start_time
+                            QUERY_FIRST_CHUNK_SECONDS.observe(first_chunk_seconds)
+                        chunks.append(chunk)
+                        yield chunk
+            except Exception as e:
+                logger.error(f"Error processing query: {str(e)}")
+                yield ERROR_RESPONSE if not chunks else "\n\n" + ERROR_RESPONSE
+                return
+            
+            result = "".join(chunks)
+            self._record_usage(session_id, history, user_query, SimpleNamespace(text=result),
+                               time.perf_counter() - start_time, first_chunk_seconds=first_chunk_seconds)
+            self.answer_cache.set(cache_key, result)
+            
+            # Add the complete response to conversation history
+            self.add_to_conversation("assistant", result, session_id)
\ No newline at end of file
@@ -0,0 +1,310 @@
+import re
+import time
+import math
+import logging
+import threading
+from datetime import date
+from typing import Dict, Any, List, Optional
+
+# Local imports
+from src.database.cv_database import CVDatabase
+from src.database.cv_index import normalize_value
+from src.analyzers.rule_extractor import DEFAULT_SKILL_LEXICON, SkillMatcher
+from src.query.retriever import tokenize
+from src.utils.lazy import lazy_import
+
+# Only needed once the first ranking builds the feature matrices
+np = lazy_import("numpy")
+sp = lazy_import("scipy.sparse")
+
+logger = logging.getLogger(__name__)
+
+FEATURES = ("skills", "titles", "education", "experience")
+DEFAULT_WEIGHTS = {"skills": 0.5, "titles": 0.2, "education": 0.15, "experience": 0.15}
+
+# Highest matching level wins; 0 means no degree recognised
+EDUCATION_LEVELS = (
+    (4, re.compile(r"\b(ph\.?\s?d|doctor(ate)?|d\.?phil)\b")),
+    (3, re.compile(r"\b(master'?s?|msc|m\.sc|m\.s|mba|m\.eng|meng|m\.tech|mtech|ma)\b")),
+    (2, re.compile(r"\b(bachelor'?s?|bsc|b\.sc|b\.s|ba|b\.a|b\.eng|beng|b\.tech|btech|undergraduate)\b")),
+    (1, re.compile(r"\b(associate'?s?|diploma|certificate|hnd)\b")),
+)
+EDUCATION_LEVEL_NAMES = {0: "none", 1: "associate", 2: "bachelor", 3: "master", 4: "doctorate"}
+
+YEARS_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*\+?\s*(?:years?|yrs?)")
+MONTHS_PATTERN = re.compile(r"(\d+)\s*(?:months?|mos?)")
+YEAR_RANGE_PATTERN = re.compile(r"((?:19|20)\d{2})\s*(?:-|–|to)\s*((?:19|20)\d{2}|present|current|now|today)")
+REQUIRED_YEARS_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*\+?\s*(?:years?|yrs?)(?:\s+of)?(?:\s+\w+){0,3}\s+experience")
+
+def education_level(text: str) -> int:
+    """Ordinal education level mentioned in a text, 0 if none"""
+    text = text.lower()
+    for level, pattern in EDUCATION_LEVELS:
+        if pattern.search(text):
+            return level
+    return 0
+
+def duration_years(duration: str) -> float:
+    """Estimate the years covered by a duration such as "3 years", "18 months" or "2019 - present" """
+    duration = duration.lower()
+    match = YEARS_PATTERN.search(duration)
+    if match:
+        return float(match.group(1))
+    match = MONTHS_PATTERN.search(duration)
+    if match:
+        return int(match.group(1)) / 12
+    match = YEAR_RANGE_PATTERN.search(duration)
+    if match:
+        end = date.today().year if not match.group(2)[0].isdigit() else int(match.group(2))
+        return max(0.0, end - int(match.group(1)))
+    return 0.0
+
+def estimate_experience_years(cv_data: Dict[str, Any]) -> float:
+    """Sum the durations of all listed positions"""
+    total = 0.0
+    for job in cv_data.get("work_experience") or []:
+        if isinstance(job, dict):
+            total += duration_years(str(job.get("duration") or ""))
+    return total
+
+def parse_job_description(job_description: str,
+                          skill_matcher: Optional[SkillMatcher] = None) -> Dict[str, Any]:
+    """Extract the rankable requirements from a job description"""
+    text = job_description.lower()
+    matcher = skill_matcher or SkillMatcher(DEFAULT_SKILL_LEXICON)
+    years = [float(match) for match in REQUIRED_YEARS_PATTERN.findall(text)]
+    return {
+        "skills": matcher.find_skills(job_description),
+        "title_terms": tokenize(job_description),
+        "education_level": education_level(text),
+        "min_years": min(years) if years else 0.0
+    }
+
+class CandidateRanker:
+    """Vectorized ranking of candidates in a CVDatabase against a job description
+    
+    The structured records are turned into a sparse candidate x skill matrix,
+    a TF-IDF candidate x title-term matrix and dense education level and
+    experience vectors. These are rebuilt lazily after the database changes.
+    A ranking is then a couple of sparse matrix-vector products plus a
+    partial sort, so it stays fast at 100k candidates.
+    """
+    
+    def __init__(self, cv_database: CVDatabase, weights: Optional[Dict[str, float]] = None,
+                 skill_lexicon: Optional[Dict[str, str]] = None):
+        self.cv_database = cv_database
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        unknown = set(self.weights) - set(FEATURES)
+        if unknown:
+            raise ValueError(f"Unknown ranking features: {sorted(unknown)}")
+        
+        self.skill_lexicon = skill_lexicon or DEFAULT_SKILL_LEXICON
+        self._dirty = True
+        self._lock = threading.RLock()
+        
+        cv_database.add_listener(self._on_database_change)
+    
+    def _on_database_change(self, event: str, cv_id: Optional[str], cv_data: Optional[Dict[str, Any]]):
+        self._dirty = True
+    
+    def _canonical_skill(self, skill: str) -> str:
+        normalized = normalize_value(skill)
+        return self.skill_lexicon.get(normalized, skill.strip())
+    
+    def _build(self):
+        """Build the feature matrices from the current database contents"""
+        start = time.perf_counter()
+        # A copy, as ingestion threads may add CVs while the matrices are built
+        records = self.cv_database.snapshot_cvs()
+        self._dirty = False
+        
+        # Rows follow CV ID order, which breaks ties between equal scores
+        cv_ids = sorted(records)
+        skill_vocabulary = {}
+        skill_names = []
+        title_vocabulary = {}
+        skill_rows, skill_cols = [], []
+        title_rows, title_cols, title_counts = [], [], []
+        years = np.zeros(len(cv_ids), dtype=np.float32)
+        levels = np.zeros(len(cv_ids), dtype=np.int8)
+        
+        for row, cv_id in enumerate(cv_ids):
+            cv_data = records[cv_id]
+            
+            skills = (cv_data.get("skills") or {}).get("technical") or []
+            columns = set()
+            for skill in skills:
+                if not isinstance(skill, str) or not skill.strip():
+                    continue
+                canonical = self._canonical_skill(skill)
+                key = canonical.lower()
+                if key not in skill_vocabulary:
+                    skill_vocabulary[key] = len(skill_names)
+                    skill_names.append(canonical)
+                columns.add(skill_vocabulary[key])
+            skill_rows.extend([row] * len(columns))
+            skill_cols.extend(columns)
+            
+            term_counts = {}
+            for job in cv_data.get("work_experience") or []:
+                if isinstance(job, dict) and job.get("title"):
+                    for term in tokenize(str(job["title"])):
+                        column = title_vocabulary.setdefault(term, len(title_vocabulary))
+                        term_counts[column] = term_counts.get(column, 0) + 1
+            title_rows.extend([row] * len(term_counts))
+            title_cols.extend(term_counts)
+            title_counts.extend(term_counts.values())
+            
+            years[row] = estimate_experience_years(cv_data)
+            levels[row] = max((education_level(f"{education.get('degree') or ''} {education.get('field') or ''}")
+                               for education in cv_data.get("education") or [] if isinstance(education, dict)),
+                              default=0)
+        
+        skill_matrix = sp.csr_matrix((np.ones(len(skill_rows), dtype=np.float32), (skill_rows, skill_cols)),
+                                     shape=(len(cv_ids), len(skill_names)))
+        
+        # TF-IDF over title terms, rows L2-normalized so a dot product is a cosine similarity
+        title_matrix = sp.csr_matrix((np.array(title_counts, dtype=np.float32), (title_rows, title_cols)),
+                                     shape=(len(cv_ids), len(title_vocabulary)))
+        document_frequency = np.bincount(title_matrix.indices, minlength=len(title_vocabulary))
+        title_idf = (np.log((1 + len(cv_ids)) / (1 + document_frequency)) + 1).astype(np.float32)
+        title_matrix = title_matrix @ sp.diags(title_idf)
+        norms = np.sqrt(np.asarray(title_matrix.multiply(title_matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        title_matrix = sp.csr_matrix(sp.diags(1 / norms) @ title_matrix)
+        
+        skill_document_frequency = np.bincount(skill_matrix.indices, minlength=len(skill_names))
+        self._skill_idf = np.log((1 + len(cv_ids)) / (1 + skill_document_frequency)) + 1
+        self._cv_ids = cv_ids
+        self._rows = {cv_id: row for row, cv_id in enumerate(cv_ids)}
+        self._skill_vocabulary = skill_vocabulary
+        self._skill_names = skill_names
+        self._skill_matrix = skill_matrix
+        self._title_vocabulary = title_vocabulary
+        self._title_idf = title_idf
+        self._title_matrix = title_matrix
+        self._years = years
+        self._levels = levels
+        
+        # Recognise skills from both the lexicon and the candidates' own skill lists
+        lexicon = dict(self.skill_lexicon)
+        lexicon.update({key: name for key, name in zip(skill_vocabulary, skill_names) if key not in lexicon})
+        self._skill_matcher = SkillMatcher(lexicon)
+        
+        logger.info(f"Built ranking features for {len(cv_ids)} CVs in {time.perf_counter() - start:.2f}s "
+                    f"({len(skill_names)} skills, {len(title_vocabulary)} title terms)")
+    
+    def _sync(self):
+        with self._lock:
+            if self._dirty:
+                self._build()
+    
+    def parse_job_description(self, job_description: str) -> Dict[str, Any]:
+        """Extract requirements using the skills known to the ranker"""
+        self._sync()
+        return parse_job_description(job_description, self._skill_matcher)
+    
+    def rank(self, job_description: str, top_k: int = 10, filters: Optional[Dict[str, Any]] = None,
+             requirements: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Return the top_k candidates for a job description, best first
+        
+        Each result holds the cv_id, the total score in [0, 1], the weighted
+        contribution of every feature, the matched skills, the estimated years
+        of experience and the education level. filters is a structured CVIndex
+        filter restricting the candidates; requirements overrides the values
+        parsed from the job description.
+        """
+        with self._lock:
+            self._sync()
+            requirements = dict(self.parse_job_description(job_description), **(requirements or {}))
+            feature_scores = self._score_features(requirements)
+            
+            active = {feature: self.weights[feature] for feature, scores in feature_scores.items()
+                      if scores is not None and self.weights[feature] > 0}
+            total_weight = sum(active.values())
+            if not total_weight or not self._cv_ids:
+                logger.info("Nothing to rank: no candidates or no recognised requirements")
+                return []
+            
+            scores = np.zeros(len(self._cv_ids), dtype=np.float32)
+            for feature, weight in active.items():
+                scores += (weight / total_weight) * feature_scores[feature]
+            
+            if filters is not None:
+                mask = np.zeros(len(self._cv_ids), dtype=bool)
+                rows = [self._rows[cv_id] for cv_id in self.cv_database.find_cv_ids(filters) if cv_id in self._rows]
+                mask[rows] = True
+                scores = np.where(mask, scores, -1)
+            
+            top_rows = self._top_rows(scores, top_k)
+            return [self._explain(row, scores, feature_scores, active, total_weight, requirements)
+                    for row in top_rows]
+    
+    def _score_features(self, requirements: Dict[str, Any]) -> Dict[str, "Optional[np.ndarray]"]:
+        """Score every candidate on every feature with a requirement, each in [0, 1]"""
+        feature_scores = dict.fromkeys(FEATURES)
+        
+        # Share of the required skills a candidate has, rarer skills weighing more
+        columns = sorted({self._skill_vocabulary[skill.lower()] for skill in requirements.get("skills") or []
+                          if skill.lower() in self._skill_vocabulary})
+        required_skills = len({skill.lower() for skill in requirements.get("skills") or []})
+        if required_skills:
+            query = np.zeros(len(self._skill_names), dtype=np.float32)
+            query[columns] = self._skill_idf[columns]
+            # Required skills nobody has still count against every candidate
+            missing_weight = (required_skills - len(columns)) * (math.log(1 + len(self._cv_ids)) + 1)
+            total = query.sum() + missing_weight
+            feature_scores["skills"] = self._skill_matrix @ (query / total) if total else None
+        
+        title_columns = {}
+        for term in requirements.get("title_terms") or []:
+            column = self._title_vocabulary.get(term)
+            if column is not None:
+                title_columns[column] = title_columns.get(column, 0) + 1
+        if title_columns:
+            query = np.zeros(len(self._title_vocabulary), dtype=np.float32)
+            for column, count in title_columns.items():
+                query[column] = count * self._title_idf[column]
+            feature_scores["titles"] = self._title_matrix @ (query / np.linalg.norm(query))
+        
+        required_level = requirements.get("education_level") or 0
+        if required_level:
+            feature_scores["education"] = np.minimum(1.0, self._levels / required_level).astype(np.float32)
+        
+        min_years = requirements.get("min_years") or 0
+        if min_years:
+            feature_scores["experience"] = np.minimum(1.0, self._years / min_years).astype(np.float32)
+        
+        return feature_scores
+    
+    def _top_rows(self, scores: "np.ndarray", top_k: int) -> List[int]:
+        """Rows of the top_k scores via a partial sort, ties broken by CV ID"""
+        candidates = int((scores >= 0).sum())
+        top_k = min(top_k, candidates)
+        if top_k <= 0:
+            return []
+        # Everything above the k-th best score, then the lowest rows (CV IDs) among those tied with it
+        kth_score = -np.partition(-scores, top_k - 1)[top_k - 1]
+        above = np.flatnonzero(scores > kth_score)
+        tied = np.flatnonzero(scores == kth_score)[:top_k - len(above)]
+        rows = np.concatenate([above, tied])
+        return rows[np.argsort(-scores[rows], kind="stable")].tolist()
+    
+    def _explain(self, row: int, scores: "np.ndarray", feature_scores: Dict[str, "Optional[np.ndarray]"],
+                 active: Dict[str, float], total_weight: float, requirements: Dict[str, Any]) -> Dict[str, Any]:
+        required = {skill.lower() for skill in requirements.get("skills") or []}
+        start, end = self._skill_matrix.indptr[row], self._skill_matrix.indptr[row + 1]
+        candidate_columns = self._skill_matrix.indices[start:end]
+        matched = sorted(self._skill_names[column] for column in candidate_columns
+                         if self._skill_names[column].lower() in required)
+        return {
+            "cv_id": self._cv_ids[row],
+            "score": round(float(scores[row]), 4),
+            "contributions": {feature: round(float(weight / total_weight * feature_scores[feature][row]), 4)
+                              for feature, weight in active.items()},
+            "matched_skills": matched,
+            "missing_skills": sorted(skill for skill in requirements.get("skills") or []
+                                     if skill.lower() not in {name.lower() for name in matched}),
+            "years_experience": round(float(self._years[row]), 1),
+            "education_level": EDUCATION_LEVEL_NAMES[int(self._levels[row])]
+        }
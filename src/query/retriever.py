@@ -0,0 +1,152 @@
+import re
+import json
+import math
+import heapq
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Any, List, Tuple, Optional
+
+# Local imports
+from src.database.cv_database import CVDatabase
+from src.utils.text import estimate_tokens
+from src.utils.lazy import lazy_import
+
+# scikit-learn takes most of a second to import and only provides the stop word list here
+sklearn_text = lazy_import("sklearn.feature_extraction.text")
+
+logger = logging.getLogger(__name__)
+
+# Keeps technology names such as "c++", "c#" and "node.js" as single tokens
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lower-cased search terms without stop words"""
+    stop_words = sklearn_text.ENGLISH_STOP_WORDS
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        token = token.rstrip(".")
+        if token and token not in stop_words:
+            tokens.append(token)
+    return tokens
+
+def flatten_cv(cv_data: Any) -> str:
+    """Concatenate all string values of a CV record"""
+    if isinstance(cv_data, dict):
+        return " ".join(flatten_cv(value) for value in cv_data.values())
+    if isinstance(cv_data, list):
+        return " ".join(flatten_cv(value) for value in cv_data)
+    if cv_data is None:
+        return ""
+    return str(cv_data)
+
+class CVRetriever:
+    """Incremental BM25 index over CV records used to select prompt context
+    
+    The index is built lazily from the database on first use and then kept
+    in sync through database change notifications.
+    """
+    
+    def __init__(self, cv_database: CVDatabase, k1: float = 1.5, b: float = 0.75):
+        self.cv_database = cv_database
+        self.k1 = k1
+        self.b = b
+        self._postings = {}
+        self._doc_lengths = {}
+        self._doc_terms = {}
+        self._doc_tokens = {}
+        self._total_length = 0
+        self._total_context_tokens = 0
+        self._synced = False
+        self._lock = threading.RLock()
+        
+        cv_database.add_listener(self._on_database_change)
+    
+    def _on_database_change(self, event: str, cv_id: Optional[str], cv_data: Optional[Dict[str, Any]]):
+        with self._lock:
+            if not self._synced:
+                # The full build on first use will pick the change up
+                return
+            if event == "add":
+                self._add(cv_id, cv_data)
+            elif event == "delete":
+                self._remove(cv_id)
+            else:
+                self._synced = False
+    
+    def _sync(self):
+        if self._synced:
+            return
+        self._postings = {}
+        self._doc_lengths = {}
+        self._doc_terms = {}
+        self._doc_tokens = {}
+        self._total_length = 0
+        self._total_context_tokens = 0
+        for cv_id, cv_data in self.cv_database.get_all_cvs().items():
+            self._add(cv_id, cv_data)
+        self._synced = True
+        logger.info(f"Built retrieval index over {len(self._doc_lengths)} CVs")
+    
+    def _add(self, cv_id: str, cv_data: Dict[str, Any]):
+        self._remove(cv_id)
+        
+        terms = Counter(tokenize(cv_id + " " + flatten_cv(cv_data)))
+        length = sum(terms.values())
+        for term, frequency in terms.items():
+            self._postings.setdefault(term, {})[cv_id] = frequency
+        
+        context_tokens = estimate_tokens(json.dumps({cv_id: cv_data}, indent=2))
+        self._doc_terms[cv_id] = terms
+        self._doc_lengths[cv_id] = length
+        self._doc_tokens[cv_id] = context_tokens
+        self._total_length += length
+        self._total_context_tokens += context_tokens
+    
+    def _remove(self, cv_id: str):
+        terms = self._doc_terms.pop(cv_id, None)
+        if terms is None:
+            return
+        
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(cv_id, None)
+                if not postings:
+                    del self._postings[term]
+        
+        self._total_length -= self._doc_lengths.pop(cv_id)
+        self._total_context_tokens -= self._doc_tokens.pop(cv_id)
+    
+    def total_context_tokens(self) -> int:
+        """Estimated prompt tokens needed to include every CV"""
+        with self._lock:
+            self._sync()
+            return self._total_context_tokens
+    
+    def context_tokens(self, cv_id: str) -> int:
+        """Estimated prompt tokens needed to include one CV"""
+        with self._lock:
+            self._sync()
+            return self._doc_tokens.get(cv_id, 0)
+    
+    def search(self, query: str, top_k: int = 20) -> List[Tuple[str, float]]:
+        """Return up to top_k (cv_id, score) pairs ranked by BM25 relevance"""
+        with self._lock:
+            self._sync()
+            doc_count = len(self._doc_lengths)
+            if not doc_count:
+                return []
+            
+            average_length = self._total_length / doc_count or 1.0
+            scores = {}
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for cv_id, frequency in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[cv_id] / average_length)
+                    scores[cv_id] = scores.get(cv_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+            
+            return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
\ No newline at end of file
@@ -0,0 +1,33 @@
+import importlib
+import threading
+from types import ModuleType
+
+class LazyModule:
+    """Stand-in for a module that is only imported on first attribute access
+
+    Attribute lookups always go to the real module, so patches applied to it
+    (e.g. ``patch("fitz.open")``) are seen through the proxy.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attribute: str):
+        return getattr(self._load(), attribute)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+def lazy_import(name: str) -> LazyModule:
+    """Defer importing a heavy dependency until it is first used"""
+    return LazyModule(name)
\ No newline at end of file
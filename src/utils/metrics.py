@@ -0,0 +1,266 @@
+import json
+import time
+import logging
+import threading
+import contextvars
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Tuple, Iterator
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from sub-millisecond cache hits to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Size buckets for prompt and document sizes in bytes
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+def _label_key(labels: Dict[str, Any]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(label_key: Tuple[Tuple[str, str], ...]) -> str:
+    if not label_key:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in label_key) + "}"
+
+class Counter:
+    """Monotonically increasing count, optionally split by labels"""
+    
+    type = "counter"
+    
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+    
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0)
+    
+    def samples(self) -> List[Tuple[str, Tuple, float]]:
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {_format_labels(key) or "total": value for key, value in self._values.items()}
+
+class Histogram:
+    """Distribution of observed values in cumulative buckets, optionally split by labels"""
+    
+    type = "histogram"
+    
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            # Values above the last bound only appear in the +Inf bucket
+            position = bisect_left(self.buckets, value)
+            if position < len(self.buckets):
+                series["counts"][position] += 1
+            series["sum"] += value
+            series["count"] += 1
+    
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+    
+    def count(self, **labels) -> int:
+        with self._lock:
+            series = self._values.get(_label_key(labels))
+            return series["count"] if series else 0
+    
+    def samples(self) -> List[Tuple[str, Tuple, float]]:
+        samples = []
+        with self._lock:
+            for key, series in self._values.items():
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, series["counts"]):
+                    cumulative += bucket_count
+                    samples.append((f"{self.name}_bucket", key + (("le", repr(float(bound))),), cumulative))
+                samples.append((f"{self.name}_bucket", key + (("le", "+Inf"),), series["count"]))
+                samples.append((f"{self.name}_sum", key, series["sum"]))
+                samples.append((f"{self.name}_count", key, series["count"]))
+        return samples
+    
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                _format_labels(key) or "total": {
+                    "count": series["count"],
+                    "sum": series["sum"],
+                    "mean": series["sum"] / series["count"] if series["count"] else 0.0
+                }
+                for key, series in self._values.items()
+            }
+
+class MetricsRegistry:
+    """Process-wide collection of metrics and recently finished trace spans"""
+    
+    def __init__(self, max_spans: int = 1000):
+        self._metrics = {}
+        self._spans = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+    
+    def _get_or_create(self, metric_class, name: str, help_text: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_class(name, help_text, **kwargs)
+            elif not isinstance(metric, metric_class):
+                raise ValueError(f"Metric {name} is already registered as a {metric.type}")
+            return metric
+    
+    def counter(self, name: str, help_text: str = "") -> Counter:
+        return self._get_or_create(Counter, name, help_text)
+    
+    def histogram(self, name: str, help_text: str = "", buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, buckets=buckets)
+    
+    def record_span(self, span: Dict[str, Any]):
+        self._spans.append(span)
+    
+    def recent_spans(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        spans = list(self._spans)
+        return spans[-limit:] if limit else spans
+    
+    def reset(self):
+        """Clear all recorded values and spans, e.g. between tests"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.clear()
+        self._spans.clear()
+    
+    def to_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, label_key, value in metric.samples():
+                lines.append(f"{name}{_format_labels(label_key)} {value}")
+        return "\n".join(lines) + "\n"
+    
+    def to_dict(self, span_limit: int = 100) -> Dict[str, Any]:
+        """Return all metrics and the most recent spans as JSON-serializable data"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        return {
+            "metrics": {metric.name: {"type": metric.type, "values": metric.to_dict()} for metric in metrics},
+            "spans": self.recent_spans(span_limit)
+        }
+
+REGISTRY = MetricsRegistry()
+
+# Innermost open span in the current thread or asyncio task
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+def counter(name: str, help_text: str = "") -> Counter:
+    """Get or create a counter in the default registry"""
+    return REGISTRY.counter(name, help_text)
+
+def histogram(name: str, help_text: str = "", buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+    """Get or create a histogram in the default registry"""
+    return REGISTRY.histogram(name, help_text, buckets)
+
+@contextmanager
+def span(name: str, registry: Optional[MetricsRegistry] = None, **labels) -> Iterator[Dict[str, Any]]:
+    """Time a block of work as a trace span
+    
+    The duration is observed in the ``<name>_seconds`` histogram with the given
+    labels plus status="ok"|"error", and the span is kept in the registry's
+    recent spans with its parent span. Attributes added to the yielded dict
+    are stored with the span.
+    """
+    registry = registry or REGISTRY
+    parent = _current_span.get()
+    current = {
+        "name": name,
+        "labels": {key: str(value) for key, value in labels.items()},
+        "parent": parent["name"] if parent else None,
+        "attributes": {},
+        "start": time.time()
+    }
+    token = _current_span.set(current)
+    status = "ok"
+    start = time.perf_counter()
+    try:
+        yield current["attributes"]
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        _current_span.reset(token)
+        current["duration"] = duration
+        current["status"] = status
+        registry.histogram(f"{name}_seconds", f"Duration of {name} spans").observe(duration, status=status, **labels)
+        registry.record_span(current)
+
+def record_retry(operation: str):
+    """Build a tenacity before_sleep callback counting retries and the backoff spent waiting"""
+    def before_sleep(retry_state):
+        counter("llm_retries_total", "LLM calls retried after a failure").inc(operation=operation)
+        histogram("llm_retry_backoff_seconds", "Backoff before retrying an LLM call").observe(
+            retry_state.next_action.sleep if retry_state.next_action else 0.0, operation=operation
+        )
+    return before_sleep
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+    
+    def do_GET(self):
+        if self.path == "/metrics":
+            body = self.registry.to_prometheus().encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        elif self.path == "/metrics.json":
+            body = json.dumps(self.registry.to_dict()).encode("utf-8")
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        # Scrapes are frequent; keep them out of the application log
+        pass
+
+def start_http_server(port: int, host: str = "127.0.0.1",
+                      registry: Optional[MetricsRegistry] = None) -> ThreadingHTTPServer:
+    """Serve /metrics (Prometheus text) and /metrics.json from a background thread"""
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry or REGISTRY})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
\ No newline at end of file
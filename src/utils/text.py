@@ -0,0 +1,8 @@
+import math
+
+# Rough characters-per-token ratio for English text and JSON with Gemini tokenizers
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local estimate of the number of LLM tokens in text"""
+    return int(math.ceil(len(text) / CHARS_PER_TOKEN))
\ No newline at end of file
@@ -0,0 +1,47 @@
+import unittest
+from unittest.mock import patch
+
+from src.query.answer_cache import AnswerCache, normalize_question
+
+class TestAnswerCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = AnswerCache(max_entries=2, ttl=60)
+    
+    def test_normalize_question(self):
+        self.assertEqual(normalize_question("  List all   Python developers? "), "list all python developers")
+    
+    def test_key_depends_on_context_and_generation(self):
+        key = AnswerCache.make_key("Who knows Python?", [], 1)
+        
+        self.assertEqual(key, AnswerCache.make_key("who knows python", [], 1))
+        self.assertNotEqual(key, AnswerCache.make_key("Who knows Python?", [], 2))
+        self.assertNotEqual(key, AnswerCache.make_key("Who knows Python?", [{"role": "user", "content": "Hi"}], 1))
+    
+    def test_lru_eviction_and_stats(self):
+        self.cache.set("a", "Answer A")
+        self.cache.set("b", "Answer B")
+        self.cache.get("a")
+        self.cache.set("c", "Answer C")
+        
+        self.assertEqual(self.cache.get("a"), "Answer A")
+        self.assertIsNone(self.cache.get("b"))
+        
+        stats = self.cache.stats()
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["evictions"], 1)
+        self.assertEqual(stats["entries"], 2)
+    
+    @patch("src.query.answer_cache.time.monotonic")
+    def test_ttl_expiry(self, mock_monotonic):
+        mock_monotonic.return_value = 1000
+        self.cache.set("a", "Answer A")
+        
+        mock_monotonic.return_value = 1061
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.stats()["expirations"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
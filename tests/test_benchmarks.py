@@ -0,0 +1,36 @@
+import unittest
+
+from benchmarks.micro import compare_results, time_call
+
+class TestMicroBenchmarks(unittest.TestCase):
+
+    def test_time_call(self):
+        calls = []
+        result = time_call(lambda: calls.append(1), repeat=3, number=2, setup=lambda: calls.append(0))
+        
+        self.assertEqual(calls, [0, 1, 1] * 3)
+        self.assertEqual((result["repeat"], result["number"]), (3, 2))
+        self.assertLessEqual(result["min_s"], result["median_s"])
+    
+    def test_compare_results(self):
+        baseline = {
+            "slow": {"median_s": 0.100},
+            "stable": {"median_s": 0.100},
+            "tiny": {"median_s": 0.0001},
+            "removed": {"median_s": 0.100}
+        }
+        current = {
+            "slow": {"median_s": 0.150},
+            "stable": {"median_s": 0.110},
+            # Large relative change but below the noise floor
+            "tiny": {"median_s": 0.0003},
+            "new": {"median_s": 1.0}
+        }
+        
+        regressions = compare_results(baseline, current, threshold=0.25)
+        
+        self.assertEqual([regression["name"] for regression in regressions], ["slow"])
+        self.assertAlmostEqual(regressions[0]["ratio"], 1.5)
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
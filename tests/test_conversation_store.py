@@ -0,0 +1,47 @@
+import unittest
+from unittest.mock import patch
+
+from src.query.conversation_store import ConversationStore
+
+class TestConversationStore(unittest.TestCase):
+
+    def setUp(self):
+        self.store = ConversationStore(max_sessions=2, max_messages=3, idle_timeout=60)
+    
+    def test_sessions_are_isolated(self):
+        self.store.append("alice", "user", "Who knows Python?")
+        self.store.append("bob", "user", "Who knows Java?")
+        
+        self.assertEqual(self.store.get_history("alice"), [{"role": "user", "content": "Who knows Python?"}])
+        self.assertEqual(self.store.get_history("bob"), [{"role": "user", "content": "Who knows Java?"}])
+        self.assertEqual(self.store.get_history("carol"), [])
+    
+    def test_history_is_trimmed(self):
+        for i in range(5):
+            self.store.append("alice", "user", f"Message {i}")
+        
+        history = self.store.get_history("alice")
+        self.assertEqual([msg["content"] for msg in history], ["Message 2", "Message 3", "Message 4"])
+    
+    def test_least_recently_used_session_is_evicted(self):
+        self.store.append("alice", "user", "Hi")
+        self.store.append("bob", "user", "Hi")
+        self.store.get_history("alice")
+        self.store.append("carol", "user", "Hi")
+        
+        self.assertEqual(self.store.get_history("bob"), [])
+        self.assertEqual(len(self.store.get_history("alice")), 1)
+        self.assertEqual(self.store.session_count(), 2)
+    
+    @patch("src.query.conversation_store.time.monotonic")
+    def test_idle_sessions_are_evicted(self, mock_monotonic):
+        mock_monotonic.return_value = 1000
+        self.store.append("alice", "user", "Hi")
+        
+        mock_monotonic.return_value = 1061
+        self.assertEqual(self.store.get_history("alice"), [])
+        self.assertEqual(self.store.session_count(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
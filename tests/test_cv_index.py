@@ -0,0 +1,64 @@
+import unittest
+
+from src.database.cv_index import CVIndex, extract_field_values
+
+class TestCVIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = CVIndex()
+        self.index.add("cv1.pdf", {
+            "skills": {"technical": ["Python", "Kubernetes"], "languages": ["English"]},
+            "education": [{"degree": "MSc", "institution": "Stanford University"}],
+            "work_experience": [{"title": "Engineer", "company": "ABC Corp"}]
+        })
+        self.index.add("cv2.pdf", {
+            "skills": {"technical": ["python ", "Java"], "languages": ["German", "English"]},
+            "education": [{"degree": "BSc", "institution": "State University"}],
+            "certifications": [{"name": "CKA"}]
+        })
+    
+    def test_extract_field_values(self):
+        cv_data = {"education": [{"institution": "A"}, {"institution": ""}, {"degree": "BSc"}]}
+        self.assertEqual(extract_field_values(cv_data, "education[].institution"), ["A"])
+        self.assertEqual(extract_field_values(cv_data, "skills.technical"), [])
+    
+    def test_exact_lookup_is_case_insensitive(self):
+        self.assertEqual(self.index.lookup("skills.technical", "PYTHON"), {"cv1.pdf", "cv2.pdf"})
+        self.assertEqual(self.index.lookup("skills.technical", "kubernetes"), {"cv1.pdf"})
+        self.assertEqual(self.index.lookup("skills.technical", "Go"), set())
+    
+    def test_prefix_lookup(self):
+        self.assertEqual(self.index.lookup("education[].institution", "stan", match="prefix"), {"cv1.pdf"})
+        self.assertEqual(self.index.lookup("education[].institution", "st", match="prefix"), {"cv1.pdf", "cv2.pdf"})
+    
+    def test_evaluate_and_or(self):
+        query = {"and": [
+            {"field": "skills.languages", "value": "english"},
+            {"or": [
+                {"field": "certifications[].name", "value": "cka"},
+                {"field": "work_experience[].company", "value": "xyz"}
+            ]}
+        ]}
+        self.assertEqual(self.index.evaluate(query), {"cv2.pdf"})
+    
+    def test_remove_and_replace(self):
+        self.index.remove("cv1.pdf")
+        self.assertEqual(self.index.lookup("skills.technical", "python"), {"cv2.pdf"})
+        self.assertNotIn("kubernetes", self.index.values("skills.technical"))
+        
+        # Re-adding a CV replaces its previous entries
+        self.index.add("cv2.pdf", {"skills": {"technical": ["Rust"]}})
+        self.assertEqual(self.index.lookup("skills.technical", "python"), set())
+        self.assertEqual(self.index.lookup("skills.technical", "rust"), {"cv2.pdf"})
+    
+    def test_invalid_queries(self):
+        with self.assertRaises(ValueError):
+            self.index.lookup("personal_info.name", "John")
+        with self.assertRaises(ValueError):
+            self.index.evaluate({"field": "skills.technical"})
+        with self.assertRaises(ValueError):
+            self.index.lookup("skills.technical", "py", match="fuzzy")
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
@@ -63,6 +63,91 @@ class TestCVProcessor(unittest.TestCase):
         mock_fitz_open.assert_called_once_with(self.test_file_path)
         mock_apply_ocr.assert_called_once_with(mock_doc)
     
+    @patch("fitz.open")
+    @patch.object(CVProcessor, "_ocr_pages")
+    @patch.object(CVProcessor, "_apply_ocr_to_pdf")
+    def test_extract_text_from_pdf_ocrs_only_thin_pages(self, mock_apply_ocr, mock_ocr_pages, mock_fitz_open):
+        # A text cover page followed by a scanned certificate
+        native_text = "Cover page with a native text layer that is comfortably long enough to skip OCR entirely for this page.\n"
+        mock_doc = MagicMock()
+        pages = [MagicMock(), MagicMock()]
+        pages[0].get_text.return_value = native_text
+        pages[1].get_text.return_value = " \n"
+        mock_doc.load_page.side_effect = lambda page_num: pages[page_num]
+        mock_doc.__len__.return_value = 2
+        mock_fitz_open.return_value = mock_doc
+        mock_ocr_pages.return_value = ["Scanned certificate text"]
+        
+        result = self.cv_processor.extract_text_from_pdf(self.test_file_path)
+        
+        self.assertEqual(result, native_text + "Scanned certificate text\n")
+        mock_ocr_pages.assert_called_once_with(mock_doc, [1])
+        mock_apply_ocr.assert_not_called()
+    
+    @patch("pytesseract.image_to_string")
+    def test_apply_ocr_to_pdf_in_memory(self, mock_image_to_string):
+        # Mock a two-page document rendering to small grayscale bitmaps
+        mock_doc = MagicMock()
+        mock_doc.__len__.return_value = 2
+        mock_pix = MagicMock(width=2, height=2, samples=b"\x00" * 4)
+        mock_doc.load_page.return_value.get_pixmap.return_value = mock_pix
+        mock_image_to_string.side_effect = ["Page one", "Page two"]
+        
+        result = self.cv_processor._apply_ocr_to_pdf(mock_doc)
+        
+        self.assertEqual(result, "Page one\nPage two\n")
+        mock_pix.save.assert_not_called()
+        self.assertEqual(mock_image_to_string.call_count, 2)
+    
+    @patch("pytesseract.image_to_string")
+    def test_apply_ocr_to_pdf_parallel_keeps_order(self, mock_image_to_string):
+        from concurrent.futures import ThreadPoolExecutor
+        
+        mock_doc = MagicMock()
+        mock_doc.__len__.return_value = 3
+        
+        # Encode the page number in the single pixel of each rendered page
+        def load_page(page_num):
+            page = MagicMock()
+            page.get_pixmap.return_value = MagicMock(width=1, height=1, samples=bytes([page_num]))
+            return page
+        mock_doc.load_page.side_effect = load_page
+        mock_image_to_string.side_effect = lambda image: f"page {image.getpixel((0, 0))}"
+        
+        cv_processor = CVProcessor(ocr_enabled=True, ocr_workers=3)
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            with patch.object(cv_processor, "_get_ocr_pool", return_value=pool):
+                result = cv_processor._apply_ocr_to_pdf(mock_doc)
+        
+        self.assertEqual(result, "page 0\npage 1\npage 2\n")
+    
+    @patch("pytesseract.image_to_string")
+    def test_ocr_recovers_from_broken_pool(self, mock_image_to_string):
+        from concurrent.futures import Future
+        from concurrent.futures.process import BrokenProcessPool
+        
+        mock_doc = MagicMock()
+        mock_doc.__len__.return_value = 2
+        mock_doc.load_page.return_value.get_pixmap.return_value = MagicMock(width=1, height=1, samples=b"\x00")
+        mock_image_to_string.side_effect = ["Page one", "Page two"]
+        
+        def broken_submit(*args, **kwargs):
+            future = Future()
+            future.set_exception(BrokenProcessPool("worker result could not be unpickled"))
+            return future
+        
+        broken_pool = MagicMock()
+        broken_pool.submit.side_effect = broken_submit
+        cv_processor = CVProcessor(ocr_enabled=True, ocr_workers=2)
+        cv_processor._ocr_pool = broken_pool
+        
+        result = cv_processor._apply_ocr_to_pdf(mock_doc)
+        
+        # The pages are OCRed in this process and the broken pool is replaced on next use
+        self.assertEqual(result, "Page one\nPage two\n")
+        broken_pool.shutdown.assert_called_once()
+        self.assertIsNone(cv_processor._ocr_pool)
+    
     @patch("docx2txt.process")
     def test_extract_text_from_docx(self, mock_docx2txt):
         mock_docx2txt.return_value = "Sample DOCX CV text"
@@ -95,12 +180,65 @@ class TestCVProcessor(unittest.TestCase):
         unsupported_path = "test.txt"
         result_unsupported = self.cv_processor.process_document(unsupported_path)
         self.assertEqual(result_unsupported, "")
+    
+    @patch.object(CVProcessor, "_get_tesseract_version", return_value="5.3.0")
+    @patch.object(CVProcessor, "extract_text_from_pdf")
+    def test_process_document_uses_cache(self, mock_extract_pdf, mock_tesseract_version):
+        mock_extract_pdf.return_value = "PDF content"
+        cv_processor = CVProcessor(ocr_enabled=True, cache_dir=os.path.join(self.temp_dir.name, "cache"))
+        
+        # Identical content under a different name is served from the cache
+        copy_path = os.path.join(self.temp_dir.name, "copy_of_document.pdf")
+        with open(copy_path, "w") as f:
+            f.write("")
+        
+        self.assertEqual(cv_processor.process_document(self.test_file_path), "PDF content")
+        self.assertEqual(cv_processor.process_document(copy_path), "PDF content")
+        mock_extract_pdf.assert_called_once_with(self.test_file_path)
+        
+        # Changing the processor config invalidates the cached entry
+        cv_processor.ocr_dpi = 200
+        cv_processor.process_document(copy_path)
+        self.assertEqual(mock_extract_pdf.call_count, 2)
+    
+    @patch("fitz.open")
+    def test_process_bytes_reads_pdf_from_memory(self, mock_fitz_open):
+        mock_page = MagicMock()
+        mock_page.get_text.return_value = "In-memory CV text " * 10
+        mock_doc = MagicMock()
+        mock_doc.load_page.return_value = mock_page
+        mock_doc.__len__.return_value = 1
+        mock_fitz_open.return_value = mock_doc
+        
+        result = self.cv_processor.process_bytes(b"%PDF-1.7", "Jane Doe.pdf")
+        
+        self.assertEqual(result, "In-memory CV text " * 10)
+        mock_fitz_open.assert_called_once_with(stream=b"%PDF-1.7", filetype="pdf")
+    
+    @patch("docx2txt.process")
+    def test_process_bytes_reads_docx_from_memory(self, mock_docx2txt):
+        mock_docx2txt.side_effect = lambda source: source.read().decode()
+        
+        self.assertEqual(self.cv_processor.process_bytes(b"DOCX content", "cv.docx"), "DOCX content")
+        self.assertEqual(self.cv_processor.process_bytes(b"text", "cv.txt"), "")
+    
+    @patch.object(CVProcessor, "_get_tesseract_version", return_value="5.3.0")
+    @patch.object(CVProcessor, "extract_text_from_pdf")
+    def test_process_bytes_shares_cache_with_files(self, mock_extract_pdf, mock_tesseract_version):
+        mock_extract_pdf.return_value = "PDF content"
+        cv_processor = CVProcessor(ocr_enabled=True, cache_dir=os.path.join(self.temp_dir.name, "cache"))
+        
+        self.assertEqual(cv_processor.process_document(self.test_file_path), "PDF content")
+        self.assertEqual(cv_processor.process_bytes(b"", "upload.pdf"), "PDF content")
+        mock_extract_pdf.assert_called_once_with(self.test_file_path)
 
 
 # tests/test_cv_analyzer.py
 
+import json
+import asyncio
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 
 from src.analyzers.cv_analyzer import CVAnalyzer
 
@@ -140,15 +278,179 @@ class TestCVAnalyzer(unittest.TestCase):
         self.assertEqual(result["personal_info"]["email"], "john@example.com")
         mock_generate_content.assert_called_once()
     
+    @patch("google.generativeai.GenerativeModel.generate_content")
+    def test_extract_cv_information_uses_cache(self, mock_generate_content):
+        mock_generate_content.return_value = MagicMock(text='{"personal_info": {"name": "John Doe"}}')
+        
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cv_analyzer = CVAnalyzer(api_key=self.api_key, cache_dir=cache_dir)
+            
+            first = cv_analyzer.extract_cv_information(self.sample_cv_text)
+            # Whitespace differences do not defeat the cache
+            second = cv_analyzer.extract_cv_information(self.sample_cv_text.replace("\n", "\n\n  "))
+            
+            self.assertEqual(first, second)
+            mock_generate_content.assert_called_once()
+            self.assertEqual(cv_analyzer.cache_stats()["hits"], 1)
+            
+            # Another model does not share cached results
+            other_analyzer = CVAnalyzer(api_key=self.api_key, model_name="gemini-1.5-flash", cache_dir=cache_dir)
+            other_analyzer.extract_cv_information(self.sample_cv_text)
+            self.assertEqual(mock_generate_content.call_count, 2)
+            
+            # Invalidated results are fetched again
+            self.assertTrue(cv_analyzer.invalidate_cached_result(self.sample_cv_text))
+            cv_analyzer.extract_cv_information(self.sample_cv_text)
+            self.assertEqual(mock_generate_content.call_count, 3)
+    
+    @patch.object(CVAnalyzer._generate_cv_information.retry, "sleep")
+    @patch("google.generativeai.GenerativeModel.generate_content")
+    def test_failed_extraction_is_retried_and_not_cached(self, mock_generate_content, mock_sleep):
+        mock_generate_content.return_value = MagicMock(text="not json")
+        
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cv_analyzer = CVAnalyzer(api_key=self.api_key, cache_dir=cache_dir)
+            result = cv_analyzer.extract_cv_information(self.sample_cv_text)
+            
+            self.assertEqual(result["personal_info"], {})
+            self.assertEqual(mock_generate_content.call_count, 3)
+            self.assertEqual(cv_analyzer.cache_stats()["size_bytes"], 0)
+    
+    @patch("google.generativeai.GenerativeModel.generate_content_async", new_callable=AsyncMock)
+    def test_extract_cv_information_async(self, mock_generate_content_async):
+        mock_generate_content_async.return_value = MagicMock(text='```json\n{"personal_info": {"name": "John Doe"}}\n```')
+        
+        result = asyncio.run(self.cv_analyzer.extract_cv_information_async(self.sample_cv_text))
+        
+        self.assertEqual(result["personal_info"]["name"], "John Doe")
+        mock_generate_content_async.assert_awaited_once()
+    
+    @patch("google.generativeai.GenerativeModel.generate_content_async", new_callable=AsyncMock)
+    def test_extract_many_keeps_order_and_limits_concurrency(self, mock_generate_content_async):
+        in_flight = []
+        peak = []
+        
+        async def generate(prompt):
+            in_flight.append(prompt)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.remove(prompt)
+            name = prompt.strip().splitlines()[-1].strip()
+            return MagicMock(text=json.dumps({"personal_info": {"name": name}}))
+        mock_generate_content_async.side_effect = generate
+        
+        texts = [f"Candidate {i}" for i in range(6)]
+        results = self.cv_analyzer.extract_many(texts, max_concurrency=2)
+        
+        self.assertEqual([r["personal_info"]["name"] for r in results], texts)
+        self.assertEqual(mock_generate_content_async.await_count, 6)
+        self.assertLessEqual(max(peak), 2)
+    
+    @patch("google.generativeai.GenerativeModel.generate_content_async", new_callable=AsyncMock)
+    def test_extract_many_batches_short_cvs(self, mock_generate_content_async):
+        mock_generate_content_async.return_value = MagicMock(
+            text='[{"personal_info": {"name": "A"}}, {"personal_info": {"name": "B"}}]'
+        )
+        cv_analyzer = CVAnalyzer(api_key=self.api_key, batch_size=2, batch_max_chars=100)
+        
+        results = cv_analyzer.extract_many(["CV of A", "CV of B"])
+        
+        self.assertEqual([r["personal_info"]["name"] for r in results], ["A", "B"])
+        mock_generate_content_async.assert_awaited_once()
+        prompt = mock_generate_content_async.call_args.args[0]
+        self.assertIn("===== CV 2 =====", prompt)
+    
+    @patch("google.generativeai.GenerativeModel.generate_content_async", new_callable=AsyncMock)
+    def test_extract_many_looks_up_each_cv_once(self, mock_generate_content_async):
+        mock_generate_content_async.return_value = MagicMock(text='{"personal_info": {"name": "A"}}')
+        
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cv_analyzer = CVAnalyzer(api_key=self.api_key, cache_dir=cache_dir)
+            cv_analyzer.extract_many(["CV of A", "CV of B"])
+            
+            self.assertEqual(cv_analyzer.cache_stats()["misses"], 2)
+    
+    @patch.object(CVAnalyzer._generate_batch_async.retry, "sleep", new_callable=AsyncMock)
+    @patch("google.generativeai.GenerativeModel.generate_content_async", new_callable=AsyncMock)
+    def test_malformed_batch_falls_back_to_concurrent_requests(self, mock_generate_content_async, mock_sleep):
+        in_flight = []
+        peak = []
+        
+        async def generate(prompt):
+            if "===== CV" in prompt:
+                return MagicMock(text='["A", "B"]')
+            in_flight.append(prompt)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.remove(prompt)
+            name = prompt.strip().splitlines()[-1].strip()
+            return MagicMock(text=json.dumps({"personal_info": {"name": name}}))
+        mock_generate_content_async.side_effect = generate
+        cv_analyzer = CVAnalyzer(api_key=self.api_key, batch_size=2, batch_max_chars=100, max_concurrency=2)
+        
+        results = cv_analyzer.extract_many(["CV of A", "CV of B"])
+        
+        self.assertEqual([r["personal_info"]["name"] for r in results], ["CV of A", "CV of B"])
+        self.assertEqual(max(peak), 2)
+    
     def test_unsupported_provider(self):
         with self.assertRaises(ValueError):
             CVAnalyzer(api_key=self.api_key, provider="unsupported")
+    
+    @patch("google.generativeai.GenerativeModel.generate_content")
+    def test_fast_mode_skips_llm(self, mock_generate_content):
+        cv_analyzer = CVAnalyzer(api_key=self.api_key, mode="fast")
+        
+        result = cv_analyzer.extract_cv_information("Jane Smith\njane@example.com\nSkills: Python, Docker")
+        
+        self.assertEqual(result["personal_info"]["email"], "jane@example.com")
+        self.assertEqual(result["skills"]["technical"], ["Python", "Docker"])
+        mock_generate_content.assert_not_called()
+    
+    @patch("google.generativeai.GenerativeModel.generate_content")
+    def test_hybrid_mode_merges_rule_fields(self, mock_generate_content):
+        mock_generate_content.return_value = MagicMock(text=json.dumps({
+            "personal_info": {"name": "Jane Smith", "location": "Berlin"},
+            "skills": {"soft": ["Leadership"], "languages": ["German"]}
+        }))
+        cv_analyzer = CVAnalyzer(api_key=self.api_key, mode="hybrid")
+        
+        result = cv_analyzer.extract_cv_information(
+            "Jane Smith\njane@example.com | +49 151 2345 6789\nhttps://github.com/jsmith\nSkills: Kubernetes, Go"
+        )
+        
+        prompt = mock_generate_content.call_args.args[0]
+        self.assertNotIn('"email"', prompt)
+        self.assertNotIn('"technical"', prompt)
+        self.assertEqual(result["personal_info"], {
+            "name": "Jane Smith",
+            "location": "Berlin",
+            "email": "jane@example.com",
+            "phone": "+49 151 2345 6789",
+            "links": ["https://github.com/jsmith"]
+        })
+        self.assertEqual(result["skills"], {"soft": ["Leadership"], "languages": ["German"], "technical": ["Kubernetes"]})
+    
+    @patch("google.generativeai.GenerativeModel.generate_content")
+    def test_modes_do_not_share_cached_results(self, mock_generate_content):
+        mock_generate_content.return_value = MagicMock(text='{"personal_info": {"name": "John Doe"}}')
+        
+        with tempfile.TemporaryDirectory() as cache_dir:
+            CVAnalyzer(api_key=self.api_key, cache_dir=cache_dir).extract_cv_information(self.sample_cv_text)
+            CVAnalyzer(api_key=self.api_key, cache_dir=cache_dir, mode="hybrid").extract_cv_information(self.sample_cv_text)
+            
+            self.assertEqual(mock_generate_content.call_count, 2)
+    
+    def test_unsupported_mode(self):
+        with self.assertRaises(ValueError):
+            CVAnalyzer(api_key=self.api_key, mode="unsupported")
 
 
 # tests/test_cv_database.py
 
 import os
 import json
+import sqlite3
 import unittest
 import tempfile
 from src.database.cv_database import CVDatabase
@@ -224,6 +526,110 @@ class TestCVDatabase(unittest.TestCase):
         
         # Verify results
         self.assertEqual(retrieved_cv, self.sample_cv)
+    
+    def test_filter_cvs(self):
+        self.cv_database.add_cv("cv1.pdf", self.sample_cv)
+        self.cv_database.add_cv("cv2.pdf", {"education": [{"institution": "Other College"}]})
+        
+        query = {"field": "education[].institution", "value": "test", "match": "prefix"}
+        self.assertEqual(self.cv_database.filter_cvs(query), {"cv1.pdf": self.sample_cv})
+        
+        # Indexes follow deletions and survive a reload
+        self.cv_database.delete_cv("cv1.pdf")
+        self.assertEqual(self.cv_database.find_cv_ids(query), set())
+        reloaded = CVDatabase(db_path=self.db_path)
+        self.assertEqual(reloaded.find_cv_ids({"field": "education[].institution", "value": "other college"}), {"cv2.pdf"})
+    
+    def test_generation_changes_on_mutation(self):
+        generation = self.cv_database.generation
+        self.cv_database.add_cv("cv1.pdf", self.sample_cv)
+        self.assertGreater(self.cv_database.generation, generation)
+        
+        generation = self.cv_database.generation
+        self.cv_database.delete_cv("cv1.pdf")
+        self.assertGreater(self.cv_database.generation, generation)
+    
+    def test_batch_commits_once(self):
+        with self.cv_database.batch():
+            self.cv_database.add_cv("cv1.pdf", self.sample_cv)
+            self.cv_database.add_cv("cv2.pdf", self.sample_cv)
+            
+            # Nothing is visible to other connections until the batch commits
+            self.assertIsNone(CVDatabase(db_path=self.db_path).get_cv("cv1.pdf"))
+        
+        self.assertEqual(len(CVDatabase(db_path=self.db_path).get_all_cvs()), 2)
+    
+    def test_failed_batch_is_rolled_back(self):
+        self.cv_database.add_cv("cv1.pdf", self.sample_cv)
+        
+        with self.assertRaises(RuntimeError):
+            with self.cv_database.batch():
+                self.cv_database.add_cv("cv2.pdf", self.sample_cv)
+                raise RuntimeError("interrupted")
+        
+        self.assertEqual(list(self.cv_database.get_all_cvs()), ["cv1.pdf"])
+        self.assertEqual(list(CVDatabase(db_path=self.db_path).get_all_cvs()), ["cv1.pdf"])
+    
+    def test_failed_add_is_raised_and_rolled_back(self):
+        # The record is written but the text is not
+        with sqlite3.connect(self.cv_database.db_path) as other:
+            other.execute("DROP TABLE cv_texts")
+        
+        with self.assertRaises(sqlite3.OperationalError):
+            self.cv_database.add_cv("cv1.pdf", self.sample_cv, cv_text="CV text")
+        
+        self.assertIsNone(self.cv_database.get_cv("cv1.pdf"))
+        self.assertEqual(CVDatabase(db_path=self.db_path).get_all_cvs(), {})
+    
+    def test_failed_delete_keeps_memory_and_disk_in_step(self):
+        self.cv_database.add_cv("cv1.pdf", self.sample_cv)
+        with sqlite3.connect(self.cv_database.db_path) as other:
+            other.execute("CREATE TRIGGER keep_cvs BEFORE DELETE ON cvs BEGIN SELECT RAISE(ABORT, 'read only'); END")
+        
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.cv_database.delete_cv("cv1.pdf")
+        
+        self.assertEqual(self.cv_database.get_cv("cv1.pdf"), self.sample_cv)
+        self.assertEqual(self.cv_database.find_cv_ids({"field": "education[].institution", "value": "test university"}),
+                         {"cv1.pdf"})
+        self.assertEqual(list(CVDatabase(db_path=self.db_path).get_all_cvs()), ["cv1.pdf"])
+    
+    def test_reload_applies_only_changes_from_other_connections(self):
+        self.cv_database.add_cv("kept.pdf", self.sample_cv)
+        self.cv_database.add_cv("deleted.pdf", self.sample_cv)
+        self.cv_database.add_cv("updated.pdf", self.sample_cv)
+        self.assertFalse(self.cv_database.reload_if_changed())
+        
+        # Another process, e.g. an ingestion worker, writes to the same file
+        writer = CVDatabase(db_path=self.db_path)
+        writer.add_cv("new.pdf", self.sample_cv)
+        writer.add_cv("updated.pdf", {"education": [{"institution": "Other College"}]})
+        writer.delete_cv("deleted.pdf")
+        writer.close()
+        
+        events = []
+        self.cv_database.add_listener(lambda event, cv_id, cv_data: events.append((event, cv_id)))
+        self.assertTrue(self.cv_database.reload_if_changed())
+        
+        self.assertEqual(sorted(events), [("add", "new.pdf"), ("add", "updated.pdf"), ("delete", "deleted.pdf")])
+        self.assertEqual(sorted(self.cv_database.get_all_cvs()), ["kept.pdf", "new.pdf", "updated.pdf"])
+        self.assertEqual(self.cv_database.find_cv_ids({"field": "education[].institution", "value": "other college"}),
+                         {"updated.pdf"})
+        self.assertFalse(self.cv_database.reload_if_changed())
+    
+    def test_migrates_legacy_json(self):
+        legacy_path = os.path.join(self.temp_dir.name, "legacy.json")
+        with open(legacy_path, "w") as f:
+            json.dump({"old_cv.pdf": self.sample_cv}, f, indent=2)
+        
+        database = CVDatabase(db_path=legacy_path)
+        
+        self.assertEqual(database.get_cv("old_cv.pdf"), self.sample_cv)
+        self.assertFalse(os.path.exists(legacy_path))
+        self.assertTrue(os.path.exists(legacy_path + ".migrated"))
+        
+        # The migrated data is served from SQLite on the next load
+        self.assertEqual(CVDatabase(db_path=legacy_path).get_cv("old_cv.pdf"), self.sample_cv)
 
 
 # Run all tests
@@ -0,0 +1,56 @@
+import os
+import time
+import unittest
+import tempfile
+
+from src.cache.disk_cache import DiskCache
+
+class TestDiskCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = DiskCache(os.path.join(self.temp_dir.name, "cache"), max_bytes=100)
+    
+    def tearDown(self):
+        self.temp_dir.cleanup()
+    
+    def test_set_and_get(self):
+        key = DiskCache.make_key("cv_text", "abc")
+        self.cache.set(key, "Extracted text")
+        
+        self.assertEqual(self.cache.get(key), "Extracted text")
+        self.assertIsNone(self.cache.get(DiskCache.make_key("cv_text", "missing")))
+        
+        stats = self.cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+    
+    def test_persistence(self):
+        key = DiskCache.make_key("cv_text", "abc")
+        self.cache.set(key, "Extracted text")
+        
+        # A new instance over the same directory sees the entry
+        new_cache = DiskCache(self.cache.cache_dir, max_bytes=100)
+        self.assertEqual(new_cache.get(key), "Extracted text")
+    
+    def test_lru_eviction(self):
+        keys = [DiskCache.make_key("cv_text", i) for i in range(3)]
+        self.cache.set(keys[0], "a" * 40)
+        self.cache.set(keys[1], "b" * 40)
+        
+        # Make the first entry the most recently used one
+        old = time.time() - 60
+        os.utime(self.cache._entry_path(keys[1]), (old, old))
+        self.cache.get(keys[0])
+        
+        self.cache.set(keys[2], "c" * 40)
+        
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+        self.assertLessEqual(self.cache.stats()["size_bytes"], 100)
+        self.assertEqual(self.cache.evictions, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,197 @@
+import os
+import pickle
+import sqlite3
+import unittest
+import tempfile
+from unittest.mock import MagicMock, patch
+
+from src.pipeline import ingestion
+from src.pipeline.ingestion import IngestionPipeline
+from src.processors.cv_processor import CVProcessor
+from src.processors.text_compactor import TextCompactor
+from src.analyzers.cv_analyzer import CVAnalyzer
+from src.database.cv_database import CVDatabase
+from src.pipeline.manifest import IngestionManifest
+from src.database.near_duplicates import NearDuplicateIndex
+
+class TestIngestionPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cv_database = CVDatabase(db_path=os.path.join(self.temp_dir.name, "test_database.json"))
+        
+        self.cv_processor = MagicMock(spec=CVProcessor)
+        self.cv_processor.process_document.side_effect = lambda path: "" if "empty" in path else f"text of {path}"
+        
+        self.cv_analyzer = MagicMock(spec=CVAnalyzer)
+        self.cv_analyzer.extract_cv_information.side_effect = \
+            lambda text, raise_errors=False: {"personal_info": {"name": text}}
+        
+        self.pipeline = IngestionPipeline(self.cv_processor, self.cv_analyzer, self.cv_database,
+                                          extract_workers=1, analysis_concurrency=4)
+    
+    def tearDown(self):
+        self.temp_dir.cleanup()
+    
+    def test_run(self):
+        self.cv_database.add_cv("existing.pdf", {"personal_info": {}})
+        progress = []
+        
+        results = self.pipeline.run(
+            ["/cvs/existing.pdf", "/cvs/cv1.pdf", "/cvs/cv2.docx", "/cvs/empty.pdf"],
+            progress_callback=lambda completed, total, message: progress.append((completed, total))
+        )
+        
+        # Every file is reported exactly once, in completion order
+        self.assertEqual(len(results), 4)
+        self.assertIn("CV existing.pdf already in database", results)
+        self.assertIn("Successfully processed CV: cv1.pdf", results)
+        self.assertIn("Successfully processed CV: cv2.docx", results)
+        self.assertIn("Failed to extract text from empty.pdf", results)
+        self.assertEqual(progress, [(1, 4), (2, 4), (3, 4), (4, 4)])
+        
+        # Analysed CVs are stored and skipped files are not re-extracted
+        self.assertEqual(self.cv_database.get_cv("cv1.pdf"), {"personal_info": {"name": "text of /cvs/cv1.pdf"}})
+        self.assertEqual(self.cv_processor.process_document.call_count, 3)
+        self.assertEqual(self.cv_analyzer.extract_cv_information.call_count, 2)
+    
+    def test_run_compacts_text_before_analysis(self):
+        self.cv_processor.process_document.side_effect = lambda path: "John   Doe\nPage 1 of 2\nPython developer"
+        self.pipeline.text_compactor = TextCompactor()
+        
+        self.pipeline.run(["/cvs/cv1.pdf"])
+        
+        self.cv_analyzer.extract_cv_information.assert_called_once_with("John Doe\nPython developer")
+        self.assertEqual(self.pipeline.last_run_stats["documents"], 1)
+        self.assertEqual(self.pipeline.last_run_stats["chars_saved"], 14)
+    
+    def test_run_reports_analysis_failure(self):
+        self.cv_analyzer.extract_cv_information.side_effect = Exception("LLM unavailable")
+        
+        results = self.pipeline.run(["/cvs/cv1.pdf"])
+        
+        self.assertEqual(results, ["Failed to analyze CV: cv1.pdf"])
+        self.assertIsNone(self.cv_database.get_cv("cv1.pdf"))
+    
+    def test_run_uploads_keeps_original_filenames(self):
+        self.cv_processor.process_bytes.side_effect = lambda data, filename: data.decode()
+        
+        results = self.pipeline.run_uploads([("Jane Doe.pdf", b"jane"), ("empty.docx", b"")])
+        
+        self.assertEqual(sorted(results), ["Failed to extract text from empty.docx",
+                                           "Successfully processed CV: Jane Doe.pdf"])
+        self.assertEqual(self.cv_database.get_cv("Jane Doe.pdf"), {"personal_info": {"name": "jane"}})
+        self.cv_processor.process_document.assert_not_called()
+    
+    def test_extraction_workers_reuse_one_serial_ocr_processor(self):
+        cv_processor = CVProcessor(ocr_enabled=True, ocr_workers=4)
+        pipeline = IngestionPipeline(cv_processor, self.cv_analyzer, self.cv_database, extract_workers=2)
+        with pipeline._create_extract_pool() as pool:
+            self.assertIs(pool._initializer, ingestion._init_extract_worker)
+            
+            # Simulate a worker process, which receives its own unpickled copy
+            worker_processor = pickle.loads(pickle.dumps(cv_processor))
+            with patch.object(ingestion, "_worker_components", None):
+                ingestion._init_extract_worker(worker_processor, TextCompactor())
+                with patch.object(worker_processor, "process_document", return_value="CV text") as process_document:
+                    cv_text, _, _ = ingestion._extract_document_in_worker("/cvs/cv1.pdf")
+        
+        self.assertEqual(cv_text, "CV text")
+        process_document.assert_called_once_with("/cvs/cv1.pdf")
+        # No nested OCR pool per worker, and the parent keeps its own setting
+        self.assertEqual(worker_processor.ocr_workers, 1)
+        self.assertEqual(cv_processor.ocr_workers, 4)
+    
+    def test_sync_folder_processes_only_changes(self):
+        cv_dir = os.path.join(self.temp_dir.name, "cvs")
+        os.makedirs(cv_dir)
+        def write(filename, content):
+            with open(os.path.join(cv_dir, filename), "w") as f:
+                f.write(content)
+        write("cv1.pdf", "one")
+        write("cv2.pdf", "two")
+        
+        self.pipeline.manifest = IngestionManifest(os.path.join(self.temp_dir.name, "manifest.db"))
+        self.pipeline.sync_folder(cv_dir)
+        self.assertEqual(self.cv_analyzer.extract_cv_information.call_count, 2)
+        self.assertEqual(self.pipeline.sync_folder(cv_dir), [])
+        
+        # Rename cv2.pdf and add a new file: only the new one is analysed
+        os.rename(os.path.join(cv_dir, "cv2.pdf"), os.path.join(cv_dir, "renamed.pdf"))
+        write("cv3.pdf", "three")
+        results = self.pipeline.sync_folder(cv_dir)
+        self.pipeline.manifest.close()
+        
+        self.assertEqual(results, ["Reused analysis of cv2.pdf for renamed.pdf",
+                                   "Removed CV cv2.pdf as its file was deleted",
+                                   "Successfully processed CV: cv3.pdf"])
+        self.assertEqual(self.cv_analyzer.extract_cv_information.call_count, 3)
+        self.assertEqual(sorted(self.cv_database.get_all_cvs()), ["cv1.pdf", "cv3.pdf", "renamed.pdf"])
+    
+    def test_failed_write_is_reported_and_retried_by_next_sync(self):
+        cv_dir = os.path.join(self.temp_dir.name, "cvs")
+        os.makedirs(cv_dir)
+        with open(os.path.join(cv_dir, "cv1.pdf"), "w") as f:
+            f.write("one")
+        self.pipeline.manifest = IngestionManifest(os.path.join(self.temp_dir.name, "manifest.db"))
+        
+        with patch.object(self.cv_database, "add_cv", side_effect=sqlite3.OperationalError("database is locked")):
+            results = self.pipeline.sync_folder(cv_dir)
+        
+        self.assertEqual(results, ["Failed to store CV: cv1.pdf"])
+        self.assertEqual(self.pipeline.sync_folder(cv_dir), ["Successfully processed CV: cv1.pdf"])
+        self.pipeline.manifest.close()
+    
+    def test_first_sync_does_not_reanalyse_stored_cvs(self):
+        cv_dir = os.path.join(self.temp_dir.name, "cvs")
+        os.makedirs(cv_dir)
+        for filename in ("cv1.pdf", "cv2.pdf"):
+            with open(os.path.join(cv_dir, filename), "w") as f:
+                f.write(filename)
+        self.cv_database.add_cv("cv1.pdf", {"personal_info": {"name": "stored"}})
+        
+        self.pipeline.manifest = IngestionManifest(os.path.join(self.temp_dir.name, "manifest.db"))
+        results = self.pipeline.sync_folder(cv_dir)
+        
+        self.assertEqual(results, ["CV cv1.pdf already in database", "Successfully processed CV: cv2.pdf"])
+        self.assertEqual(self.cv_analyzer.extract_cv_information.call_count, 1)
+        self.assertEqual(self.cv_database.get_cv("cv1.pdf"), {"personal_info": {"name": "stored"}})
+        
+        # The stored CV is now in the manifest, so a later edit of its file is re-analysed
+        self.assertEqual(self.pipeline.sync_folder(cv_dir), [])
+        with open(os.path.join(cv_dir, "cv1.pdf"), "w") as f:
+            f.write("edited")
+        self.assertEqual(self.pipeline.sync_folder(cv_dir), ["Successfully processed CV: cv1.pdf"])
+        
+        # After the first sync, a new file named like a stored CV is analysed
+        self.cv_database.add_cv("cv3.pdf", {"personal_info": {"name": "stored"}})
+        with open(os.path.join(cv_dir, "cv3.pdf"), "w") as f:
+            f.write("cv3.pdf")
+        self.assertEqual(self.pipeline.sync_folder(cv_dir), ["Successfully processed CV: cv3.pdf"])
+        self.pipeline.manifest.close()
+    
+    def test_run_flags_or_skips_near_duplicates(self):
+        cv_text = " ".join(f"word{i}" for i in range(300))
+        edited_text = cv_text.replace("word150", "changed")
+        texts = {"/cvs/cv1.pdf": cv_text, "/cvs/copy.pdf": edited_text, "/cvs/again.pdf": edited_text}
+        self.cv_processor.process_document.side_effect = lambda path: texts[path]
+        self.pipeline.near_duplicates = NearDuplicateIndex(self.cv_database, threshold=0.8)
+        
+        self.pipeline.run(["/cvs/cv1.pdf"])
+        results = self.pipeline.run(["/cvs/copy.pdf"])
+        
+        self.assertRegex(results[0], r"^Successfully processed CV: copy.pdf \(near-duplicate of cv1.pdf, \d+% similar\)$")
+        self.assertEqual(self.cv_database.get_cv("copy.pdf")["near_duplicate_of"]["cv_id"], "cv1.pdf")
+        
+        self.pipeline.duplicate_action = "skip"
+        results = self.pipeline.run(["/cvs/again.pdf"])
+        
+        self.assertRegex(results[0], r"^Skipped again.pdf: near-duplicate of (cv1|copy).pdf")
+        self.assertIsNone(self.cv_database.get_cv("again.pdf"))
+        self.assertEqual(self.cv_analyzer.extract_cv_information.call_count, 2)
+        self.assertEqual(self.pipeline.last_run_stats["near_duplicates"], 1)
+        self.pipeline.near_duplicates.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
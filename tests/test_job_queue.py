@@ -0,0 +1,84 @@
+import os
+import time
+import unittest
+import tempfile
+from unittest.mock import patch
+
+from src.pipeline.job_queue import JobQueue, PENDING, RUNNING, DONE, FAILED
+
+class TestJobQueue(unittest.TestCase):
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.queue_path = os.path.join(self.temp_dir.name, "queue.db")
+        self.job_queue = JobQueue(self.queue_path, max_attempts=2, backoff_base=10, lease_seconds=60)
+    
+    def tearDown(self):
+        self.job_queue.close()
+        self.temp_dir.cleanup()
+    
+    def test_enqueue_and_claim(self):
+        self.assertTrue(self.job_queue.enqueue("/cvs/cv1.pdf"))
+        self.assertFalse(self.job_queue.enqueue("/cvs/cv1.pdf"))
+        self.job_queue.enqueue("/cvs/cv2.pdf")
+        
+        job = self.job_queue.claim("worker-a")
+        self.assertEqual((job["cv_id"], job["state"], job["attempts"]), ("cv1.pdf", RUNNING, 1))
+        self.assertEqual(self.job_queue.claim("worker-b")["cv_id"], "cv2.pdf")
+        self.assertIsNone(self.job_queue.claim("worker-c"))
+        
+        self.job_queue.complete(job["id"], "ok")
+        self.assertEqual(self.job_queue.counts(), {PENDING: 0, RUNNING: 1, DONE: 1, FAILED: 0})
+    
+    def test_failed_job_is_retried_with_backoff(self):
+        self.job_queue.enqueue("/cvs/cv1.pdf")
+        job = self.job_queue.claim("worker-a")
+        
+        self.assertEqual(self.job_queue.fail(job["id"], "LLM unavailable"), PENDING)
+        self.assertIsNone(self.job_queue.claim("worker-a"))
+        
+        # Once the backoff has elapsed the job is claimable again, until attempts run out
+        with patch("src.pipeline.job_queue.time.time", return_value=time.time() + 11):
+            job = self.job_queue.claim("worker-a")
+        self.assertEqual(job["attempts"], 2)
+        self.assertEqual(self.job_queue.fail(job["id"], "LLM unavailable"), FAILED)
+        self.assertEqual(self.job_queue.get_job(job["id"])["message"], "LLM unavailable")
+        
+        self.assertEqual(self.job_queue.retry_failed(), 1)
+        self.assertEqual(self.job_queue.claim("worker-a")["attempts"], 1)
+    
+    def test_expired_lease_is_reclaimed_after_crash(self):
+        self.job_queue.enqueue("/cvs/cv1.pdf")
+        job = self.job_queue.claim("crashed-worker")
+        
+        # A new process opening the same queue sees the job as running until the lease expires
+        reopened = JobQueue(self.queue_path, lease_seconds=60)
+        self.assertIsNone(reopened.claim("worker-b"))
+        with patch("src.pipeline.job_queue.time.time", return_value=time.time() + 61):
+            reclaimed = reopened.claim("worker-b")
+        reopened.close()
+        
+        self.assertEqual((reclaimed["id"], reclaimed["worker_id"]), (job["id"], "worker-b"))
+        self.assertFalse(self.job_queue.heartbeat(job["id"], "crashed-worker"))
+        self.assertTrue(self.job_queue.heartbeat(job["id"], "worker-b"))
+    
+    def test_job_that_keeps_crashing_workers_fails(self):
+        self.job_queue.enqueue("/cvs/crash.pdf")
+        now = time.time()
+        self.job_queue.claim("worker-a")
+        with patch("src.pipeline.job_queue.time.time", return_value=now + 61):
+            self.assertEqual(self.job_queue.claim("worker-b")["attempts"], 2)
+        
+        # With max_attempts used up, the expired job fails and the next due job is claimed
+        self.job_queue.enqueue("/cvs/cv2.pdf")
+        with patch("src.pipeline.job_queue.time.time", return_value=now + 122):
+            job = self.job_queue.claim("worker-d")
+        
+        self.assertEqual(job["cv_id"], "cv2.pdf")
+        crashed = self.job_queue.list_jobs(FAILED)
+        self.assertEqual([failed["cv_id"] for failed in crashed], ["crash.pdf"])
+        self.assertEqual(crashed[0]["message"], "Worker lease expired on attempt 2")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import sys
+import unittest
+from unittest.mock import patch
+
+from src.utils.lazy import lazy_import
+
+class TestLazyImport(unittest.TestCase):
+    
+    def test_import_deferred_until_attribute_access(self):
+        sys.modules.pop("colorsys", None)
+        module = lazy_import("colorsys")
+        
+        self.assertNotIn("colorsys", sys.modules)
+        self.assertIn("not loaded", repr(module))
+        
+        self.assertEqual(module.rgb_to_hsv(1.0, 0.0, 0.0), (0.0, 1.0, 1.0))
+        self.assertIn("colorsys", sys.modules)
+        self.assertIn("(loaded)", repr(module))
+    
+    def test_patches_on_real_module_are_visible(self):
+        module = lazy_import("json")
+        with patch("json.dumps", return_value="patched"):
+            self.assertEqual(module.dumps({}), "patched")
+        self.assertEqual(module.dumps({}), "{}")
+    
+    def test_missing_module_raises_on_use(self):
+        module = lazy_import("no_such_module_for_tests")
+        with self.assertRaises(ImportError):
+            module.anything
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import json
+import asyncio
+import unittest
+from unittest.mock import patch, MagicMock
+
+from src.llm.providers import LLMProvider, MockLLMProvider, MockLLMError, GeminiProvider, create_provider
+from src.analyzers.cv_analyzer import CVAnalyzer
+from src.query.query_engine import CVQueryEngine
+
+class TestMockLLMProvider(unittest.TestCase):
+
+    def test_extraction_prompt_returns_schema_json(self):
+        cv_analyzer = CVAnalyzer(api_key="", provider=MockLLMProvider())
+        
+        result = cv_analyzer.extract_cv_information("Jane Smith\njane@example.com\nSkills: Python, Docker")
+        
+        self.assertEqual(cv_analyzer.provider, "mock")
+        self.assertEqual(result["personal_info"]["name"], "Jane Smith")
+        self.assertEqual(result["skills"]["technical"], ["Python", "Docker"])
+        self.assertEqual(set(result), {"personal_info", "education", "work_experience", "skills",
+                                       "projects", "certifications"})
+    
+    def test_batch_prompt_returns_one_object_per_cv(self):
+        cv_analyzer = CVAnalyzer(api_key="", provider=MockLLMProvider(), batch_size=3)
+        prompt = cv_analyzer._build_batch_prompt(["Alice Jones", "Bob Brown", "Carol White"])
+        
+        results = json.loads(MockLLMProvider().generate(prompt).text)
+        
+        self.assertEqual([r["personal_info"]["name"] for r in results], ["Alice Jones", "Bob Brown", "Carol White"])
+    
+    def test_latency_and_errors(self):
+        provider = MockLLMProvider(latency=0.01, jitter=0.005, error_rate=1.0, seed=1)
+        
+        with self.assertRaises(MockLLMError):
+            provider.generate("prompt")
+        with self.assertRaises(MockLLMError):
+            asyncio.run(provider.chat_async([], "question"))
+        self.assertEqual(provider.calls, 2)
+        
+        provider.error_rate = 0.0
+        with patch("src.llm.providers.time.sleep") as mock_sleep:
+            response = provider.chat([{"role": "user", "parts": ["context"]}], "question")
+        delay = mock_sleep.call_args.args[0]
+        self.assertTrue(0.005 <= delay <= 0.015)
+        self.assertIn("question", response.text)
+        self.assertGreater(response.usage_metadata.prompt_token_count, 0)
+    
+    def test_chat_stream(self):
+        chunks = list(MockLLMProvider().chat_stream([], "Who knows Python?"))
+        
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), "Mock answer to: Who knows Python?")
+    
+    def test_query_engine_with_mock_provider(self):
+        cv_database = MagicMock()
+        cv_database.get_all_cvs.return_value = {"cv1.pdf": {"personal_info": {"name": "Jane Smith"}}}
+        query_engine = CVQueryEngine(cv_database, api_key="", provider=MockLLMProvider())
+        
+        self.assertEqual(query_engine.query("Who knows Python?"), "Mock answer to: Who knows Python?")
+        self.assertEqual(query_engine.usage_stats["llm_calls"], 1)
+
+class TestCreateProvider(unittest.TestCase):
+
+    def test_known_providers(self):
+        self.assertIsInstance(create_provider("Gemini", "test_api_key"), GeminiProvider)
+        self.assertIsInstance(create_provider("mock", ""), MockLLMProvider)
+    
+    def test_unsupported_provider(self):
+        with self.assertRaises(ValueError):
+            create_provider("unsupported", "")
+    
+    def test_incomplete_provider_fails_on_creation(self):
+        class GenerateOnlyProvider(LLMProvider):
+            def generate(self, prompt: str):
+                return None
+        
+        with self.assertRaises(TypeError):
+            GenerateOnlyProvider()
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,67 @@
+import os
+import unittest
+import tempfile
+from unittest.mock import patch
+
+from src.pipeline.manifest import IngestionManifest
+
+class TestIngestionManifest(unittest.TestCase):
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cv_dir = os.path.join(self.temp_dir.name, "cvs")
+        os.makedirs(self.cv_dir)
+        self.manifest = IngestionManifest(os.path.join(self.temp_dir.name, "manifest.db"))
+    
+    def tearDown(self):
+        self.manifest.close()
+        self.temp_dir.cleanup()
+    
+    def write(self, filename: str, content: str, mtime: float = 1_700_000_000):
+        path = os.path.join(self.cv_dir, filename)
+        with open(path, "w") as f:
+            f.write(content)
+        os.utime(path, (mtime, mtime))
+        return path
+    
+    def paths(self, entries):
+        return [os.path.basename(entry["path"]) for entry in entries]
+    
+    def test_scan_detects_changes(self):
+        self.write("cv1.pdf", "one")
+        self.write("cv2.pdf", "two")
+        self.write("notes.txt", "ignored")
+        changes = self.manifest.scan(self.cv_dir)
+        self.assertEqual(self.paths(changes["new"]), ["cv1.pdf", "cv2.pdf"])
+        self.manifest.record_many(changes["new"])
+        
+        self.write("cv1.pdf", "one, updated", mtime=1_700_000_100)
+        os.remove(os.path.join(self.cv_dir, "cv2.pdf"))
+        self.write("copy.pdf", "two")
+        changes = self.manifest.scan(self.cv_dir)
+        
+        self.assertEqual(self.paths(changes["modified"]), ["cv1.pdf"])
+        self.assertEqual(self.paths(changes["deleted"]), ["cv2.pdf"])
+        self.assertEqual(self.paths(changes["copies"]), ["copy.pdf"])
+        self.assertEqual(changes["copies"][0]["source_cv_id"], "cv2.pdf")
+        self.assertEqual(changes["new"], [])
+    
+    def test_unchanged_files_are_not_hashed(self):
+        self.write("cv1.pdf", "one")
+        self.manifest.record_many(self.manifest.scan(self.cv_dir)["new"])
+        
+        with patch("src.pipeline.manifest.file_sha256") as mock_hash:
+            changes = self.manifest.scan(self.cv_dir)
+        mock_hash.assert_not_called()
+        self.assertEqual(self.paths(changes["unchanged"]), ["cv1.pdf"])
+        
+        # A touched file is hashed once, then its new mtime is remembered
+        self.write("cv1.pdf", "one", mtime=1_700_000_100)
+        self.assertEqual(self.paths(self.manifest.scan(self.cv_dir)["unchanged"]), ["cv1.pdf"])
+        with patch("src.pipeline.manifest.file_sha256") as mock_hash:
+            self.manifest.scan(self.cv_dir)
+        mock_hash.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
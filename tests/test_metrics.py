@@ -0,0 +1,93 @@
+import json
+import unittest
+import urllib.request
+from unittest.mock import patch, MagicMock
+
+from src.utils import metrics
+from src.utils.metrics import MetricsRegistry
+from src.analyzers.cv_analyzer import CVAnalyzer
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+    
+    def test_prometheus_format(self):
+        self.registry.counter("documents_total", "Documents processed").inc(2, format="pdf")
+        histogram = self.registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5.0)
+        
+        text = self.registry.to_prometheus()
+        
+        self.assertIn("# TYPE documents_total counter", text)
+        self.assertIn('documents_total{format="pdf"} 2', text)
+        self.assertIn('latency_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{le="1.0"} 2', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 3', text)
+        self.assertIn("latency_seconds_count 3", text)
+    
+    def test_metric_type_conflict(self):
+        self.registry.counter("requests")
+        with self.assertRaises(ValueError):
+            self.registry.histogram("requests")
+    
+    def test_spans_nest_and_record_errors(self):
+        with metrics.span("outer", registry=self.registry) as attributes:
+            attributes["documents"] = 1
+            with self.assertRaises(RuntimeError):
+                with metrics.span("inner", registry=self.registry, stage="ocr"):
+                    raise RuntimeError("boom")
+        
+        inner, outer = self.registry.recent_spans()
+        self.assertEqual((inner["name"], inner["parent"], inner["status"]), ("inner", "outer", "error"))
+        self.assertEqual(outer["attributes"], {"documents": 1})
+        self.assertEqual(self.registry.histogram("inner_seconds").count(stage="ocr", status="error"), 1)
+        
+        json.dumps(self.registry.to_dict())
+    
+    def test_abandoned_generator_closes_span_ok(self):
+        def stream():
+            with metrics.span("stream", registry=self.registry):
+                yield "first"
+                yield "second"
+        
+        chunks = stream()
+        next(chunks)
+        chunks.close()
+        
+        span = self.registry.recent_spans()[-1]
+        self.assertEqual((span["name"], span["status"]), ("stream", "ok"))
+        self.assertEqual(self.registry.histogram("stream_seconds").count(status="error"), 0)
+    
+    @patch.object(CVAnalyzer._generate_cv_information.retry, "sleep")
+    @patch("google.generativeai.GenerativeModel.generate_content")
+    def test_analysis_records_llm_calls_and_retries(self, mock_generate_content, mock_sleep):
+        mock_generate_content.side_effect = [RuntimeError("unavailable"), MagicMock(text='{"personal_info": {}}')]
+        retries = metrics.counter("llm_retries_total")
+        llm_seconds = metrics.histogram("llm_request_seconds")
+        retries_before = retries.value(operation="extract")
+        errors_before = llm_seconds.count(operation="extract", status="error")
+        
+        CVAnalyzer(api_key="test_api_key").extract_cv_information("John Doe")
+        
+        self.assertEqual(retries.value(operation="extract"), retries_before + 1)
+        self.assertEqual(llm_seconds.count(operation="extract", status="error"), errors_before + 1)
+        self.assertGreater(metrics.counter("llm_tokens_total").value(operation="extract", kind="prompt"), 0)
+    
+    def test_http_endpoint(self):
+        self.registry.counter("up").inc()
+        server = metrics.start_http_server(0, registry=self.registry)
+        try:
+            base_url = f"http://127.0.0.1:{server.server_address[1]}"
+            with urllib.request.urlopen(f"{base_url}/metrics") as response:
+                self.assertIn("up 1", response.read().decode("utf-8"))
+            with urllib.request.urlopen(f"{base_url}/metrics.json") as response:
+                self.assertEqual(json.load(response)["metrics"]["up"]["values"], {"total": 1})
+        finally:
+            server.shutdown()
+            server.server_close()
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,91 @@
+import os
+import random
+import unittest
+import tempfile
+
+from src.database.cv_database import CVDatabase
+from src.database.near_duplicates import NearDuplicateIndex, choose_bands
+
+def random_text(rng: random.Random, words: int = 400) -> str:
+    vocabulary = [f"word{i}" for i in range(2000)]
+    return " ".join(rng.choice(vocabulary) for _ in range(words))
+
+class TestNearDuplicateIndex(unittest.TestCase):
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cv_database = CVDatabase(db_path=os.path.join(self.temp_dir.name, "cv_database.db"))
+        self.index = NearDuplicateIndex(self.cv_database, threshold=0.8)
+        self.rng = random.Random(0)
+    
+    def tearDown(self):
+        self.index.close()
+        self.cv_database.close()
+        self.temp_dir.cleanup()
+    
+    def test_choose_bands(self):
+        bands, rows = choose_bands(128, 0.5)
+        self.assertEqual(bands * rows, 128)
+        self.assertAlmostEqual((1 / bands) ** (1 / rows), 0.5, delta=0.1)
+    
+    def test_finds_edited_copy_but_not_unrelated_text(self):
+        original = random_text(self.rng)
+        for i in range(50):
+            self.index.add(f"other{i}.pdf", random_text(self.rng))
+        self.index.add("original.pdf", original)
+        
+        # A few words changed and different whitespace
+        words = original.split()
+        words[200:203] = ["edited", "phone", "number"]
+        edited = "\n".join(words)
+        
+        cv_id, similarity = self.index.find_duplicate(edited)
+        self.assertEqual(cv_id, "original.pdf")
+        self.assertGreater(similarity, 0.8)
+        self.assertIsNone(self.index.find_duplicate(edited, exclude="original.pdf"))
+        self.assertIsNone(self.index.find_duplicate(random_text(self.rng)))
+    
+    def test_signatures_persist_and_follow_deletions(self):
+        text = random_text(self.rng)
+        self.cv_database.add_cv("cv1.pdf", {"personal_info": {}})
+        self.index.add("cv1.pdf", text)
+        
+        reopened = NearDuplicateIndex(self.cv_database, threshold=0.8)
+        self.assertEqual(reopened.find_duplicate(text)[0], "cv1.pdf")
+        
+        self.cv_database.delete_cv("cv1.pdf")
+        self.assertIsNone(reopened.find_duplicate(text))
+        self.assertEqual(len(NearDuplicateIndex(self.cv_database, threshold=0.8)), 0)
+        reopened.close()
+    
+    def test_add_during_database_batch(self):
+        # The batch holds a write transaction on the CV database until it exits
+        with self.cv_database.batch():
+            self.cv_database.add_cv("cv1.pdf", {"personal_info": {}})
+            self.index.add("cv1.pdf", random_text(self.rng))
+        self.assertEqual(len(NearDuplicateIndex(self.cv_database, threshold=0.8)), 1)
+    
+    def test_reload_keeps_cvs_still_being_analysed(self):
+        in_flight = random_text(self.rng)
+        self.index.add("in_flight.pdf", in_flight)
+        self.index.add("stored.pdf", random_text(self.rng))
+        self.cv_database.add_cv("stored.pdf", {"personal_info": {}})
+        
+        self.cv_database.load_database()
+        self.assertEqual(self.index.find_duplicate(in_flight)[0], "in_flight.pdf")
+        self.assertEqual(len(self.index), 2)
+        
+        # Another process has no such CV in flight, so its reload prunes the orphan
+        reopened = NearDuplicateIndex(self.cv_database, threshold=0.8)
+        self.cv_database.load_database()
+        self.assertIsNone(reopened.find_duplicate(in_flight))
+        self.assertEqual(len(reopened), 1)
+        reopened.close()
+    
+    def test_invalid_threshold(self):
+        with self.assertRaises(ValueError):
+            NearDuplicateIndex(self.cv_database, threshold=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
+import asyncio
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 
 from src.query.query_engine import CVQueryEngine
 from src.database.cv_database import CVDatabase
@@ -70,6 +71,11 @@ class TestQueryEngine(unittest.TestCase):
         self.assertEqual(result, "John Doe has Python skills")
         mock_start_chat.assert_called_once()
         
+        # The question costs exactly one model round trip
+        mock_chat.send_message.assert_called_once_with("Who has Python skills?")
+        self.assertEqual(self.query_engine.get_query_stats()["llm_calls"], 1)
+        self.assertGreater(self.query_engine.get_query_stats()["prompt_tokens"], 0)
+        
         # Verify conversation history was updated
         self.assertEqual(len(self.query_engine.conversation_history), 2)
         self.assertEqual(self.query_engine.conversation_history[0]["role"], "user")
@@ -78,7 +84,99 @@ class TestQueryEngine(unittest.TestCase):
         self.assertEqual(self.query_engine.conversation_history[1]["content"], "John Doe has Python skills")
     
     @patch("google.generativeai.GenerativeModel.start_chat")
-    def test_query_with_exception(self, mock_start_chat):
+    def test_query_carries_history(self, mock_start_chat):
+        mock_chat = MagicMock()
+        mock_chat.send_message.side_effect = [MagicMock(text="John Doe"), MagicMock(text="Stanford")]
+        mock_start_chat.return_value = mock_chat
+        
+        self.query_engine.query("Who has Python skills?")
+        self.query_engine.query("Where did he study?")
+        
+        # The second question replays the first turn as history instead of extra calls
+        history = mock_start_chat.call_args.kwargs["history"]
+        self.assertEqual([turn["role"] for turn in history], ["user", "model", "user", "model"])
+        self.assertEqual(history[2]["parts"], ["Who has Python skills?"])
+        self.assertEqual(history[3]["parts"], ["John Doe"])
+        self.assertEqual(mock_chat.send_message.call_count, 2)
+        self.assertEqual(self.query_engine.usage_stats["llm_calls"], 2)
+    
+    @patch("google.generativeai.GenerativeModel.start_chat")
+    def test_query_sessions_are_isolated(self, mock_start_chat):
+        mock_chat = MagicMock()
+        mock_chat.send_message.side_effect = [MagicMock(text="John Doe"), MagicMock(text="Jane Smith")]
+        mock_start_chat.return_value = mock_chat
+        
+        self.query_engine.query("Who has Python skills?", session_id="alice")
+        self.query_engine.query("Who has Java skills?", session_id="bob")
+        
+        # Bob's question does not see Alice's conversation
+        history = mock_start_chat.call_args.kwargs["history"]
+        self.assertEqual(len(history), 2)
+        self.assertEqual(len(self.query_engine.get_conversation("alice")), 2)
+        self.assertEqual(self.query_engine.get_conversation("bob")[1]["content"], "Jane Smith")
+        self.assertEqual(self.query_engine.conversation_history, [])
+        
+        self.query_engine.clear_conversation("alice")
+        self.assertEqual(self.query_engine.get_conversation("alice"), [])
+        self.assertEqual(len(self.query_engine.get_conversation("bob")), 2)
+    
+    @patch("google.generativeai.GenerativeModel.start_chat")
+    def test_query_async(self, mock_start_chat):
+        mock_chat = MagicMock()
+        mock_chat.send_message_async = AsyncMock(return_value=MagicMock(text="John Doe has Python skills"))
+        mock_start_chat.return_value = mock_chat
+        
+        result = asyncio.run(self.query_engine.query_async("Who has Python skills?", session_id="alice"))
+        
+        self.assertEqual(result, "John Doe has Python skills")
+        mock_chat.send_message_async.assert_awaited_once_with("Who has Python skills?")
+        mock_chat.send_message.assert_not_called()
+        self.assertEqual(len(self.query_engine.get_conversation("alice")), 2)
+    
+    @patch("google.generativeai.GenerativeModel.start_chat")
+    def test_query_uses_answer_cache_until_database_changes(self, mock_start_chat):
+        mock_chat = MagicMock()
+        mock_chat.send_message.return_value = MagicMock(text="John Doe has Python skills")
+        mock_start_chat.return_value = mock_chat
+        self.cv_database.generation = 1
+        
+        self.query_engine.query("Who has Python skills?", session_id="alice")
+        result = self.query_engine.query("who has python skills", session_id="bob")
+        
+        # The second recruiter gets the cached answer without an LLM call
+        self.assertEqual(result, "John Doe has Python skills")
+        self.assertEqual(mock_chat.send_message.call_count, 1)
+        self.assertTrue(self.query_engine.get_query_stats("bob")["cache_hit"])
+        # Each session keeps the stats of its own last question
+        self.assertFalse(self.query_engine.get_query_stats("alice")["cache_hit"])
+        self.assertEqual(self.query_engine.get_query_stats("alice")["llm_calls"], 1)
+        self.assertEqual(self.query_engine.get_conversation("bob")[1]["content"], "John Doe has Python skills")
+        
+        # A database change invalidates the cached answer
+        self.cv_database.generation = 2
+        self.query_engine.query("Who has Python skills?", session_id="carol")
+        self.assertEqual(mock_chat.send_message.call_count, 2)
+        self.assertEqual(self.query_engine.usage_stats["cache_hits"], 1)
+    
+    @patch("google.generativeai.GenerativeModel.start_chat")
+    def test_query_retrieves_relevant_cvs_within_budget(self, mock_start_chat):
+        mock_chat = MagicMock()
+        mock_chat.send_message.return_value = MagicMock(text="John Doe has Python skills")
+        mock_start_chat.return_value = mock_chat
+        
+        # Only one CV fits in the prompt budget
+        self.query_engine.context_token_budget = self.query_engine.retriever.context_tokens("cv1.pdf")
+        
+        self.query_engine.query("Who has Python skills?")
+        
+        prompt = mock_start_chat.call_args.kwargs["history"][0]["parts"][0]
+        self.assertIn("John Doe", prompt)
+        self.assertNotIn("Jane Smith", prompt)
+        self.assertIn("subset of 1 out of 2 CVs", prompt)
+    
+    @patch.object(CVQueryEngine._send_chat.retry, "sleep")
+    @patch("google.generativeai.GenerativeModel.start_chat")
+    def test_query_with_exception(self, mock_start_chat, mock_sleep):
         # Mock chat session that raises an exception
         mock_chat = MagicMock()
         mock_chat.send_message.side_effect = Exception("Test error")
@@ -87,10 +185,63 @@ class TestQueryEngine(unittest.TestCase):
         # Test query with exception
         result = self.query_engine.query("Who has Python skills?")
         
-        # Verify error message is returned
+        # Verify error message is returned once the retries are exhausted
         self.assertTrue("I'm sorry, I encountered an error" in result)
+        self.assertEqual(mock_chat.send_message.call_count, 3)
+    
+    @patch.object(CVQueryEngine._send_chat.retry, "sleep")
+    @patch("google.generativeai.GenerativeModel.start_chat")
+    def test_query_retries_transient_errors(self, mock_start_chat, mock_sleep):
+        mock_chat = MagicMock()
+        mock_chat.send_message.side_effect = [Exception("503 Service Unavailable"),
+                                              MagicMock(text="John Doe has Python skills")]
+        mock_start_chat.return_value = mock_chat
+        
+        result = self.query_engine.query("Who has Python skills?")
+        
+        self.assertEqual(result, "John Doe has Python skills")
+        self.assertEqual(mock_chat.send_message.call_count, 2)
+        mock_sleep.assert_called_once()
+        # The question is recorded once, not once per attempt
+        self.assertEqual([message["role"] for message in self.query_engine.conversation_history],
+                         ["user", "assistant"])
+    
+    @patch("google.generativeai.GenerativeModel.start_chat")
+    def test_query_stream(self, mock_start_chat):
+        mock_chat = MagicMock()
+        mock_chat.send_message.return_value = iter([MagicMock(text="John Doe "), MagicMock(text="has Python skills")])
+        mock_start_chat.return_value = mock_chat
+        
+        chunks = list(self.query_engine.query_stream("Who has Python skills?"))
+        
+        self.assertEqual(chunks, ["John Doe ", "has Python skills"])
+        mock_chat.send_message.assert_called_once_with("Who has Python skills?", stream=True)
+        self.assertEqual(self.query_engine.conversation_history[-1],
+                         {"role": "assistant", "content": "John Doe has Python skills"})
+        self.assertIsNotNone(self.query_engine.get_query_stats()["first_chunk_seconds"])
+        
+        # The complete answer is cached for repeated questions
+        self.query_engine.clear_conversation()
+        self.assertEqual(list(self.query_engine.query_stream("Who has Python skills?")), ["John Doe has Python skills"])
         mock_start_chat.assert_called_once()
+    
+    @patch("google.generativeai.GenerativeModel.start_chat")
+    def test_query_stream_with_exception(self, mock_start_chat):
+        def failing_stream():
+            yield MagicMock(text="John Doe")
+            raise Exception("Test error")
+        mock_chat = MagicMock()
+        mock_chat.send_message.return_value = failing_stream()
+        mock_start_chat.return_value = mock_chat
+        
+        chunks = list(self.query_engine.query_stream("Who has Python skills?"))
+        
+        self.assertEqual(chunks[0], "John Doe")
+        self.assertIn("I'm sorry, I encountered an error", chunks[-1])
+        # Partial answers are neither kept in history nor cached
+        self.assertEqual(self.query_engine.conversation_history[-1]["role"], "user")
+        self.assertEqual(self.query_engine.answer_cache.stats()["entries"], 0)
 
 
 if __name__ == "__main__":
-    unittest.main() 
\ No newline at end of file
+    unittest.main()
\ No newline at end of file
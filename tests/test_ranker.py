@@ -0,0 +1,78 @@
+import os
+import unittest
+import tempfile
+
+from src.database.cv_database import CVDatabase
+from src.query.ranker import CandidateRanker, parse_job_description, duration_years, education_level
+
+def cv_record(skills, title, degree, duration):
+    return {
+        "personal_info": {},
+        "education": [{"degree": degree, "institution": "", "year": "", "field": ""}],
+        "work_experience": [{"title": title, "company": "", "duration": duration, "responsibilities": []}],
+        "skills": {"technical": skills, "soft": [], "languages": []}
+    }
+
+class TestCandidateRanker(unittest.TestCase):
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cv_database = CVDatabase(db_path=os.path.join(self.temp_dir.name, "cv_database.db"))
+        self.cv_database.add_cv("backend.pdf", cv_record(["python", "Kubernetes", "PostgreSQL"],
+                                                         "Senior Backend Engineer", "MSc Computer Science", "6 years"))
+        self.cv_database.add_cv("junior.pdf", cv_record(["Python"], "Backend Developer", "BSc", "2019 - 2021"))
+        self.cv_database.add_cv("frontend.pdf", cv_record(["React", "CSS"], "Frontend Developer", "PhD", "10 years"))
+        self.ranker = CandidateRanker(self.cv_database)
+        self.job_description = ("Backend Engineer with 5+ years of experience in Python and Kubernetes. "
+                                "Master's degree required.")
+    
+    def tearDown(self):
+        self.cv_database.close()
+        self.temp_dir.cleanup()
+    
+    def test_parsing_helpers(self):
+        requirements = parse_job_description(self.job_description)
+        self.assertEqual(requirements["skills"], ["Python", "Kubernetes"])
+        self.assertEqual(requirements["education_level"], 3)
+        self.assertEqual(requirements["min_years"], 5)
+        self.assertEqual(duration_years("18 months"), 1.5)
+        self.assertEqual(duration_years("2019 - 2021"), 2)
+        self.assertEqual(education_level("Bachelor of Science"), 2)
+        self.assertEqual(education_level("Mathematics"), 0)
+    
+    def test_rank_orders_candidates_and_explains_scores(self):
+        ranking = self.ranker.rank(self.job_description, top_k=2)
+        
+        self.assertEqual([result["cv_id"] for result in ranking], ["backend.pdf", "junior.pdf"])
+        best = ranking[0]
+        self.assertEqual(best["matched_skills"], ["Kubernetes", "Python"])
+        self.assertEqual(best["missing_skills"], [])
+        self.assertEqual((best["years_experience"], best["education_level"]), (6.0, "master"))
+        self.assertAlmostEqual(sum(best["contributions"].values()), best["score"], places=3)
+        self.assertEqual(ranking[1]["missing_skills"], ["Kubernetes"])
+    
+    def test_rank_follows_database_changes_and_filters(self):
+        self.cv_database.delete_cv("backend.pdf")
+        self.assertEqual(self.ranker.rank(self.job_description, top_k=1)[0]["cv_id"], "junior.pdf")
+        
+        ranking = self.ranker.rank(self.job_description, filters={"field": "skills.technical", "value": "react"})
+        self.assertEqual([result["cv_id"] for result in ranking], ["frontend.pdf"])
+    
+    def test_ties_are_broken_by_cv_id(self):
+        for index in range(40, 0, -1):
+            self.cv_database.add_cv(f"tied_{index:02d}.pdf", cv_record(["Go"], "Engineer", "", ""))
+        
+        ranking = self.ranker.rank("Engineer with Go", top_k=5)
+        
+        self.assertEqual([result["cv_id"] for result in ranking], [f"tied_{index:02d}.pdf" for index in range(1, 6)])
+    
+    def test_rank_without_requirements(self):
+        self.assertEqual(self.ranker.rank("We are hiring"), [])
+    
+    def test_unknown_weight(self):
+        with self.assertRaises(ValueError):
+            CandidateRanker(self.cv_database, weights={"salary": 1.0})
+
+
+if __name__ == "__main__":
+    unittest.main()
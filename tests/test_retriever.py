@@ -0,0 +1,51 @@
+import os
+import unittest
+import tempfile
+
+from src.database.cv_database import CVDatabase
+from src.query.retriever import CVRetriever, tokenize
+
+class TestCVRetriever(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cv_database = CVDatabase(db_path=os.path.join(self.temp_dir.name, "test_database.db"))
+        self.cv_database.add_cv("cv1.pdf", {
+            "personal_info": {"name": "John Doe"},
+            "skills": {"technical": ["Python", "Machine Learning", "C++"]}
+        })
+        self.cv_database.add_cv("cv2.pdf", {
+            "personal_info": {"name": "Jane Smith"},
+            "skills": {"technical": ["Java", "SQL"]}
+        })
+        self.retriever = CVRetriever(self.cv_database)
+    
+    def tearDown(self):
+        self.cv_database.close()
+        self.temp_dir.cleanup()
+    
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Who knows C++ and Node.js?"), ["knows", "c++", "node.js"])
+    
+    def test_search_ranks_relevant_cvs(self):
+        results = self.retriever.search("Who has Python skills?")
+        self.assertEqual([cv_id for cv_id, _ in results], ["cv1.pdf"])
+        
+        results = self.retriever.search("java or python developers", top_k=1)
+        self.assertEqual(len(results), 1)
+    
+    def test_index_follows_database_changes(self):
+        self.assertEqual(self.retriever.search("kotlin"), [])
+        total_tokens = self.retriever.total_context_tokens()
+        
+        self.cv_database.add_cv("cv3.pdf", {"skills": {"technical": ["Kotlin"]}})
+        self.assertEqual([cv_id for cv_id, _ in self.retriever.search("kotlin")], ["cv3.pdf"])
+        self.assertGreater(self.retriever.total_context_tokens(), total_tokens)
+        
+        self.cv_database.delete_cv("cv3.pdf")
+        self.assertEqual(self.retriever.search("kotlin"), [])
+        self.assertEqual(self.retriever.total_context_tokens(), total_tokens)
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,61 @@
+import unittest
+
+from src.analyzers.rule_extractor import RuleBasedExtractor, SkillMatcher
+
+class TestSkillMatcher(unittest.TestCase):
+
+    def test_matches_whole_words_only(self):
+        matcher = SkillMatcher({"java": "Java", "javascript": "JavaScript", "c++": "C++", "go": "Go"})
+        
+        skills = matcher.find_skills("JavaScript and Java developer, some C++ but no c+++ or going")
+        
+        self.assertEqual(skills, ["JavaScript", "Java", "C++"])
+    
+    def test_overlapping_terms(self):
+        matcher = SkillMatcher({"spark": "Spark", "apache spark": "Spark", "machine learning": "Machine Learning",
+                                "learning": "Learning"})
+        
+        matches = matcher.find_all("Apache Spark, machine learning")
+        
+        self.assertIn((0, 12, "Spark"), matches)
+        self.assertIn((7, 12, "Spark"), matches)
+        self.assertIn((14, 30, "Machine Learning"), matches)
+        self.assertIn((22, 30, "Learning"), matches)
+
+class TestRuleBasedExtractor(unittest.TestCase):
+
+    def setUp(self):
+        self.extractor = RuleBasedExtractor()
+        self.cv_text = (
+            "Curriculum Vitae\n"
+            "Jane Smith\n"
+            "jane.smith@example.com | (555) 123-4567 | linkedin.com/in/janesmith\n"
+            "Portfolio: https://janesmith.dev.\n"
+            "Experience 2015 - 2019: Backend engineer using Python, Django and PostgreSQL on AWS with k8s\n"
+        )
+    
+    def test_extract(self):
+        result = self.extractor.extract(self.cv_text)
+        
+        self.assertEqual(result["personal_info"], {
+            "name": "Jane Smith",
+            "email": "jane.smith@example.com",
+            "phone": "(555) 123-4567",
+            "location": "",
+            "links": ["linkedin.com/in/janesmith", "https://janesmith.dev"]
+        })
+        self.assertEqual(result["skills"]["technical"], ["Python", "Django", "PostgreSQL", "AWS", "Kubernetes"])
+        self.assertEqual(result["work_experience"], [])
+    
+    def test_year_ranges_are_not_phone_numbers(self):
+        self.assertEqual(self.extractor.extract_phone("Worked there 2015 - 2019 and 2019-2023"), "")
+    
+    def test_missing_fields(self):
+        result = self.extractor.extract("experienced engineer")
+        
+        self.assertEqual(result["personal_info"]["name"], "")
+        self.assertEqual(result["personal_info"]["email"], "")
+        self.assertEqual(result["skills"]["technical"], [])
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,158 @@
+import os
+import threading
+import unittest
+import tempfile
+
+from src.database.cv_database import CVDatabase
+from src.database.semantic_index import SemanticIndex, normalize_text, cv_document
+
+def make_cv(name: str, title: str, skills: list) -> dict:
+    return {
+        "personal_info": {"name": name},
+        "work_experience": [{"job_title": title, "company": "Acme"}],
+        "skills": {"technical": skills}
+    }
+
+class TestSemanticIndex(unittest.TestCase):
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "cv_database.db")
+        self.cv_database = CVDatabase(db_path=self.db_path)
+        self.cv_database.add_cv("ml.pdf", make_cv("Ada", "ML Engineer", ["python", "pytorch"]),
+                                cv_text="Trained deep learning models for image classification.")
+        self.cv_database.add_cv("web.pdf", make_cv("Ben", "Frontend Developer", ["javascript", "react", "css"]),
+                                cv_text="Built responsive web applications and design systems.")
+        self.cv_database.add_cv("ops.pdf", make_cv("Cy", "Site Reliability Engineer", ["kubernetes", "terraform"]),
+                                cv_text="Ran production clusters and on-call rotations.")
+    
+    def tearDown(self):
+        self.cv_database.close()
+        self.temp_dir.cleanup()
+    
+    def test_normalize_text_expands_abbreviations(self):
+        self.assertEqual(normalize_text("Senior ML/AI engineer"),
+                         "senior machine learning/artificial intelligence engineer")
+        self.assertEqual(normalize_text("html and mlops"), "html and mlops")
+    
+    def test_cv_document_covers_fields_and_text(self):
+        document = cv_document(dict(make_cv("Ada", "ML Engineer", ["python"]), near_duplicate_of={"cv_id": "x.pdf"}),
+                               "Extracted text")
+        self.assertIn("ML Engineer", document)
+        self.assertIn("python", document)
+        self.assertIn("Extracted text", document)
+        self.assertNotIn("x.pdf", document)
+    
+    def test_search_matches_paraphrase(self):
+        results = self.cv_database.semantic_search("machine learning", top_k=3)
+        self.assertEqual(results[0][0], "ml.pdf")
+        self.assertGreater(results[0][1], 0)
+        
+        # The extracted text is indexed alongside the structured fields
+        self.assertEqual(self.cv_database.semantic_search("on-call production", top_k=1)[0][0], "ops.pdf")
+    
+    def test_search_with_filters(self):
+        results = self.cv_database.semantic_search(
+            "engineer building applications", filters={"field": "skills.technical", "value": "react"})
+        self.assertEqual([cv_id for cv_id, _ in results], ["web.pdf"])
+        self.assertEqual(self.cv_database.semantic_search(
+            "machine learning", filters={"field": "skills.technical", "value": "cobol"}), [])
+    
+    def test_additions_append_without_refit(self):
+        index = self.cv_database.semantic_index
+        index.refit_ratio = 10
+        index.refresh()
+        model = index._meta["model"]
+        
+        self.cv_database.add_cv("data.pdf", make_cv("Di", "Data Scientist", ["python", "pytorch"]),
+                                cv_text="Deep learning models for forecasting.")
+        results = self.cv_database.semantic_search("deep learning pytorch", top_k=2)
+        self.assertIn("data.pdf", [cv_id for cv_id, _ in results])
+        self.assertEqual(index._meta["model"], model)
+        self.assertEqual(len(index), 4)
+    
+    def test_sampled_fit_is_not_refitted_on_every_search(self):
+        # The model is fitted on a sample smaller than the corpus; growth is measured against the corpus
+        index = SemanticIndex(self.cv_database, fit_sample=1)
+        index.search("machine learning")
+        model = index._meta["model"]
+        index.search("machine learning")
+        self.assertEqual(index._meta["model"], model)
+    
+    def test_deleted_and_updated_cvs(self):
+        self.cv_database.semantic_search("machine learning")
+        self.cv_database.delete_cv("ml.pdf")
+        self.assertNotIn("ml.pdf", [cv_id for cv_id, _ in self.cv_database.semantic_search("machine learning")])
+        
+        self.cv_database.add_cv("web.pdf", make_cv("Ben", "ML Engineer", ["python", "pytorch"]))
+        self.assertEqual(self.cv_database.semantic_search("machine learning", top_k=1)[0][0], "web.pdf")
+        self.assertEqual(len(self.cv_database.semantic_index), 2)
+    
+    def test_persists_and_syncs_with_other_writers(self):
+        expected = self.cv_database.semantic_search("machine learning")
+        self.cv_database.close()
+        
+        # Another process adds a CV while the index is closed
+        writer = CVDatabase(db_path=self.db_path)
+        writer.add_cv("infra.pdf", make_cv("Di", "Site Reliability Engineer", ["kubernetes"]),
+                      cv_text="Ran clusters.")
+        writer.close()
+        
+        self.cv_database = CVDatabase(db_path=self.db_path)
+        reopened = SemanticIndex(self.cv_database, refit_ratio=10)
+        self.assertEqual(len(reopened), 3)
+        self.assertIsNotNone(reopened._vectors)
+        self.assertIsNone(reopened._model)
+        cv_id, similarity = reopened.search("machine learning", top_k=1)[0]
+        self.assertEqual(cv_id, expected[0][0])
+        self.assertAlmostEqual(similarity, expected[0][1], places=5)
+        self.assertEqual({cv_id for cv_id, _ in reopened.search("kubernetes clusters", top_k=2)},
+                         {"ops.pdf", "infra.pdf"})
+        self.assertEqual(len(reopened), 4)
+    
+    def test_add_during_search_does_not_deadlock(self):
+        self.cv_database.semantic_search("machine learning")
+        self.cv_database.add_cv("data.pdf", make_cv("Di", "Data Scientist", ["python"]), cv_text="Deep learning.")
+        
+        # Hold the searcher inside the index lock, just before it reads the database,
+        # while the writer adds a CV under the database lock
+        searching = threading.Event()
+        written = threading.Event()
+        get_cv_texts = self.cv_database.get_cv_texts
+        
+        def paused_get_cv_texts(cv_ids):
+            searching.set()
+            written.wait(timeout=2)
+            return get_cv_texts(cv_ids)
+        
+        def write():
+            searching.wait(timeout=10)
+            self.cv_database.add_cv("more.pdf", make_cv("Ed", "ML Engineer", ["python"]))
+            written.set()
+        
+        self.cv_database.get_cv_texts = paused_get_cv_texts
+        threads = [threading.Thread(target=self.cv_database.semantic_search, args=("machine learning",), daemon=True),
+                   threading.Thread(target=write, daemon=True)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+        
+        self.assertFalse(any(thread.is_alive() for thread in threads), "add_cv and semantic_search deadlocked")
+        self.assertTrue(written.is_set())
+        del self.cv_database.get_cv_texts
+        self.assertIn("more.pdf", [cv_id for cv_id, _ in self.cv_database.semantic_search("machine learning")])
+    
+    def test_close_stops_following_the_database(self):
+        index = SemanticIndex(self.cv_database)
+        index.close()
+        self.cv_database.add_cv("data.pdf", make_cv("Di", "Data Scientist", ["python"]))
+        self.assertEqual(len(index._changes), 0)
+    
+    def test_empty_database(self):
+        empty = CVDatabase(db_path=os.path.join(self.temp_dir.name, "empty.db"))
+        self.assertEqual(empty.semantic_search("anything"), [])
+        empty.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+
+from src.processors.text_compactor import TextCompactor
+
+class TestTextCompactor(unittest.TestCase):
+
+    def setUp(self):
+        self.compactor = TextCompactor(token_budget=6000)
+    
+    def test_removes_noise(self):
+        text = (
+            "John Doe\n"
+            "ACME Corp  -  Curriculum Vitae\n"
+            "Page 1 of 3\n"
+            "Senior software engi-\n"
+            "neer with   10 years of experience\n\n\n\n"
+            "~~~|||~~\n"
+            "Responsibilities:\f"
+            "ACME Corp - Curriculum Vitae\n"
+            "Page 2 of 3\n"
+            "Responsibilities:\f"
+            "ACME Corp - Curriculum Vitae\n"
+        )
+        
+        compacted, stats = self.compactor.compact(text)
+        
+        self.assertEqual(compacted, (
+            "John Doe\n"
+            "ACME Corp - Curriculum Vitae\n"
+            "Senior software engineer with 10 years of experience\n\n"
+            "Responsibilities:\n"
+            "Responsibilities:"
+        ))
+        self.assertEqual(stats["original_chars"], len(text))
+        self.assertEqual(stats["chars_saved"], len(text) - len(compacted))
+        self.assertGreater(stats["tokens_saved"], 0)
+    
+    def test_keeps_repeated_job_titles_and_companies(self):
+        text = (
+            "Jane Roe - Curriculum Vitae\n"
+            "Experience\n"
+            "Software Engineer\nGoogle\n2020 - 2023\nBuilt search infrastructure.\n"
+            "Software Engineer\nGoogle\n2017 - 2020\nBuilt ads pipelines.\n"
+            "Software Engineer\nGoogle\n2014 - 2017\nBuilt internal tools.\n"
+            "jane@example.com\f"
+            "Jane Roe - Curriculum Vitae\n"
+            "Education\nBSc Computer Science\n"
+            "jane@example.com\f"
+            "Jane Roe - Curriculum Vitae\n"
+            "Skills\nPython\n"
+            "jane@example.com"
+        )
+        
+        compacted, _ = self.compactor.compact(text)
+        
+        self.assertEqual(compacted.count("Software Engineer"), 3)
+        self.assertEqual(compacted.count("Google"), 3)
+        self.assertEqual(compacted.count("Jane Roe - Curriculum Vitae"), 1)
+        self.assertEqual(compacted.count("jane@example.com"), 1)
+    
+    def test_keeps_repeated_lines_without_page_breaks(self):
+        text = "Software Engineer\nGoogle\n" * 3
+        compacted, _ = self.compactor.compact(text)
+        self.assertEqual(compacted, text.strip())
+    
+    def test_keeps_short_skill_lines(self):
+        lines = ["C++ / C# / .NET", "C, C++, C#", "R | Go | C", "12", "Café · Zürich", "- Node.js (3 yrs)"]
+        compacted, _ = self.compactor.compact("\n".join(lines))
+        self.assertEqual(compacted.split("\n"), lines)
+    
+    def test_removes_symbol_lines(self):
+        text = "Skills\n------\n••• ▪▪▪ ■■\n*** ### ***\n▒▓░ a ▒▓░\nPython\n3 / 4"
+        compacted, _ = self.compactor.compact(text)
+        self.assertEqual(compacted, "Skills\nPython")
+    
+    def test_budget_trims_low_priority_sections_first(self):
+        experience = "\n".join(f"Built system {i} at ACME" for i in range(10))
+        publications = "\n".join(f"A study of topic {i}, Journal of Things, 20{i:02d}" for i in range(40))
+        text = f"Experience\n{experience}\nPublications\n{publications}\nSkills\nPython, SQL"
+        
+        compactor = TextCompactor(token_budget=200, low_priority_section_lines=2)
+        compacted, stats = compactor.compact(text)
+        
+        self.assertIn("Built system 9 at ACME", compacted)
+        self.assertIn("Python, SQL", compacted)
+        self.assertIn("A study of topic 1,", compacted)
+        self.assertNotIn("A study of topic 2,", compacted)
+        self.assertIn("[38 more lines omitted]", compacted)
+        self.assertLessEqual(stats["compacted_tokens"], 200)
+    
+    def test_budget_truncates_when_still_too_long(self):
+        text = "\n".join(f"Line {i} of a very long work history" for i in range(500))
+        
+        compacted, stats = TextCompactor(token_budget=100).compact(text)
+        
+        self.assertTrue(compacted.endswith("[truncated]"))
+        self.assertLessEqual(stats["compacted_tokens"], 105)
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
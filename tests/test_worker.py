@@ -0,0 +1,65 @@
+import os
+import unittest
+import tempfile
+from unittest.mock import MagicMock
+
+from src.pipeline.job_queue import JobQueue, DONE, FAILED, PENDING
+from src.pipeline.worker import IngestionWorker
+from src.processors.cv_processor import CVProcessor
+from src.analyzers.cv_analyzer import CVAnalyzer
+from src.database.cv_database import CVDatabase
+
+class TestIngestionWorker(unittest.TestCase):
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cv_dir = os.path.join(self.temp_dir.name, "cvs")
+        os.makedirs(self.cv_dir)
+        for filename in ("cv1.pdf", "cv2.docx", "notes.txt"):
+            with open(os.path.join(self.cv_dir, filename), "w") as f:
+                f.write(filename)
+        
+        self.job_queue = JobQueue(os.path.join(self.temp_dir.name, "queue.db"), max_attempts=2, backoff_base=0)
+        self.cv_database = CVDatabase(db_path=os.path.join(self.temp_dir.name, "cv_database.db"))
+        
+        self.cv_processor = MagicMock(spec=CVProcessor)
+        self.cv_processor.process_document.side_effect = lambda path: f"text of {os.path.basename(path)}"
+        self.cv_analyzer = MagicMock(spec=CVAnalyzer)
+        self.cv_analyzer.extract_cv_information.side_effect = \
+            lambda text, raise_errors=False: {"personal_info": {"name": text}}
+        
+        self.worker = IngestionWorker(self.job_queue, self.cv_processor, self.cv_analyzer, self.cv_database,
+                                      threads=2, poll_interval=0.01, settle_seconds=0)
+    
+    def tearDown(self):
+        self.job_queue.close()
+        self.cv_database.close()
+        self.temp_dir.cleanup()
+    
+    def test_scan_folder_queues_supported_files_once(self):
+        self.assertEqual(self.worker.scan_folder(self.cv_dir), 2)
+        self.assertEqual(self.worker.scan_folder(self.cv_dir), 0)
+    
+    def test_run_until_idle(self):
+        self.worker.run(watch_folders=[self.cv_dir], until_idle=True)
+        
+        self.assertEqual(self.job_queue.counts()[DONE], 2)
+        self.assertEqual(self.cv_database.get_cv("cv2.docx"), {"personal_info": {"name": "text of cv2.docx"}})
+    
+    def test_failures_are_retried_then_marked_failed(self):
+        self.cv_analyzer.extract_cv_information.side_effect = Exception("LLM unavailable")
+        self.job_queue.enqueue(os.path.join(self.cv_dir, "cv1.pdf"))
+        
+        self.assertFalse(self.worker.process_job(self.job_queue.claim("worker")))
+        self.assertEqual(self.job_queue.counts()[PENDING], 1)
+        
+        self.worker.run(until_idle=True)
+        
+        self.assertEqual(self.job_queue.counts()[FAILED], 1)
+        self.assertEqual(self.cv_analyzer.extract_cv_information.call_count, 2)
+        self.cv_analyzer.extract_cv_information.assert_called_with("text of cv1.pdf", raise_errors=True)
+        self.assertIsNone(self.cv_database.get_cv("cv1.pdf"))
+
+
+if __name__ == "__main__":
+    unittest.main()